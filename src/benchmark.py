@@ -0,0 +1,207 @@
+"""
+Benchmark suite for the Book Recommender
+Run     : python src/benchmark.py --ratings 1000000 --out bench.json
+          python src/benchmark.py --data-dir data --baseline bench.json
+
+Generates Book-Crossing-shaped synthetic data (see download_data.py) unless
+--data-dir is given, then times every stage: loading, model building and the
+query paths. Each stage reports p50/p95/p99 latency, throughput and the peak
+RSS reached while it ran, as JSON, so two runs can be diffed for regressions.
+"""
+
+import os, sys, json, time, shutil, platform, argparse, tempfile, resource
+
+import numpy as np
+
+from main import (DataLoader, BookRecommenderSystem, ResultCache, Metrics, TOKEN_RE,
+                  SNAPSHOT_DIRNAME, _lazy_import, _quiet, _version)
+from download_data import create_synthetic_data
+
+BENCH_VERSION = 1
+DEFAULT_RATINGS = 100_000
+DEFAULT_QUERIES = 200
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  MEASUREMENT
+# ─────────────────────────────────────────────────────────────────────────────
+def _reset_peak_rss():
+    """Restart the kernel's RSS high-water mark (Linux), so each stage reports
+    its own peak; elsewhere the peak is the process-wide maximum."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as fh:
+            fh.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_stage(fn, inputs):
+    """Call ``fn`` once per input; latency percentiles (ms), throughput and
+    peak RSS of the stage."""
+    _reset_peak_rss()
+    times = np.empty(len(inputs))
+    start = time.perf_counter()
+    for i, arg in enumerate(inputs):
+        t0 = time.perf_counter()
+        fn(arg)
+        times[i] = time.perf_counter() - t0
+    wall = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(times * 1000, [50, 95, 99])
+    return {'calls': len(inputs), 'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3),
+            'p99_ms': round(p99, 3), 'mean_ms': round(times.mean() * 1000, 3),
+            'throughput_per_s': round(len(inputs) / wall, 2) if wall else None,
+            'peak_rss_mb': round(_peak_rss_mb(), 1)}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  STAGES
+# ─────────────────────────────────────────────────────────────────────────────
+def run_benchmark(data_dir, queries=DEFAULT_QUERIES, build_repeat=1, seed=0, cached=False,
+                  metrics=False):
+    """Time every stage on the CSVs in ``data_dir`` → result dict. With ``metrics``
+    the recommender's own per-operation breakdown is added under 'metrics'."""
+    rng = np.random.default_rng(seed)
+    stages, frames, built = {}, {}, {}
+
+    def load_csv(_):
+        shutil.rmtree(os.path.join(data_dir, SNAPSHOT_DIRNAME), ignore_errors=True)
+        frames['data'] = DataLoader(data_dir).load()      # parse + write the snapshot
+
+    def load_snapshot(_):
+        frames['data'] = DataLoader(data_dir).load()
+
+    def build(_):
+        cache = None if cached else ResultCache(max_entries=0)
+        built['rec'] = BookRecommenderSystem(*frames['data'], cache=cache,
+                                             metrics=Metrics() if metrics else None)
+
+    with _quiet():
+        # one-off import cost on its own line, not inside the first build
+        stages['import sklearn'] = run_stage(lambda _: [_lazy_import(f'sklearn.{m}') for m in
+                                                        ('feature_extraction.text', 'decomposition')], [0])
+        stages['DataLoader.load (csv)'] = run_stage(load_csv, range(build_repeat))
+        stages['DataLoader.load (snapshot)'] = run_stage(load_snapshot, range(build_repeat))
+        stages['BookRecommenderSystem.__init__'] = run_stage(build, range(build_repeat))
+        rec = built['rec']
+        stages['_build_content_model'] = run_stage(
+            lambda _: rec._build_content_model(), range(build_repeat))
+
+        books, ratings, _ = frames['data']
+        isbns = rec._item_isbns[rng.integers(0, rec._n_books, queries)]
+        users = rec._user_ids[rng.integers(0, len(rec._user_ids), queries)]
+        titles = books['Book-Title'].astype(str).to_numpy()[rng.integers(0, len(books), queries)]
+        words = [max(TOKEN_RE.findall(t.lower()) or ['the'], key=len) for t in titles]
+
+        stages['search'] = run_stage(lambda q: rec.search(q, 'title'), words)
+        stages['content_recommendations'] = run_stage(
+            lambda isbn: rec.content_recommendations(isbn, 5), isbns)
+        stages['collaborative_recommendations'] = run_stage(
+            lambda u: rec.collaborative_recommendations(u, 5), users)
+        stages['popular_books'] = run_stage(lambda _: rec.popular_books(10), range(queries))
+        # the same queries without building DataFrames (the service's path)
+        stages['content_results'] = run_stage(lambda isbn: rec.content_results(isbn, 5), isbns)
+        stages['collaborative_results'] = run_stage(lambda u: rec.collaborative_results(u, 5), users)
+        stages['popular_results'] = run_stage(lambda _: rec.popular_results(10), range(queries))
+
+    result = {
+        'version': BENCH_VERSION,
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'numpy': np.__version__, 'pandas': _version('pandas'),
+            'scipy': _version('scipy'), 'scikit-learn': _version('scikit-learn'),
+            'books': len(books), 'users': len(frames['data'][2]), 'ratings': len(ratings),
+            'queries': queries, 'seed': seed, 'result_cache': cached, 'metrics': metrics,
+        },
+        'stages': stages,
+    }
+    if metrics:
+        result['metrics'] = rec.stats()
+    return result
+
+
+def compare(result, baseline):
+    """Per-stage p50/p95 ratios against a previous run (> 1 = slower)."""
+    rows = {}
+    for name, stage in result['stages'].items():
+        old = baseline.get('stages', {}).get(name)
+        if old:
+            rows[name] = {k: round(stage[k] / old[k], 3) if old[k] else None
+                          for k in ('p50_ms', 'p95_ms', 'peak_rss_mb')}
+    return rows
+
+
+def print_table(result, ratios=None):
+    print(f"\n{'stage':<32}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'RSS MB':>9}"
+          + (f"{'p50 ×':>8}" if ratios else ''), file=sys.stderr)
+    for name, s in result['stages'].items():
+        line = (f"{name:<32}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}"
+                f"{s['throughput_per_s'] or 0:>10.1f}{s['peak_rss_mb']:>9.0f}")
+        if ratios and name in ratios:
+            line += f"{ratios[name]['p50_ms'] or 0:>8.2f}"
+        print(line, file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Book Recommender benchmark suite")
+    parser.add_argument('--data-dir', help="benchmark existing BX-*.csv files instead of synthetic data")
+    parser.add_argument('--ratings', type=int, default=DEFAULT_RATINGS,
+                        help="synthetic dataset size (e.g. 10000 … 10000000)")
+    parser.add_argument('--queries', type=int, default=DEFAULT_QUERIES, help="calls per query stage")
+    parser.add_argument('--build-repeat', type=int, default=1, help="runs of each load/build stage")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cached', action='store_true',
+                        help="keep the result cache on (default: measure uncached compute)")
+    parser.add_argument('--metrics', action='store_true',
+                        help="record the recommender's per-operation timings and counters too")
+    parser.add_argument('--out', help="write the JSON result here (default: stdout)")
+    parser.add_argument('--baseline', help="previous JSON result to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tmp_dir = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        tmp_dir = data_dir = tempfile.mkdtemp(prefix='bx-bench-')
+        with _quiet():
+            create_synthetic_data(args.ratings, data_dir, seed=args.seed)
+    else:       # keep the user's snapshot out of the way: benchmark a copy
+        tmp_dir = tempfile.mkdtemp(prefix='bx-bench-')
+        for f in DataLoader.FILES:
+            shutil.copy(os.path.join(data_dir, f), tmp_dir)
+        data_dir = tmp_dir
+    try:
+        result = run_benchmark(data_dir, args.queries, args.build_repeat, args.seed, args.cached,
+                               args.metrics)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    ratios = None
+    if args.baseline:
+        with open(args.baseline) as fh:
+            ratios = result['vs_baseline'] = compare(result, json.load(fh))
+    print_table(result, ratios)
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, 'w') as fh:
+            fh.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""
+Offline evaluation for the Book Recommender
+Run     : python src/evaluate.py --split last --k 10
+          python src/evaluate.py --split random --folds 5 --workers 0 --out eval.json
+
+Holds out part of each user's ratings, trains on the rest, recommends through
+the batch APIs and scores the lists against the held-out books:
+precision@k, recall@k, NDCG@k, MAP@k and catalogue coverage, computed with
+NumPy over every evaluated user at once. Each method's quality is reported
+next to its build time and scoring throughput, so a faster variant can be
+checked against the one it replaces. Folds run in parallel processes.
+"""
+
+import sys, json, time, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from main import (DATA_DIR, DataLoader, BookRecommenderSystem, ResultCache, resolve_workers,
+                  _quiet)
+
+EVAL_VERSION = 1
+METHODS      = ('user', 'item', 'svd', 'popular')
+METRICS      = ('precision', 'recall', 'ndcg', 'map')
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  SPLITS
+# ─────────────────────────────────────────────────────────────────────────────
+def _rank_within_user(users, keys):
+    """Position of every rating inside its user's group, ordered by ``keys``."""
+    order = np.lexsort((keys, users))
+    sorted_users = users[order]
+    starts = np.flatnonzero(np.r_[True, sorted_users[1:] != sorted_users[:-1]])
+    sizes  = np.diff(np.r_[starts, len(users)])
+    rank = np.empty(len(users), dtype=np.int64)
+    rank[order] = np.arange(len(users)) - np.repeat(starts, sizes)
+    return rank, np.repeat(sizes, sizes)[np.argsort(order)]
+
+
+def split_ratings(ratings, mode='last', fraction=0.2, seed=0, fold=0, folds=1):
+    """Split ``ratings`` by user into (train, test) frames.
+
+    mode 'last'   – each user's last rating (file order) is held out
+    mode 'random' – with ``folds`` > 1 each user's ratings are dealt at random
+                    into that many folds and fold ``fold`` is held out;
+                    otherwise a random ``fraction`` of each user's ratings.
+
+    Only users with at least two ratings are tested, and every tested user
+    keeps at least one rating for training.
+    """
+    users = ratings['User-ID'].to_numpy()
+    if mode == 'last':
+        rank, size = _rank_within_user(users, -np.arange(len(users)))
+        test = (rank == 0) & (size >= 2)
+    elif mode == 'random':
+        rng = np.random.default_rng(seed)
+        rank, size = _rank_within_user(users, rng.random(len(users)))
+        if folds > 1:
+            test = (rank % folds == fold) & (size >= 2)
+        else:
+            held = np.clip(np.floor(size * fraction), 1, size - 1)
+            test = (rank < held) & (size >= 2)
+    else:
+        raise ValueError(f"unknown split mode {mode!r}; expected 'last' or 'random'")
+    return ratings[~test].reset_index(drop=True), ratings[test].reset_index(drop=True)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  METRICS  (vectorised over all users: rows of a users × k matrix)
+# ─────────────────────────────────────────────────────────────────────────────
+def ranking_metrics(relevant, n_relevant, k):
+    """Mean precision@k, recall@k, NDCG@k and MAP@k.
+
+    ``relevant`` is the (users × k) boolean hit matrix of the recommended
+    lists, False where a list is short; ``n_relevant`` the number of held-out
+    relevant items per user (all > 0).
+    """
+    hits = relevant[:, :k].astype(np.float64)
+    n_hits = hits.sum(axis=1)
+    discount = 1.0 / np.log2(np.arange(2, k + 2))
+    dcg  = hits @ discount
+    idcg = np.cumsum(discount)[np.minimum(n_relevant, k) - 1]
+    precision_at = np.cumsum(hits, axis=1) / np.arange(1, k + 1)
+    ap = (precision_at * hits).sum(axis=1) / np.minimum(n_relevant, k)
+    return {'precision': float(np.mean(n_hits / k)),
+            'recall':    float(np.mean(n_hits / n_relevant)),
+            'ndcg':      float(np.mean(dcg / idcg)),
+            'map':       float(np.mean(ap))}
+
+
+def coverage(recs, n_catalogue):
+    """Share of the catalogue appearing in at least one list."""
+    items = recs[recs >= 0]
+    return float(len(np.unique(items)) / max(n_catalogue, 1))
+
+
+def _rec_matrix(frame, user_ids, codes_of, k):
+    """Long-format batch output → (users × k) matrix of ISBN codes, -1 padded."""
+    out = np.full((len(user_ids), k), -1, dtype=np.int64)
+    if len(frame):
+        row = pd.Index(user_ids).get_indexer(frame['User-ID'])
+        out[row, frame['rank'].to_numpy() - 1] = codes_of(frame['ISBN'])
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  ONE FOLD
+# ─────────────────────────────────────────────────────────────────────────────
+def _popular_matrix(rec, user_ids, item_codes, train_keys, n_items, k, block=1024):
+    """Most popular books per user, minus the books that user trained on."""
+    rows = np.array([rec._user_row(u) for u in user_ids], dtype=np.int64)
+    longest = int(np.diff(rec._ui_csr.indptr)[rows].max(initial=0))
+    codes = item_codes[rec._popularity_index().top(k + longest)]
+    out = np.full((len(user_ids), k), -1, dtype=np.int64)
+    for s in range(0, len(user_ids), block):
+        users = np.asarray(user_ids[s:s + block], dtype=np.int64)
+        keys  = users[:, None] * n_items + codes[None, :]
+        seen  = np.isin(keys, train_keys)
+        pos   = np.cumsum(~seen, axis=1)
+        take  = ~seen & (pos <= k)
+        r, c  = np.nonzero(take)
+        out[s + r, pos[r, c] - 1] = codes[c]
+    return out
+
+
+def run_fold(data_dir, split='last', fraction=0.2, seed=0, fold=0, folds=1, k=10,
+             methods=METHODS, min_rating=BookRecommenderSystem.LIKED_RATING, max_users=None):
+    """Train on one split, score its test users with every method → result dict."""
+    with _quiet():
+        books, ratings, users = DataLoader(data_dir).load()
+        train, test = split_ratings(ratings, split, fraction, seed, fold, folds)
+        t0 = time.perf_counter()
+        rec = BookRecommenderSystem(books, train, users, cache=ResultCache(max_entries=0))
+        base_build = time.perf_counter() - t0
+
+    # ISBNs and user ids of both halves as codes in one shared space
+    categories = ratings['ISBN'].cat.categories
+    n_items = len(categories)
+    codes_of = lambda isbns: pd.Categorical(np.asarray(isbns, dtype=object), categories=categories).codes
+    item_codes = codes_of(rec._item_isbns).astype(np.int64)
+    test = test[test['Book-Rating'] >= min_rating]
+    test_users = np.unique(test['User-ID'].to_numpy())
+    if max_users and len(test_users) > max_users:
+        test_users = np.sort(np.random.default_rng(seed).choice(test_users, max_users, replace=False))
+    test = test[np.isin(test['User-ID'].to_numpy(), test_users)]
+    test_keys  = np.unique(test['User-ID'].to_numpy(np.int64) * n_items + test['ISBN'].cat.codes.to_numpy())
+    n_relevant = np.bincount(np.searchsorted(test_users, test['User-ID'].to_numpy()),
+                             minlength=len(test_users))
+    train_keys = np.unique(train['User-ID'].to_numpy(np.int64) * n_items + train['ISBN'].cat.codes.to_numpy())
+
+    result = {'fold': fold, 'train': len(train), 'test': len(test), 'users': len(test_users),
+              'base_build_s': round(base_build, 3), 'methods': {}}
+    for method in methods:
+        with _quiet():
+            t0 = time.perf_counter()           # lazily built models are timed on their own
+            if method == 'svd':
+                rec._factors()
+            elif method == 'item':
+                rec._item_index()
+            build = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            if method == 'popular':
+                recs = _popular_matrix(rec, test_users, item_codes, train_keys, n_items, k)
+            else:
+                frame = rec.batch_collaborative_recommendations(test_users, k, method=method)
+                recs = _rec_matrix(frame, test_users, codes_of, k)
+            scoring = time.perf_counter() - t0
+
+        keys = test_users[:, None].astype(np.int64) * n_items + recs
+        relevant = (recs >= 0) & np.isin(keys, test_keys)
+        result['methods'][method] = {
+            **ranking_metrics(relevant, n_relevant, k),
+            'coverage': coverage(recs, rec._n_books),
+            'build_s': round(base_build + build, 3),
+            'users_per_s': round(len(test_users) / scoring, 1) if scoring else None,
+        }
+    return result
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  FOLDS
+# ─────────────────────────────────────────────────────────────────────────────
+def _run_fold_kwargs(kwargs):
+    return run_fold(**kwargs)
+
+
+def evaluate(data_dir=DATA_DIR, split='last', fraction=0.2, folds=1, seed=0, k=10,
+             methods=METHODS, min_rating=BookRecommenderSystem.LIKED_RATING,
+             max_users=None, workers=None):
+    """Run every fold (in parallel when ``workers`` > 1, ``0`` = one per CPU)
+    and average the metrics per method → result dict."""
+    if split == 'last' and folds > 1:
+        raise ValueError("the 'last' split has a single fold; use --split random for folds")
+    unknown = set(methods) - set(METHODS)
+    if unknown:
+        raise ValueError(f"unknown methods {sorted(unknown)}; expected some of {list(METHODS)}")
+    with _quiet():
+        DataLoader(data_dir).load()            # parse + snapshot once, before the folds
+
+    jobs = [dict(data_dir=data_dir, split=split, fraction=fraction, seed=seed, fold=f, folds=folds,
+                 k=k, methods=tuple(methods), min_rating=min_rating, max_users=max_users)
+            for f in range(folds)]
+    workers = min(resolve_workers(workers), len(jobs))
+    if workers <= 1:
+        fold_results = [run_fold(**job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fold_results = list(pool.map(_run_fold_kwargs, jobs))
+
+    summary = {}
+    for method in methods:
+        rows = [r['methods'][method] for r in fold_results]
+        summary[method] = {key: round(float(np.mean([r[key] for r in rows])), 4)
+                           for key in (*METRICS, 'coverage', 'build_s', 'users_per_s')}
+        if len(rows) > 1:
+            summary[method].update({f'{m}_std': round(float(np.std([r[m] for r in rows])), 4)
+                                    for m in METRICS})
+    return {
+        'version': EVAL_VERSION,
+        'meta': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'split': split,
+                 'fraction': fraction, 'folds': folds, 'seed': seed, 'k': k,
+                 'min_rating': min_rating, 'max_users': max_users, 'workers': workers},
+        'summary': summary,
+        'folds': fold_results,
+    }
+
+
+def print_table(result):
+    k = result['meta']['k']
+    print(f"\n{'method':<10}{f'P@{k}':>9}{f'R@{k}':>9}{f'NDCG@{k}':>9}{f'MAP@{k}':>9}"
+          f"{'cover':>8}{'build s':>9}{'users/s':>10}", file=sys.stderr)
+    for method, s in result['summary'].items():
+        print(f"{method:<10}{s['precision']:>9.4f}{s['recall']:>9.4f}{s['ndcg']:>9.4f}{s['map']:>9.4f}"
+              f"{s['coverage']:>8.3f}{s['build_s']:>9.2f}{s['users_per_s'] or 0:>10.0f}", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Book Recommender offline evaluation")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="folder holding the BX-*.csv files")
+    parser.add_argument('--split', choices=('last', 'random'), default='last',
+                        help="hold out each user's last rating, or random ratings")
+    parser.add_argument('--fraction', type=float, default=0.2, help="held-out share (random, 1 fold)")
+    parser.add_argument('--folds', type=int, default=1, help="folds of the random split")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--k', type=int, default=10, help="list length scored")
+    parser.add_argument('--methods', default=','.join(METHODS),
+                        help=f"comma-separated subset of {', '.join(METHODS)}")
+    parser.add_argument('--min-rating', type=int, default=BookRecommenderSystem.LIKED_RATING,
+                        help="held-out ratings at or above this count as relevant")
+    parser.add_argument('--max-users', type=int, help="evaluate a random sample of test users")
+    parser.add_argument('--workers', type=int, default=None, help="fold processes (0 = one per CPU)")
+    parser.add_argument('--out', help="write the JSON result here (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = evaluate(args.data_dir, args.split, args.fraction, args.folds, args.seed, args.k,
+                      [m.strip() for m in args.methods.split(',') if m.strip()],
+                      args.min_rating, args.max_users, args.workers)
+    print_table(result)
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, 'w') as fh:
+            fh.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
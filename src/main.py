@@ -2,30 +2,105 @@
 Advanced Book Recommender System
 Dataset : Kaggle – Book-Crossing (arashnic/book-recommendation-dataset)
 Run     : python src/download_data.py   (first time)
-          python src/main.py
+          python src/main.py              (interactive menu)
+          python src/main.py --serve      (HTTP service, see server.py)
+
+Plotting (matplotlib) and model fitting (scikit-learn) are imported on first
+use, so ``import main`` / ``load_recommender()`` stay light for scoring jobs.
 """
 
-import os, sys
+import time
+_IMPORT_START = time.perf_counter()
+
+import os, sys, re, json, shutil, bisect, hashlib, argparse, functools, threading
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from importlib import import_module, metadata
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from itertools import repeat
+from multiprocessing import shared_memory
 import pandas as pd
 import numpy as np
-import matplotlib
-import os
-# Use TkAgg locally (interactive), Agg in Docker/CI (no display)
-if not os.environ.get('MPLBACKEND'):
-    try:
-        matplotlib.use('TkAgg')
-    except Exception:
-        matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.decomposition import TruncatedSVD
-from sklearn.preprocessing import MinMaxScaler
-import sklearn
+from scipy import sparse
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 
+SNAPSHOT_DIRNAME  = '.snapshot'        # cleaned-frame cache, lives next to the CSVs
+SNAPSHOT_MANIFEST = 'snapshot.json'
+SNAPSHOT_VERSION  = 4                  # bump when the cleaning rules or dtypes change
+
+MODEL_DIRNAME     = '.model'           # trained recommender bundle, next to the snapshot
+MODEL_MANIFEST    = 'model.json'
+MODEL_VERSION     = 1                  # bump when the bundle layout changes
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  STARTUP PROFILE + LAZY IMPORTS
+# ─────────────────────────────────────────────────────────────────────────────
+STARTUP_PROFILE = {}        # phase → seconds, in the order the phases ran
+
+
+@contextmanager
+def _phase(name):
+    """Add the wall time of the block to ``STARTUP_PROFILE[name]``."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_PROFILE[name] = STARTUP_PROFILE.get(name, 0.0) + time.perf_counter() - t0
+
+
+def _lazy_import(module):
+    """``import_module`` that records the first (real) import in the profile.
+
+    Always goes through ``import_module``: it is cheap once the module is
+    loaded and, unlike a bare ``sys.modules`` lookup, waits for an import
+    still running in another thread."""
+    if module in sys.modules:
+        return import_module(module)
+    with _phase(f'import {module.split(".")[0]}'):
+        return import_module(module)
+
+
+def _pyplot():
+    """matplotlib.pyplot, choosing the backend on first use: TkAgg locally
+    (interactive), Agg in Docker/CI (no display)."""
+    if 'matplotlib.pyplot' not in sys.modules and not os.environ.get('MPLBACKEND'):
+        matplotlib = _lazy_import('matplotlib')
+        try:
+            matplotlib.use('TkAgg')
+        except Exception:
+            matplotlib.use('Agg')
+    return _lazy_import('matplotlib.pyplot')
+
+
+def _sklearn(module, name):
+    return getattr(_lazy_import(f'sklearn.{module}'), name)
+
+
+def print_startup_profile():
+    """Phases recorded so far; lazy imports also count inside the phase that
+    triggered them, so the wall total is measured separately."""
+    print("\n⏱️  Startup profile")
+    for name, secs in STARTUP_PROFILE.items():
+        print(f"   {name:<22} {secs * 1000:9.1f} ms")
+    print(f"   {'wall since import':<22} {(time.perf_counter() - _IMPORT_START) * 1000:9.1f} ms")
+
+
+def _version(dist):
+    """Installed version of a distribution, None when it is missing."""
+    try:
+        return metadata.version(dist)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+@contextmanager
+def _quiet():
+    """Silence the progress prints (benchmark and evaluation runs)."""
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        yield
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 #  STARTUP BANNER
 # ─────────────────────────────────────────────────────────────────────────────
@@ -34,7 +109,7 @@ def print_banner():
     print("█" + " "*60 + "█")
     print("█   📚  ADVANCED BOOK RECOMMENDER  v3.0  (Kaggle Data)   █")
     print("█" + " "*60 + "█")
-    print(f"█   🔬 scikit-learn  {sklearn.__version__:<8}  📊 matplotlib {matplotlib.__version__:<8}  █")
+    print(f"█   🔬 scikit-learn  {_version('scikit-learn') or '-':<8}  📊 matplotlib {_version('matplotlib') or '-':<8}  █")
     print(f"█   🐼 pandas        {pd.__version__:<8}  🔢 numpy      {np.__version__:<8}  █")
     print("█" + " "*60 + "█")
     print("█"*62 + "\n")
@@ -43,31 +118,58 @@ def print_banner():
 #  DATA LOADER
 # ─────────────────────────────────────────────────────────────────────────────
 class DataLoader:
-    def __init__(self, data_dir=DATA_DIR):
-        self.data_dir = data_dir
+    FILES = ['BX-Books.csv', 'BX-Ratings.csv', 'BX-Users.csv']
+    FRAMES = ['books', 'ratings', 'users']
+
+    RATINGS_CHUNKSIZE = 250_000    # rating rows parsed per chunk
+
+    def __init__(self, data_dir=DATA_DIR, cache_dir=None, use_cache=True,
+                 extra_ratings=(), chunksize=None):
+        self.data_dir  = data_dir
+        self.cache_dir = cache_dir or os.path.join(data_dir, SNAPSHOT_DIRNAME)
+        self.use_cache = use_cache
+        self.extra_ratings = [os.path.abspath(p) for p in extra_ratings]   # merged into BX-Ratings
+        self.chunksize = chunksize or self.RATINGS_CHUNKSIZE
+        self.fingerprint = None    # digest of the source CSVs, once known
 
     def _path(self, fname):
         return os.path.join(self.data_dir, fname)
 
+    def _sources(self):
+        """Every input file, keyed as in the snapshot manifest."""
+        return {**{f: self._path(f) for f in self.FILES}, **{p: p for p in self.extra_ratings}}
+
     def load(self):
-        if not all(os.path.exists(self._path(f))
-                   for f in ['BX-Books.csv', 'BX-Ratings.csv', 'BX-Users.csv']):
+        if not all(os.path.exists(self._path(f)) for f in self.FILES):
             print("⚠️  Dataset not found. Running downloader...")
             import subprocess
             subprocess.run([sys.executable,
                             os.path.join(os.path.dirname(__file__), 'download_data.py')])
 
         print("📂 Loading dataset...")
+        frames = self._load_snapshot() if self.use_cache else None
+        if frames is None:
+            frames = self._parse_csvs()
+            if self.use_cache:
+                self._save_snapshot(frames)
+        books, ratings, users = frames
+
+        print(f"   📚 Books   : {len(books):,}")
+        print(f"   👤 Users   : {len(users):,}")
+        print(f"   ⭐ Ratings : {len(ratings):,}")
+        return books, ratings, users
+
+    def _parse_csvs(self):
+        # ISBNs stay text, as in read_ratings, so all-digit ISBNs keep their leading zeros
         books   = pd.read_csv(self._path('BX-Books.csv'),   sep=';', on_bad_lines='skip',
-                               encoding='latin-1', low_memory=False)
-        ratings = pd.read_csv(self._path('BX-Ratings.csv'), sep=';', on_bad_lines='skip',
-                               encoding='latin-1', low_memory=False)
+                               encoding='latin-1', low_memory=False, dtype={'ISBN': str})
         users   = pd.read_csv(self._path('BX-Users.csv'),   sep=';', on_bad_lines='skip',
                                encoding='latin-1', low_memory=False)
+        # ratings are streamed: filtered and encoded chunk by chunk
+        ratings = read_ratings([self._path('BX-Ratings.csv'), *self.extra_ratings], self.chunksize)
 
         # normalise column names
         books.columns   = [c.strip().replace('"','') for c in books.columns]
-        ratings.columns = [c.strip().replace('"','') for c in ratings.columns]
         users.columns   = [c.strip().replace('"','') for c in users.columns]
 
         # strip stray quotes from values
@@ -78,47 +180,651 @@ class DataLoader:
             books['Year-Of-Publication'], errors='coerce')
         books = books[(books['Year-Of-Publication'] >= 1800) &
                       (books['Year-Of-Publication'] <= 2024)]
+        return compact_frames(books, ratings, users)
+
+    # ── binary snapshot of the cleaned frames ─────────────────────────────────
+    # The snapshot is keyed on (size, mtime, sha1) of every source CSV. A changed
+    # size means changed content; a changed mtime alone is confirmed by hashing,
+    # so a plain `touch` or re-copy of identical files keeps the snapshot valid.
+    def _source_fingerprints(self, with_hash=True):
+        fps = {}
+        for f, path in self._sources().items():
+            st = os.stat(path)
+            fps[f] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+            if with_hash:
+                fps[f]['sha1'] = _file_sha1(path)
+        return fps
+
+    def _set_fingerprint(self, fps):
+        digest = hashlib.sha1()
+        for f in sorted(fps):
+            digest.update(fps[f]['sha1'].encode())
+        self.fingerprint = digest.hexdigest()
+
+    def _load_snapshot(self):
+        manifest_path = os.path.join(self.cache_dir, SNAPSHOT_MANIFEST)
+        try:
+            with open(manifest_path) as fh:
+                manifest = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != SNAPSHOT_VERSION:
+            return None
+
+        current = self._source_fingerprints(with_hash=False)
+        if set(current) != set(manifest['sources']):
+            return None
+        touched = False
+        for f, fp in current.items():
+            saved = manifest['sources'][f]
+            if saved['size'] != fp['size']:
+                return None
+            if saved['mtime_ns'] != fp['mtime_ns']:
+                if _file_sha1(self._sources()[f]) != saved['sha1']:
+                    return None
+                saved['mtime_ns'] = fp['mtime_ns']
+                touched = True
+
+        try:
+            frames = tuple(read_frame(os.path.join(self.cache_dir, name))
+                           for name in self.FRAMES)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Snapshot unreadable ({e}), re-parsing CSVs...")
+            return None
+
+        self._set_fingerprint(manifest['sources'])
+        if touched:   # same bytes, new mtime – refresh so we skip hashing next time
+            try:
+                _write_json(manifest_path, manifest)
+            except OSError:
+                pass
+        print("   ⚡ Using cached snapshot")
+        return frames
+
+    def _save_snapshot(self, frames):
+        tmp_dir = f"{self.cache_dir}.tmp-{os.getpid()}"
+        try:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            for name, frame in zip(self.FRAMES, frames):
+                write_frame(frame, os.path.join(tmp_dir, name))
+            sources = self._source_fingerprints(with_hash=True)
+            self._set_fingerprint(sources)
+            _write_json(os.path.join(tmp_dir, SNAPSHOT_MANIFEST), {
+                'version': SNAPSHOT_VERSION,
+                'sources': sources,
+            })
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.replace(tmp_dir, self.cache_dir)
+        except OSError as e:   # read-only data volume etc. – snapshot is optional
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            print(f"⚠️  Could not write snapshot: {e}")
+
+
+def _as_int(series, dtype):
+    """``series`` as ``dtype`` when every value is a whole number in range,
+    otherwise unchanged."""
+    values = pd.to_numeric(series, errors='coerce')
+    info = np.iinfo(dtype)
+    if values.isna().any() or (values % 1 != 0).any() or \
+            (len(values) and (values.min() < info.min or values.max() > info.max)):
+        return series
+    return values.astype(dtype)
+
+
+def compact_frames(books, ratings, users):
+    """Narrow the cleaned frames' dtypes.
+
+    ISBN, author, publisher and location become categoricals – ISBN with one
+    category list shared by books and ratings, so merges join on codes –
+    years int16, user ids int32, ratings int8 and ages float32.
+    """
+    books = books.assign(**{
+        'ISBN': books['ISBN'].astype(str),
+        'Year-Of-Publication': _as_int(books['Year-Of-Publication'], np.int16),
+        **{c: books[c].astype('category') for c in ('Book-Author', 'Publisher') if c in books},
+    })
+    ratings = ratings.assign(**{
+        'ISBN': ratings['ISBN'].astype(str),
+        'User-ID': _as_int(ratings['User-ID'], np.int32),
+        'Book-Rating': _as_int(ratings['Book-Rating'], np.int8),
+    })
+    isbn = pd.CategoricalDtype(pd.Index(books['ISBN'].unique(), dtype=object)
+                               .append(pd.Index(ratings['ISBN'].unique(), dtype=object)).unique())
+    books['ISBN'], ratings['ISBN'] = books['ISBN'].astype(isbn), ratings['ISBN'].astype(isbn)
+
+    users = users.assign(**{
+        'User-ID': _as_int(users['User-ID'], np.int32),
+        **({'Age': pd.to_numeric(users['Age'], errors='coerce').astype(np.float32)}
+           if 'Age' in users else {}),
+        **({'Location': users['Location'].astype('category')} if 'Location' in users else {}),
+    })
+    return books, ratings, users
 
-        ratings['Book-Rating'] = pd.to_numeric(ratings['Book-Rating'], errors='coerce')
-        ratings = ratings[ratings['Book-Rating'] > 0]   # drop implicit 0s
 
-        print(f"   📚 Books   : {len(books):,}")
-        print(f"   👤 Users   : {len(users):,}")
-        print(f"   ⭐ Ratings : {len(ratings):,}")
-        return books, ratings, users
+# ─────────────────────────────────────────────────────────────────────────────
+#  STREAMING RATINGS READER  (chunked CSV → compact typed columns)
+# ─────────────────────────────────────────────────────────────────────────────
+class _GrowableArray:
+    """Append-only NumPy buffer that doubles its capacity when full."""
+
+    def __init__(self, dtype, capacity=1 << 16):
+        self._buf = np.empty(capacity, dtype=dtype)
+        self._n = 0
+
+    def extend(self, values):
+        need = self._n + len(values)
+        if need > len(self._buf):
+            grown = np.empty(max(need, 2 * len(self._buf)), dtype=self._buf.dtype)
+            grown[:self._n] = self._buf[:self._n]
+            self._buf = grown
+        self._buf[self._n:need] = values
+        self._n = need
+
+    def finish(self, dtype=None):
+        """The filled part as an exactly sized array (optionally cast)."""
+        out = self._buf[:self._n].astype(dtype or self._buf.dtype)
+        self._buf = self._buf[:0]
+        return out
+
+
+def read_ratings(paths, chunksize=DataLoader.RATINGS_CHUNKSIZE):
+    """Stream one or more rating CSVs into a compact frame.
+
+    Each chunk is type-coerced and stripped of implicit (0) ratings before it
+    is kept; ISBNs become int32 codes into one shared category list and every
+    column goes into a growing NumPy buffer, so peak memory follows the
+    compacted output rather than the raw text. Rows with an unparsable user
+    or rating are dropped. Returns User-ID (int), ISBN (categorical) and
+    Book-Rating (int8 when every rating is integral, else float32).
+    """
+    users  = _GrowableArray(np.int64)
+    items  = _GrowableArray(np.int32)
+    values = _GrowableArray(np.float32)
+    isbn_codes = {}
+    for path in paths:
+        header = pd.read_csv(path, sep=';', encoding='latin-1', nrows=0).columns
+        names  = {c.strip().replace('"', ''): c for c in header}
+        # ISBNs stay text: a chunk of all-digit ISBNs must not lose leading zeros
+        for chunk in pd.read_csv(path, sep=';', on_bad_lines='skip', encoding='latin-1',
+                                 dtype={names.get('ISBN', 'ISBN'): str}, chunksize=chunksize):
+            chunk.columns = [c.strip().replace('"', '') for c in chunk.columns]
+            rating = pd.to_numeric(chunk['Book-Rating'], errors='coerce').to_numpy()
+            user   = pd.to_numeric(chunk['User-ID'], errors='coerce').to_numpy()
+            isbn   = chunk['ISBN'].to_numpy()
+            keep   = (rating > 0) & ~np.isnan(user) & pd.notna(isbn)   # drop implicit 0s
+            codes, uniques = pd.factorize(isbn[keep])
+            lookup = np.fromiter((isbn_codes.setdefault(x, len(isbn_codes)) for x in uniques),
+                                 dtype=np.int32, count=len(uniques))
+            users.extend(user[keep])
+            items.extend(lookup[codes])
+            values.extend(rating[keep])
+
+    user_ids = users.finish()
+    ratings  = values.finish()
+    integral = len(ratings) == 0 or (np.all(ratings == np.round(ratings))
+                                     and ratings.min() >= -128 and ratings.max() <= 127)
+    fits_int32 = len(user_ids) == 0 or (user_ids.min() >= -2**31 and user_ids.max() < 2**31)
+    return pd.DataFrame({
+        'User-ID': user_ids.astype(np.int32 if fits_int32 else np.int64),
+        'ISBN': pd.Categorical.from_codes(items.finish(),
+                                          categories=pd.Index(list(isbn_codes), dtype=object)),
+        'Book-Rating': ratings.astype(np.int8) if integral else ratings,
+    })
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  COLUMNAR FRAME STORAGE  (.npy per column, strings as categorical codes)
+# ─────────────────────────────────────────────────────────────────────────────
+# Layout of a frame directory:
+#   columns.json   – column names, kinds and dtypes
+#   index.npy      – the frame index
+#   <i>.npy        – numeric values, or int32 codes for string/categorical columns
+#   <i>.cats       – NUL-separated UTF-8 categories of column <i>
+# Every .npy is opened with mmap_mode='r', so only the pages we touch are read.
+def _file_sha1(path, chunk=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(chunk), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_json(path, obj):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as fh:
+        json.dump(obj, fh, indent=1)
+    os.replace(tmp, path)
+
+
+def write_frame(df, path):
+    os.makedirs(path, exist_ok=True)
+    meta = []
+    for i, col in enumerate(df.columns):
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):     # stays categorical on read
+            codes, cats, kind = s.cat.codes.to_numpy(), s.cat.categories, 'cat'
+        elif pd.api.types.is_numeric_dtype(s.dtype) or pd.api.types.is_bool_dtype(s.dtype):
+            np.save(os.path.join(path, f'{i}.npy'), s.to_numpy())
+            meta.append({'name': col, 'kind': 'num', 'dtype': str(s.dtype)})
+            continue
+        else:
+            (codes, cats), kind = pd.factorize(s, sort=False), 'str'
+        cats = [str(c).replace('\x00', '') for c in cats]
+        np.save(os.path.join(path, f'{i}.npy'), codes.astype(np.int32))
+        with open(os.path.join(path, f'{i}.cats'), 'wb') as fh:
+            fh.write('\x00'.join(cats).encode('utf-8'))
+        meta.append({'name': col, 'kind': kind, 'n_cats': len(cats)})
+    np.save(os.path.join(path, 'index.npy'), df.index.to_numpy())
+    _write_json(os.path.join(path, 'columns.json'), meta)
+
+
+def read_frame(path, mmap=True):
+    with open(os.path.join(path, 'columns.json')) as fh:
+        meta = json.load(fh)
+    mode = 'r' if mmap else None
+    data = {}
+    for i, col in enumerate(meta):
+        values = np.load(os.path.join(path, f'{i}.npy'), mmap_mode=mode)
+        if col['kind'] == 'num':
+            data[col['name']] = values
+            continue
+        with open(os.path.join(path, f'{i}.cats'), 'rb') as fh:
+            raw = fh.read().decode('utf-8')
+        cats = raw.split('\x00') if col['n_cats'] else []
+        if len(cats) != col['n_cats']:
+            raise ValueError(f"category count mismatch in column {col['name']!r}")
+        # categories get the default string dtype, as astype('category') gives them
+        values = pd.Categorical.from_codes(np.asarray(values), categories=pd.Index(cats))
+        data[col['name']] = values if col['kind'] == 'cat' else np.asarray(values, dtype=object)
+    index = np.load(os.path.join(path, 'index.npy'), mmap_mode=mode)
+    return pd.DataFrame(data, index=pd.Index(np.asarray(index)),
+                        columns=[c['name'] for c in meta])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  CHARTS  (small pre-aggregated data → matplotlib Figure; shown or exported)
+# ─────────────────────────────────────────────────────────────────────────────
+# Every chart is split into an aggregation step (EDA / recommender
+# ``chart_data``, cached) and a draw function over plain arrays. Interactive
+# use draws into a pyplot window; ``export_charts`` draws on bare Agg figures
+# in worker processes, so no display or pyplot state is involved.
+CHART_FORMATS      = ('png', 'svg')
+SCATTER_MAX_POINTS = 5000       # larger scatters are drawn as a binned density
+DENSITY_BINS       = (60, 45)   # (log rating count, avg rating) cells of that density
+
+
+def _colors(cmap, lo, hi, n):
+    return _lazy_import('matplotlib').colormaps[cmap](np.linspace(lo, hi, n))
+
+
+def _draw_rating_distribution(fig, d):
+    axes = fig.subplots(1, 2)
+    fig.suptitle('⭐ Rating Distribution (Book-Crossing Dataset)', fontsize=14, fontweight='bold')
+
+    # histogram
+    axes[0].hist(d['ratings'].astype(float), weights=d['counts'], bins=10, range=(1,10),
+                 color='#3498db', edgecolor='white', rwidth=0.85)
+    axes[0].set_xlabel('Rating (1–10)'); axes[0].set_ylabel('Count')
+    axes[0].set_title('All Ratings Histogram')
+    axes[0].grid(axis='y', linestyle='--', alpha=0.4)
+
+    # value counts bar
+    axes[1].bar(d['ratings'].astype(str), d['counts'], color='#e74c3c', edgecolor='white')
+    axes[1].set_xlabel('Rating'); axes[1].set_ylabel('Count')
+    axes[1].set_title('Rating Frequency')
+    axes[1].grid(axis='y', linestyle='--', alpha=0.4)
+
+
+def _draw_top_authors(fig, d):
+    ax = fig.subplots()
+    labels, values = d['labels'][::-1], d['values'][::-1]
+    bars = ax.barh(labels, values, color=_colors('viridis', 0.2, 0.9, len(values))[::-1],
+                   edgecolor='white')
+    for bar, val in zip(bars, values):
+        ax.text(bar.get_width()+1, bar.get_y()+bar.get_height()/2,
+                str(val), va='center', fontsize=8)
+    ax.set_xlabel('Number of Ratings')
+    ax.set_title('👤 Top 15 Most Rated Authors', fontsize=13, fontweight='bold')
+    ax.grid(axis='x', linestyle='--', alpha=0.4)
+
+
+def _draw_publications_per_decade(fig, d):
+    ax = fig.subplots()
+    ax.bar(d['decades'].astype(str), d['counts'], color='#2ecc71', edgecolor='white', width=0.7)
+    ax.set_xlabel('Decade'); ax.set_ylabel('Books Published')
+    ax.set_title('📅 Books Published per Decade', fontsize=13, fontweight='bold')
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(axis='y', linestyle='--', alpha=0.4)
+
+
+def _draw_top_publishers(fig, d):
+    ax = fig.subplots()
+    wedges, texts, autotexts = ax.pie(
+        d['values'], labels=d['labels'], autopct='%1.1f%%',
+        colors=_colors('Set3', 0, 1, len(d['values'])), startangle=140,
+        wedgeprops=dict(edgecolor='white', linewidth=1.5))
+    for t in autotexts: t.set_fontsize(7)
+    ax.set_title('🏢 Top 12 Publishers', fontsize=13, fontweight='bold')
+
+
+def _draw_user_activity(fig, d):
+    ax = fig.subplots()
+    edges = d['edges']
+    ax.hist(edges[:-1], bins=edges, weights=d['counts'], color='#9b59b6', edgecolor='white')
+    ax.set_xlabel('Books Rated per User'); ax.set_ylabel('Number of Users')
+    ax.set_title('👥 User Activity Distribution (≤50 ratings)', fontsize=13, fontweight='bold')
+    ax.grid(axis='y', linestyle='--', alpha=0.4)
+
+
+def _draw_top_books(fig, d):
+    ax = fig.subplots()
+    titles, values = d['titles'][::-1], d['popularity'][::-1]
+    bars = ax.barh(titles, values, color=_colors('RdYlGn', 0.3, 0.9, len(values)), edgecolor='white')
+    for bar, val in zip(bars, values):
+        ax.text(bar.get_width()+0.002, bar.get_y()+bar.get_height()/2,
+                f'{val:.3f}', va='center', fontsize=8)
+    ax.set_xlabel('Popularity Score (Weighted Rating)')
+    ax.set_title(f'🏆 Top {d["n"]} Books by Popularity', fontsize=13, fontweight='bold')
+    ax.grid(axis='x', linestyle='--', alpha=0.4)
+
+
+def _draw_similarity_heatmap(fig, d):
+    ax = fig.subplots()
+    sim, labels, n = d['sim'], d['labels'], len(d['labels'])
+    im = ax.imshow(sim, cmap='YlOrRd', vmin=0, vmax=1)
+    fig.colorbar(im, ax=ax, label='Cosine Similarity')
+    ax.set_xticks(range(n)); ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=7)
+    ax.set_yticks(range(n)); ax.set_yticklabels(labels, fontsize=7)
+    for i in range(n):
+        for j in range(n):
+            ax.text(j, i, f'{sim[i,j]:.2f}', ha='center', va='center', fontsize=6,
+                    color='white' if sim[i,j] > 0.5 else 'black')
+    ax.set_title('🔥 TF-IDF Cosine Similarity Heatmap (Top Books)', fontsize=12, fontweight='bold')
+
+
+def _draw_rating_vs_count(fig, d):
+    ax = fig.subplots()
+    if 'density' in d:      # too many books to scatter: books per (count, rating) cell
+        colors = _lazy_import('matplotlib.colors')
+        mesh = ax.pcolormesh(d['xedges'], d['yedges'], np.ma.masked_equal(d['density'].T, 0),
+                             cmap='viridis', norm=colors.LogNorm(), rasterized=True)
+        fig.colorbar(mesh, ax=ax, label='Books')
+        title = f'📈 Avg Rating vs Rating Count ({d["points"]:,} books, binned)'
+    else:
+        sc = ax.scatter(d['x'], d['y'], alpha=0.4, s=15, c=d['y'], cmap='RdYlGn', vmin=1, vmax=10)
+        fig.colorbar(sc, ax=ax, label='Avg Rating')
+        title = '📈 Avg Rating vs Rating Count'
+    ax.set_xlabel('Number of Ratings'); ax.set_ylabel('Average Rating (1–10)')
+    ax.set_title(title, fontsize=13, fontweight='bold')
+    ax.set_xscale('log')
+    ax.grid(linestyle='--', alpha=0.3)
+
+
+def _draw_year_trend(fig, d):
+    ax1 = fig.subplots()
+    ax2 = ax1.twinx()
+    ax1.plot(d['years'], d['avg'], color='#e74c3c', linewidth=2, label='Avg Rating')
+    ax2.bar(d['years'], d['count'], alpha=0.3, color='#3498db', label='Book Count')
+    ax1.set_xlabel('Year'); ax1.set_ylabel('Average Rating', color='#e74c3c')
+    ax2.set_ylabel('Books in Dataset', color='#3498db')
+    ax1.set_title('📅 Publication Year Trend (Rating & Volume)', fontsize=13, fontweight='bold')
+    lines1, labels1 = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax1.legend(lines1+lines2, labels1+labels2, loc='upper left')
+
+
+CHARTS = {      # name → (figure size, draw function)
+    'rating_distribution':     ((13, 5), _draw_rating_distribution),
+    'top_authors':             ((11, 6), _draw_top_authors),
+    'publications_per_decade': ((11, 5), _draw_publications_per_decade),
+    'top_publishers':          ((9, 7),  _draw_top_publishers),
+    'user_activity':           ((10, 5), _draw_user_activity),
+    'top_books':               ((12, 7), _draw_top_books),
+    'similarity_heatmap':      ((11, 9), _draw_similarity_heatmap),
+    'rating_vs_count':         ((10, 6), _draw_rating_vs_count),
+    'year_trend':              ((12, 5), _draw_year_trend),
+}
+
+
+def _rating_vs_count_data(counts, avg):
+    """Scatter points, or a log-count × rating histogram when there are too many."""
+    if len(counts) <= SCATTER_MAX_POINTS:
+        return {'x': counts, 'y': avg}
+    # log-spaced, but on half-integers so no cell falls between two whole counts
+    xedges = np.unique(np.rint(np.geomspace(max(counts.min(), 1), counts.max() + 1,
+                                            DENSITY_BINS[0] + 1))) - 0.5
+    yedges = np.linspace(0, 10, DENSITY_BINS[1] + 1)
+    density, _, _ = np.histogram2d(counts, avg, bins=(xedges, yedges))
+    return {'density': density, 'xedges': xedges, 'yedges': yedges, 'points': len(counts)}
+
+
+def show_chart(name, data):
+    """Draw chart ``name`` from its aggregated ``data`` in a pyplot window."""
+    plt = _pyplot()
+    size, draw = CHARTS[name]
+    fig = plt.figure(figsize=size)
+    draw(fig, data)
+    plt.tight_layout(); plt.show()
+
+
+def _init_chart_worker():
+    import warnings     # titles carry emoji the default font may lack
+    warnings.filterwarnings('ignore', message='Glyph .* missing')
+
+
+def _render_chart(job):
+    """Draw one chart on a bare (Agg) Figure and write it → (path, seconds)."""
+    name, data, path, dpi = job
+    t0 = time.perf_counter()
+    size, draw = CHARTS[name]
+    fig = _lazy_import('matplotlib.figure').Figure(figsize=size)
+    draw(fig, data)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+    return path, time.perf_counter() - t0
+
+
+def export_charts(out_dir, charts, formats=('png',), workers=0, dpi=100):
+    """Write every chart of ``charts`` ({name: data}, see ``chart_data``) to
+    ``out_dir/<name>.<format>`` without a display.
+
+    Charts are drawn in ``workers`` processes (``0`` = one per CPU, ``1`` =
+    in-process); only the small aggregated data is sent to them. Returns
+    {path: render seconds}.
+    """
+    unknown = set(formats) - set(CHART_FORMATS)
+    if unknown:
+        raise ValueError(f"unknown chart formats {sorted(unknown)}; expected some of {list(CHART_FORMATS)}")
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(name, data, os.path.join(out_dir, f'{name}.{fmt}'), dpi)
+            for name, data in charts.items() for fmt in formats]
+    _lazy_import('matplotlib.figure')          # imported once, before workers fork
+    workers = min(resolve_workers(workers), len(jobs))
+    if workers <= 1:
+        _init_chart_worker()
+        return dict(map(_render_chart, jobs))
+    with ProcessPoolExecutor(workers, initializer=_init_chart_worker) as pool:
+        return dict(pool.map(_render_chart, jobs))
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  EDA  (Exploratory Data Analysis)  – shown once at startup
 # ─────────────────────────────────────────────────────────────────────────────
+EDA_DIRNAME = 'eda'                    # aggregates, inside the snapshot directory
+EDA_VERSION = 1
+
+
+def _weighted_counts(keys, weights):
+    """Sum of ``weights`` per distinct key (missing keys dropped), indexed by
+    the sorted plain keys – the order ``groupby`` would report them in."""
+    codes, uniques = pd.factorize(keys, sort=True)
+    ok = codes >= 0
+    sums = np.bincount(codes[ok], weights=weights[ok], minlength=len(uniques))
+    return pd.Series(sums.astype(np.int64), index=pd.Index(np.asarray(uniques, dtype=object)))
+
+
+def _add_counts(total, delta):
+    merged = total.add(delta, fill_value=0).astype(np.int64)
+    return merged[merged != 0]
+
+
+def _ratings_per_book(books, ratings):
+    """Ratings per books row, as the inner merge on ISBN would count them."""
+    b, r = books['ISBN'], ratings['ISBN']
+    if (isinstance(b.dtype, pd.CategoricalDtype) and isinstance(r.dtype, pd.CategoricalDtype)
+            and b.cat.categories.equals(r.cat.categories)):      # shared codes
+        codes = r.cat.codes.to_numpy()
+        per_code = np.bincount(codes[codes >= 0], minlength=len(b.cat.categories) + 1)
+        return per_code[b.cat.codes.to_numpy()].astype(np.int64)  # code -1 → spare 0 slot
+    counts = r.astype(str).value_counts()
+    return counts.reindex(b.astype(str).to_numpy()).fillna(0).to_numpy(np.int64)
+
+
+class EDAStats:
+    """Every aggregate the EDA summary and charts use, computed in one pass.
+
+    Rating-derived tables (rating values, per-title/author/publisher rating
+    counts, per-user activity) are updated in place by ``apply``; book-derived
+    ones (publisher and decade book counts, year range) only change with the
+    catalogue. ``save``/``load`` keep them next to the data snapshot.
+    """
+
+    RATING_TABLES = ('rating_counts', 'title_ratings', 'author_ratings',
+                     'publisher_ratings', 'user_ratings')
+    BOOK_TABLES   = ('publisher_books', 'decade_books')
+    SCALARS       = ('n_books', 'n_users', 'n_ratings', 'rating_sum', 'year_min', 'year_max')
+
+    def __init__(self):
+        empty = pd.Series([], dtype=np.int64)
+        for name in self.RATING_TABLES + self.BOOK_TABLES:
+            setattr(self, name, empty)
+        self.n_books = self.n_users = self.n_ratings = 0
+        self.rating_sum = 0.0
+        self.year_min = self.year_max = None
+
+    @classmethod
+    def compute(cls, books, ratings, users):
+        stats = cls()
+        stats.n_books = int(books['ISBN'].nunique())
+        stats.n_users = int(users['User-ID'].nunique())
+        yr = books['Year-Of-Publication'].dropna()
+        if len(yr):
+            stats.year_min, stats.year_max = int(yr.min()), int(yr.max())
+        yr = yr[(yr >= 1900) & (yr <= 2024)]
+        stats.decade_books = (yr // 10 * 10).astype(int).value_counts().sort_index()
+        stats.publisher_books = _weighted_counts(books['Publisher'], np.ones(len(books)))
+        stats.apply(books, ratings)
+        return stats
+
+    def apply(self, books, ratings, sign=1):
+        """Add (``sign=1``) or withdraw (``sign=-1``) a frame of ratings."""
+        per_book = _ratings_per_book(books, ratings)
+        rated = np.flatnonzero(per_book)
+        rows, weights = books.iloc[rated], per_book[rated] * sign
+        for table, col in (('title_ratings', 'Book-Title'), ('author_ratings', 'Book-Author'),
+                           ('publisher_ratings', 'Publisher')):
+            setattr(self, table, _add_counts(getattr(self, table),
+                                             _weighted_counts(rows[col], weights)))
+        values = ratings['Book-Rating']
+        self.rating_counts = _add_counts(self.rating_counts, values.value_counts() * sign)
+        self.user_ratings = _add_counts(self.user_ratings, ratings['User-ID'].value_counts() * sign)
+        self.n_ratings += sign * len(ratings)
+        self.rating_sum += sign * float(values.sum())
+
+    # ── persistence (one columnar frame per table + stats.json) ───────────────
+    def save(self, path, fingerprint):
+        tmp_dir = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        try:
+            os.makedirs(tmp_dir)
+            for name in self.RATING_TABLES + self.BOOK_TABLES:
+                table = getattr(self, name)
+                write_frame(pd.DataFrame({'key': table.index, 'count': table.to_numpy()}),
+                            os.path.join(tmp_dir, name))
+            _write_json(os.path.join(tmp_dir, 'stats.json'), {
+                'version': EDA_VERSION, 'fingerprint': fingerprint,
+                **{k: getattr(self, k) for k in self.SCALARS}})
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_dir, path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Saved aggregates for ``fingerprint``, or None when missing or stale."""
+        try:
+            with open(os.path.join(path, 'stats.json')) as fh:
+                meta = json.load(fh)
+            if meta.get('version') != EDA_VERSION or meta.get('fingerprint') != fingerprint:
+                return None
+            stats = cls()
+            for name in cls.RATING_TABLES + cls.BOOK_TABLES:
+                frame = read_frame(os.path.join(path, name), mmap=False)
+                setattr(stats, name, pd.Series(frame['count'].to_numpy(),
+                                               index=pd.Index(frame['key'].to_numpy())))
+        except (OSError, ValueError, KeyError):
+            return None
+        for k in cls.SCALARS:
+            setattr(stats, k, meta[k])
+        return stats
+
+
+def cached_eda(books, ratings, users, loader):
+    """EDA over the loaded frames, reusing aggregates saved in the snapshot
+    directory for the same source CSVs; otherwise compute and save them."""
+    path = os.path.join(loader.cache_dir, EDA_DIRNAME)
+    stats = EDAStats.load(path, loader.fingerprint) if loader.fingerprint else None
+    if stats is None:
+        stats = EDAStats.compute(books, ratings, users)
+        if loader.fingerprint:
+            try:
+                stats.save(path, loader.fingerprint)
+            except OSError as e:   # optional, like the snapshot
+                print(f"⚠️  Could not save EDA aggregates: {e}")
+    return EDA(books, ratings, users, stats=stats)
+
+
 class EDA:
-    def __init__(self, books, ratings, users):
+    def __init__(self, books, ratings, users, stats=None):
         self.books   = books
         self.ratings = ratings
         self.users   = users
+        self._stats  = stats
+        self._charts = {}
+
+    @property
+    def stats(self):
+        if self._stats is None:     # one pass, shared by the summary and every chart
+            self._stats = EDAStats.compute(self.books, self.ratings, self.users)
+        return self._stats
+
+    def add_ratings(self, df):
+        """Fold new ratings (User-ID, ISBN, Book-Rating) into the aggregates."""
+        self.stats.apply(self.books, df)
+        self._charts = {}
+
+    def remove_ratings(self, df):
+        """Withdraw ratings (User-ID, ISBN, Book-Rating) from the aggregates."""
+        self.stats.apply(self.books, df, sign=-1)
+        self._charts = {}
 
     def summary(self):
+        s = self.stats
         print("\n" + "="*62)
         print("  📊  DATASET ANALYSIS SUMMARY")
         print("="*62)
 
-        # merge for analysis
-        merged = self.ratings.merge(
-            self.books[['ISBN','Book-Title','Book-Author','Year-Of-Publication','Publisher']],
-            on='ISBN', how='inner')
-
-        print(f"\n  Total Books        : {self.books['ISBN'].nunique():>8,}")
-        print(f"  Total Users        : {self.users['User-ID'].nunique():>8,}")
-        print(f"  Total Ratings      : {len(self.ratings):>8,}")
-        print(f"  Avg Rating         : {self.ratings['Book-Rating'].mean():>8.2f} / 10")
-        print(f"  Most Rated Book    : {merged.groupby('Book-Title').size().idxmax()[:45]}")
-        print(f"  Most Active Author : {merged.groupby('Book-Author').size().idxmax()[:45]}")
-
-        top_pub = merged.groupby('Publisher').size().nlargest(1).index[0]
-        print(f"  Top Publisher      : {str(top_pub)[:45]}")
-
-        yr = self.books['Year-Of-Publication'].dropna()
-        print(f"  Publication Range  : {int(yr.min())} – {int(yr.max())}")
+        print(f"\n  Total Books        : {s.n_books:>8,}")
+        print(f"  Total Users        : {s.n_users:>8,}")
+        print(f"  Total Ratings      : {s.n_ratings:>8,}")
+        print(f"  Avg Rating         : {s.rating_sum / max(s.n_ratings, 1):>8.2f} / 10")
+        if len(s.title_ratings):
+            print(f"  Most Rated Book    : {str(s.title_ratings.idxmax())[:45]}")
+            print(f"  Most Active Author : {str(s.author_ratings.idxmax())[:45]}")
+            print(f"  Top Publisher      : {str(s.publisher_ratings.idxmax())[:45]}")
+        if s.year_min is not None:
+            print(f"  Publication Range  : {s.year_min} – {s.year_max}")
         print("="*62)
 
     def run_all_charts(self):
@@ -129,271 +835,2524 @@ class EDA:
         self._plot_top_publishers()
         self._plot_user_activity()
 
-    def _plot_rating_distribution(self):
-        fig, axes = plt.subplots(1, 2, figsize=(13, 5))
-        fig.suptitle('⭐ Rating Distribution (Book-Crossing Dataset)', fontsize=14, fontweight='bold')
-
-        # histogram
-        axes[0].hist(self.ratings['Book-Rating'], bins=10, range=(1,10),
-                     color='#3498db', edgecolor='white', rwidth=0.85)
-        axes[0].set_xlabel('Rating (1–10)'); axes[0].set_ylabel('Count')
-        axes[0].set_title('All Ratings Histogram')
-        axes[0].grid(axis='y', linestyle='--', alpha=0.4)
-
-        # value counts bar
-        vc = self.ratings['Book-Rating'].value_counts().sort_index()
-        axes[1].bar(vc.index.astype(str), vc.values, color='#e74c3c', edgecolor='white')
-        axes[1].set_xlabel('Rating'); axes[1].set_ylabel('Count')
-        axes[1].set_title('Rating Frequency')
-        axes[1].grid(axis='y', linestyle='--', alpha=0.4)
-
-        plt.tight_layout(); plt.show()
-
-    def _plot_top_authors(self):
-        merged = self.ratings.merge(self.books[['ISBN','Book-Author']], on='ISBN', how='inner')
-        top = merged.groupby('Book-Author').size().nlargest(15)
-
-        fig, ax = plt.subplots(figsize=(11, 6))
-        colors = plt.cm.viridis(np.linspace(0.2, 0.9, len(top)))
-        bars = ax.barh(top.index[::-1], top.values[::-1], color=colors[::-1], edgecolor='white')
-        for bar, val in zip(bars, top.values[::-1]):
-            ax.text(bar.get_width()+1, bar.get_y()+bar.get_height()/2,
-                    str(val), va='center', fontsize=8)
-        ax.set_xlabel('Number of Ratings')
-        ax.set_title('👤 Top 15 Most Rated Authors', fontsize=13, fontweight='bold')
-        ax.grid(axis='x', linestyle='--', alpha=0.4)
-        plt.tight_layout(); plt.show()
-
-    def _plot_publications_per_decade(self):
-        yr = self.books['Year-Of-Publication'].dropna()
-        yr = yr[(yr >= 1900) & (yr <= 2024)]
-        decade = (yr // 10 * 10).astype(int)
-        counts = decade.value_counts().sort_index()
-
-        fig, ax = plt.subplots(figsize=(11, 5))
-        ax.bar(counts.index.astype(str), counts.values,
-               color='#2ecc71', edgecolor='white', width=0.7)
-        ax.set_xlabel('Decade'); ax.set_ylabel('Books Published')
-        ax.set_title('📅 Books Published per Decade', fontsize=13, fontweight='bold')
-        ax.tick_params(axis='x', rotation=45)
-        ax.grid(axis='y', linestyle='--', alpha=0.4)
-        plt.tight_layout(); plt.show()
-
-    def _plot_top_publishers(self):
-        top = self.books['Publisher'].value_counts().head(12)
-        colors = plt.cm.Set3(np.linspace(0, 1, len(top)))
-
-        fig, ax = plt.subplots(figsize=(9, 7))
-        wedges, texts, autotexts = ax.pie(
-            top.values, labels=top.index, autopct='%1.1f%%',
-            colors=colors, startangle=140,
-            wedgeprops=dict(edgecolor='white', linewidth=1.5))
-        for t in autotexts: t.set_fontsize(7)
-        ax.set_title('🏢 Top 12 Publishers', fontsize=13, fontweight='bold')
-        plt.tight_layout(); plt.show()
-
-    def _plot_user_activity(self):
-        activity = self.ratings.groupby('User-ID').size()
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.hist(activity[activity <= 50], bins=25, color='#9b59b6', edgecolor='white')
-        ax.set_xlabel('Books Rated per User'); ax.set_ylabel('Number of Users')
-        ax.set_title('👥 User Activity Distribution (≤50 ratings)', fontsize=13, fontweight='bold')
-        ax.grid(axis='y', linestyle='--', alpha=0.4)
-        plt.tight_layout(); plt.show()
+    # ── charts: aggregated data (cached until the ratings change) ─────────────
+    CHARTS = ('rating_distribution', 'top_authors', 'publications_per_decade',
+              'top_publishers', 'user_activity')
+
+    def chart_data(self, names=None):
+        """{chart name: the small arrays it is drawn from} (see CHARTS)."""
+        for name in names or self.CHARTS:
+            if name not in self._charts:
+                self._charts[name] = getattr(self, f'_data_{name}')()
+        return {name: self._charts[name] for name in names or self.CHARTS}
+
+    def _data_rating_distribution(self):
+        vc = self.stats.rating_counts.sort_index()
+        return {'ratings': vc.index.to_numpy(), 'counts': vc.to_numpy()}
+
+    def _data_top_authors(self):
+        top = self.stats.author_ratings.nlargest(15)
+        return {'labels': np.asarray(top.index, dtype=object), 'values': top.to_numpy()}
+
+    def _data_publications_per_decade(self):
+        counts = self.stats.decade_books
+        return {'decades': counts.index.to_numpy(), 'counts': counts.to_numpy()}
+
+    def _data_top_publishers(self):
+        top = self.stats.publisher_books.nlargest(12)
+        return {'labels': np.asarray(top.index, dtype=object), 'values': top.to_numpy()}
+
+    def _data_user_activity(self):
+        activity = self.stats.user_ratings.to_numpy()
+        counts, edges = np.histogram(activity[activity <= 50], bins=25)
+        return {'counts': counts, 'edges': edges}
+
+    def _show(self, name):
+        show_chart(name, self.chart_data([name])[name])
+
+    def _plot_rating_distribution(self):     self._show('rating_distribution')
+    def _plot_top_authors(self):             self._show('top_authors')
+    def _plot_publications_per_decade(self): self._show('publications_per_decade')
+    def _plot_top_publishers(self):          self._show('top_publishers')
+    def _plot_user_activity(self):           self._show('user_activity')
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  RANKING HELPERS
+# ─────────────────────────────────────────────────────────────────────────────
+PADDED_TOPK_CELLS = 1 << 24   # cap on cells padded at once (~64 MB of float32)
+
+
+def top_n(scores, n):
+    """Positions of the ``n`` largest scores, best first.
+
+    Uses ``np.argpartition`` so the cost is O(len(scores)); ties are broken
+    towards the lower position, which keeps results deterministic.
+    """
+    scores = np.asarray(scores)
+    if n <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if n >= len(scores):
+        return np.lexsort((np.arange(len(scores)), -scores))
+    kth  = np.argpartition(-scores, n - 1)[:n]
+    cand = np.flatnonzero(scores >= scores[kth].min())   # every tie at the cut
+    return cand[np.lexsort((cand, -scores[cand]))[:n]]
+
+
+def top_k_rows(mat, k):
+    """Row-wise top-k of a CSR matrix, fully vectorised.
+
+    Returns ``(cols, vals)`` of shape ``(n_rows, k)``, best first, padded with
+    -1 / 0 for rows holding fewer than k entries. Ties go to the entry stored
+    first in the row, matching :func:`top_n` on that row's ``data``.
+    """
+    mat = mat.tocsr()
+    n_rows = mat.shape[0]
+    cols = np.full((n_rows, k), -1, dtype=np.int32)
+    vals = np.zeros((n_rows, k), dtype=np.float32)
+    if k <= 0 or mat.nnz == 0:
+        return cols, vals
+
+    # rows are packed into dense (rows × width) blocks and argpartitioned; grouping
+    # them by power-of-two length keeps the padding under half of every block
+    counts = np.diff(mat.indptr)
+    width_class = np.ceil(np.log2(np.maximum(counts, 1))).astype(np.int64)
+    for wc in np.unique(width_class[counts > 0]):
+        sel   = np.flatnonzero((width_class == wc) & (counts > 0))
+        width = int(counts[sel].max())
+        step  = max(1, PADDED_TOPK_CELLS // width)
+        for start in range(0, len(sel), step):
+            rows   = sel[start:start + step]
+            c      = counts[rows]
+            first  = mat.indptr[rows]
+            local  = np.repeat(np.arange(len(rows)), c)
+            pos    = np.arange(c.sum()) - np.repeat(np.cumsum(c) - c, c)
+            block  = np.full((len(rows), width), -np.inf, dtype=np.float32)
+            block[local, pos] = mat.data[np.repeat(first, c) + pos]
+            slot, v = _padded_top_k(block, k)
+            r, j = np.nonzero(slot >= 0)
+            cols[rows[r], j] = mat.indices[first[r] + slot[r, j]]
+            vals[rows] = v
+    return cols, vals
+
+
+def _padded_top_k(block, k):
+    """Top-k slots per row of a dense block where -inf marks an empty slot."""
+    n_rows, width = block.shape
+    k_eff = min(k, width)
+    kth   = np.partition(block, width - k_eff, axis=1)[:, width - k_eff]
+    keep  = block >= kth[:, None]
+    crowded = keep.sum(axis=1) > k_eff
+    if crowded.any():                                     # first tied slots win
+        sub, cut = block[crowded], kth[crowded, None]
+        above, ties = sub > cut, sub == cut
+        need = k_eff - above.sum(axis=1)
+        keep[crowded] = above | (ties & (np.cumsum(ties, axis=1) <= need[:, None]))
+    r, c = np.nonzero(keep)
+    v = block[r, c]
+    finite = np.isfinite(v)
+    r, c, v = r[finite], c[finite], v[finite]
+    order = np.lexsort((c, -v, r))
+    r, c, v = r[order], c[order], v[order]
+    counts = np.bincount(r, minlength=n_rows)
+    rank = np.arange(len(r)) - np.repeat(np.cumsum(counts) - counts, counts)
+    slots = np.full((n_rows, k), -1, dtype=np.int64)
+    vals  = np.zeros((n_rows, k), dtype=np.float32)
+    slots[r, rank], vals[r, rank] = c, v
+    return slots, vals
+
+
+def _filter_csr(mat, keep):
+    """Drop entries of a CSR matrix by mask, preserving the in-row order."""
+    kept   = np.concatenate([[0], np.cumsum(keep)])
+    indptr = kept[mat.indptr]
+    return sparse.csr_matrix((mat.data[keep], mat.indices[keep], indptr), shape=mat.shape)
+
+
+def _isbn_codes(column):
+    """(codes, distinct ISBN strings) of a ratings ISBN column; categorical
+    columns reuse their codes instead of hashing every row."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy()
+        isbns = column.cat.categories.astype(str).to_numpy(dtype=object)
+        if (codes < 0).any():                       # missing → 'nan', as astype(str) gives
+            isbns, codes = np.append(isbns, 'nan'), np.where(codes < 0, len(isbns), codes)
+        return codes, isbns
+    codes, isbns = pd.factorize(column.astype(str).to_numpy(dtype=object))
+    return codes, np.asarray(isbns, dtype=object)
+
+
+def _blend(sources, weights, exclude, n_books, n):
+    """Stage two of ``recommend``: the best ``n`` of the candidate union by the
+    weighted sum of each source's min-max scaled scores.
+
+    ``sources`` maps a name to (catalogue rows, scores). Each source is scaled
+    to [0, 1] over its own candidates – the transform of scikit-learn's
+    MinMaxScaler, except that a source whose scores are all equal counts as 1
+    rather than 0 – and candidates a source did not return get 0 from it.
+    Rows in ``exclude`` and outside the catalogue are dropped first.
+    """
+    cand = np.unique(np.concatenate([np.asarray(r, np.int64) for r, _ in sources.values()]))
+    cand = cand[(cand < n_books) & ~np.isin(cand, exclude)]
+    blended = np.zeros(len(cand))
+    for name, (rows, vals) in sources.items():
+        rows, vals = np.asarray(rows, np.int64), np.asarray(vals, np.float64)
+        pos = np.searchsorted(cand, rows)
+        hit = pos < len(cand)
+        hit[hit] = cand[pos[hit]] == rows[hit]
+        if not hit.any():
+            continue
+        vals = vals[hit]
+        lo, hi = vals.min(), vals.max()
+        scaled = (vals - lo) / (hi - lo) if hi > lo else np.ones(len(vals))
+        blended[pos[hit]] += weights.get(name, 0) * scaled
+    best = top_n(blended, n)
+    return cand[best], blended[best]
+
+
+def _csr_parts(prefix, mat):
+    """A compressed sparse matrix as ``{prefix_data, prefix_indices, prefix_indptr}``."""
+    return {f'{prefix}_data': mat.data, f'{prefix}_indices': mat.indices,
+            f'{prefix}_indptr': mat.indptr}
+
+
+def _csr_from(arrays, prefix, shape, fmt=sparse.csr_matrix):
+    """Inverse of :func:`_csr_parts`; wraps the arrays without copying."""
+    return fmt((arrays[f'{prefix}_data'], arrays[f'{prefix}_indices'],
+                arrays[f'{prefix}_indptr']), shape=tuple(shape))
+
+
+def _binary_rows(csr, rows):
+    sub = csr[rows]
+    sub.data = np.ones_like(sub.data)
+    return sub
+
+
+def _collab_block(rows, ui_csr, iu_bin, liked_csr, n_books, k, n):
+    """Neighbourhood scoring for a block of user rows at once.
+
+    Same maths as ``BookRecommenderSystem._neighbourhood`` and
+    ``_neighbour_scores`` for one user, but every step is a (block × users)
+    or (block × items) sparse product, so the cost per block is bounded by
+    the block size rather than by the number of calls.
+    """
+    rows    = np.asarray(rows)
+    own     = _binary_rows(ui_csr, rows)
+    overlap = own @ iu_bin
+    owner   = np.repeat(rows, np.diff(overlap.indptr))
+    overlap = _filter_csr(overlap, overlap.indices != owner)
+    nbr, w  = top_k_rows(overlap, k)
+    present = nbr >= 0
+    weights = sparse.csr_matrix((w[present], (np.nonzero(present)[0], nbr[present])),
+                                shape=(len(rows), ui_csr.shape[0]))
+
+    scores = weights @ liked_csr
+    return top_k_rows(_drop_rated(scores, own, ui_csr.shape[1], n_books), n)
+
+
+def _drop_rated(scores, own, n_items, n_books):
+    """Drop from each row of ``scores`` the books that user already rated (the
+    same row of ``own``, sorted indices) and ISBNs outside the catalogue."""
+    n_items  = np.int64(n_items)
+    row_of   = np.repeat(np.arange(scores.shape[0]), np.diff(scores.indptr))
+    own_keys = np.repeat(np.arange(own.shape[0]), np.diff(own.indptr)) * n_items + own.indices
+    keys     = row_of * n_items + scores.indices
+    seen     = np.searchsorted(own_keys, keys)
+    rated    = (seen < len(own_keys)) & (own_keys[np.minimum(seen, len(own_keys) - 1)] == keys)
+    return _filter_csr(scores, ~rated & (scores.indices < n_books))
+
+
+def _item_block(rows, ui_csr, item_sim, n_books, n):
+    """Item-based scoring for a block of user rows: each user's ratings times
+    the sparse (items × catalogue) top-K similarity index, so a user costs
+    O(history · K) whatever the catalogue size."""
+    own    = ui_csr[np.asarray(rows)]
+    scores = own @ item_sim
+    return top_k_rows(_drop_rated(scores, own, ui_csr.shape[1], n_books), n)
+
+
+def _content_block(rows, nn_idx, nn_sim, n, mat=None, mat_t=None):
+    """Top-n content neighbours for a block of catalogue rows.
+
+    Up to the stored K this is a slice of the neighbour index; a larger n
+    re-scores the rows against the whole catalogue when the TF-IDF matrix
+    (and its transpose) are supplied.
+    """
+    rows = np.asarray(rows)
+    if n <= nn_idx.shape[1] or mat is None:
+        return nn_idx[rows, :n], nn_sim[rows, :n]
+    return _neighbours(mat, mat_t, rows, n)
+
+
+def _neighbours(mat, mat_t, rows, k):
+    """Top-k cosine neighbours of ``rows`` of an L2-normalised sparse matrix,
+    via one sparse (rows × catalogue) product. A row is excluded by identity,
+    so an identical duplicate (similarity 1.0) is still returned."""
+    rows = np.asarray(rows)
+    sims = mat[rows] @ mat_t
+    owner = np.repeat(rows, np.diff(sims.indptr))
+    sims = _filter_csr(sims, (sims.indices != owner) & (sims.data > 0))
+    return top_k_rows(sims, k)
+
+
+def _svd_block(rows, user_f, item_f, ui_csr, n):
+    """Latent-factor scoring for a block of user rows.
+
+    scores = user_f[rows] · item_fᵀ is one dense (block × books) product; items
+    the user already rated are set to -inf before the row-wise top-n. Rows are
+    processed in slices of at most ``PADDED_TOPK_CELLS`` scores.
+    """
+    rows    = np.asarray(rows)
+    n_books = item_f.shape[0]
+    cols = np.full((len(rows), n), -1, dtype=np.int32)
+    vals = np.zeros((len(rows), n), dtype=np.float32)
+    step = max(1, PADDED_TOPK_CELLS // max(n_books, 1))
+    for s in range(0, len(rows), step):
+        sub    = rows[s:s + step]
+        scores = user_f[sub] @ item_f.T
+        rated  = ui_csr[sub]
+        r, c   = np.repeat(np.arange(len(sub)), np.diff(rated.indptr)), rated.indices
+        inside = c < n_books
+        scores[r[inside], c[inside]] = -np.inf
+        cols[s:s + step], vals[s:s + step] = _padded_top_k(scores, n)
+    return cols, vals
+
+
+def _run_kernel(kind, arrays, params, rows, n):
+    """Rebuild the kernel's matrices around ``arrays`` (no copies) and score rows."""
+    if kind == 'collaborative':
+        n_users, n_items = params['shape']
+        ui    = _csr_from(arrays, 'ui', (n_users, n_items))
+        iu    = _csr_from(arrays, 'iu', (n_items, n_users))
+        liked = _csr_from(arrays, 'liked', (n_users, n_items))
+        return _collab_block(rows, ui, iu, liked, params['n_books'], params['k'], n)
+    if kind == 'content':
+        mat = mat_t = None
+        if 'tfidf_data' in arrays:
+            n_books, n_terms = params['tfidf_shape']
+            mat   = _csr_from(arrays, 'tfidf', (n_books, n_terms))
+            mat_t = _csr_from(arrays, 'tfidf_t', (n_terms, n_books))
+        return _content_block(rows, arrays['nn_idx'], arrays['nn_sim'], n, mat, mat_t)
+    if kind == 'svd':
+        ui = _csr_from(arrays, 'ui', params['shape'])
+        return _svd_block(rows, arrays['user_f'], arrays['item_f'], ui, n)
+    if kind == 'item':
+        n_users, n_items = params['shape']
+        ui  = _csr_from(arrays, 'ui', (n_users, n_items))
+        sim = _csr_from(arrays, 'isim', (n_items, params['n_books']))
+        return _item_block(rows, ui, sim, params['n_books'], n)
+    raise ValueError(f"unknown kernel {kind!r}")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  PARALLEL BATCH SCORING  (process pool over shared-memory model arrays)
+# ─────────────────────────────────────────────────────────────────────────────
+class SharedArrays:
+    """Publishes NumPy arrays in ``multiprocessing.shared_memory``.
+
+    The parent copies each array in once; workers attach by name through
+    :meth:`attach`, so the model is never pickled into the pool.
+    """
+
+    def __init__(self, arrays):
+        self._blocks = []
+        self.spec = {}
+        try:
+            for key, arr in arrays.items():
+                arr = np.ascontiguousarray(arr)
+                shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+                self._blocks.append(shm)
+                np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+                self.spec[key] = (shm.name, arr.shape, arr.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def attach(spec):
+        handles, arrays = [], {}
+        for key, (name, shape, dtype) in spec.items():
+            shm = shared_memory.SharedMemory(name=name)
+            handles.append(shm)
+            arrays[key] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+        return handles, arrays
+
+
+_WORKER = {}     # per-process state set up by _init_worker
+
+
+def _init_worker(spec, params):
+    handles, arrays = SharedArrays.attach(spec)
+    _WORKER.update(handles=handles, arrays=arrays, params=params)
+
+
+def _score_block(kind, rows, n):
+    return _run_kernel(kind, _WORKER['arrays'], _WORKER['params'], rows, n)
+
+
+STAGE_THREADS = 4       # threads running the budgeted stages of recommend()
+_STAGE_POOL   = {}
+_STAGE_LOCK   = threading.Lock()
+
+
+def _stage_pool():
+    with _STAGE_LOCK:
+        if 'pool' not in _STAGE_POOL:
+            _STAGE_POOL['pool'] = ThreadPoolExecutor(max_workers=STAGE_THREADS,
+                                                     thread_name_prefix='hybrid-stage')
+    return _STAGE_POOL['pool']
+
+
+def resolve_workers(workers):
+    """``None``/1 → in-process, ``0`` or negative → one worker per CPU."""
+    if workers is None:
+        return 1
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return int(workers)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  SEARCH INDEX  (trigram + token inverted index over one text column)
+# ─────────────────────────────────────────────────────────────────────────────
+TOKEN_RE = re.compile(r'\w+')
+
+
+def _text(column):
+    """A text or categorical column as plain strings, missing values as ''."""
+    return column.astype(object).fillna('').astype(str)
+
+
+class SearchIndex:
+    """Inverted index over one text column of the catalogue.
+
+    Books are grouped by their distinct lower-cased value, and two posting
+    structures point at those values:
+
+    * trigrams – every 3-gram → value ids; a substring query intersects the
+      postings of its own trigrams and only verifies the survivors
+    * tokens   – sorted distinct words with postings; a binary search gives
+      every word starting with a prefix (typeahead, 1–2 character queries)
+
+    Hits are ranked by a popularity array passed in at query time, so the
+    index stays valid while popularity scores change.
+    """
+    VERIFY_BELOW = 256
+
+    def __init__(self, column):
+        column = _text(column)
+        codes, values = pd.factorize(column.str.lower())
+        self.values = np.asarray(values, dtype=object)
+        order = np.argsort(codes, kind='stable').astype(np.int32)
+        self._books    = order                                   # book rows grouped by value
+        self._book_ptr = np.searchsorted(codes[order], np.arange(len(values) + 1))
+        self.display   = column.to_numpy(dtype=object)[order[self._book_ptr[:-1]]]
+
+        grams, tokens = {}, {}
+        for vid, text in enumerate(self.values):
+            for g in {text[i:i + 3] for i in range(len(text) - 2)}:
+                grams.setdefault(g, []).append(vid)
+            for t in set(TOKEN_RE.findall(text)):
+                tokens.setdefault(t, []).append(vid)
+        self._gram_slot, self._gram_ptr, self._gram_ids = self._pack(grams)
+        token_keys = sorted(tokens)
+        self._tokens = np.array(token_keys, dtype=str) if token_keys else np.array([], dtype='<U1')
+        _, self._token_ptr, self._token_ids = self._pack(tokens, token_keys)
+
+    @staticmethod
+    def _pack(postings, keys=None):
+        """dict of lists → (key → slot, offsets, one int32 array of value ids)."""
+        keys = list(postings) if keys is None else keys
+        lengths = np.fromiter((len(postings[k]) for k in keys), dtype=np.int64, count=len(keys))
+        ptr = np.concatenate([[0], np.cumsum(lengths)])
+        ids = np.fromiter((v for k in keys for v in postings[k]), dtype=np.int32, count=int(ptr[-1]))
+        return {k: i for i, k in enumerate(keys)}, ptr, ids
+
+    def _gram(self, g):
+        slot = self._gram_slot.get(g)
+        if slot is None:
+            return np.empty(0, dtype=np.int32)
+        return self._gram_ids[self._gram_ptr[slot]:self._gram_ptr[slot + 1]]
+
+    def _prefix(self, prefix):
+        lo = np.searchsorted(self._tokens, prefix, side='left')
+        hi = np.searchsorted(self._tokens, prefix + '\uffff', side='left')
+        if lo == hi:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(self._token_ids[self._token_ptr[lo]:self._token_ptr[hi]])
+
+    def _word(self, word):
+        i = np.searchsorted(self._tokens, word)
+        if i == len(self._tokens) or self._tokens[i] != word:
+            return np.empty(0, dtype=np.int32)
+        return self._token_ids[self._token_ptr[i]:self._token_ptr[i + 1]]
+
+    def match_substring(self, query):
+        """Value ids whose text contains ``query`` (literal, case-insensitive)."""
+        q = query.lower()
+        if len(q) < 3:
+            raise ValueError("substring lookups need at least 3 characters")
+        postings = sorted((self._gram(q[i:i + 3]) for i in range(len(q) - 2)), key=len)
+        cand = postings[0]
+        for p in postings[1:]:
+            if len(cand) <= self.VERIFY_BELOW:      # cheaper to check the text directly
+                break
+            cand = np.intersect1d(cand, p, assume_unique=True)
+        if len(q) == 3:
+            return cand
+        values = self.values
+        return np.array([v for v in cand if q in values[v]], dtype=np.int32)
+
+    def match_prefix(self, query):
+        """Value ids containing every complete word of ``query`` and a word
+        starting with its last (possibly partial) word – typeahead matching."""
+        words = TOKEN_RE.findall(query.lower())
+        if not words:
+            return np.arange(len(self.values), dtype=np.int32)
+        cand = self._prefix(words[-1])
+        for w in words[:-1]:
+            if len(cand) == 0:
+                break
+            cand = np.intersect1d(cand, self._word(w), assume_unique=True)
+        return cand
+
+    def books_of(self, value_ids):
+        """Book rows for a set of value ids."""
+        value_ids = np.asarray(value_ids, dtype=np.int64)
+        starts = self._book_ptr[value_ids]
+        counts = self._book_ptr[value_ids + 1] - starts
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return self._books[np.repeat(starts, counts) + within]
+
+    def search(self, query, popularity, limit=10):
+        """Top ``limit`` book rows for ``query`` ranked by ``popularity``.
+
+        Queries of 3+ characters match as substrings (like ``str.contains``);
+        shorter ones fall back to word-prefix matching, and a blank one
+        matches nothing.
+        """
+        query = query.strip()
+        if len(query) >= 3:
+            ids = self.match_substring(query)
+        elif TOKEN_RE.search(query):
+            ids = self.match_prefix(query)
+        else:
+            return np.empty(0, dtype=np.int64)
+        books = self.books_of(ids)
+        return books[top_n(popularity[books], limit)]
+
+    def suggest(self, prefix, popularity, limit=10):
+        """Distinct display values for typeahead, best-known first."""
+        ids = self.match_prefix(prefix)
+        if len(ids) == 0:
+            return []
+        best = np.maximum.reduceat(popularity[self._books], self._book_ptr[:-1])[ids]
+        return self.display[ids[top_n(best, limit)]].tolist()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  POPULARITY INDEX  (catalogue rows pre-sorted by popularity, per segment)
+# ─────────────────────────────────────────────────────────────────────────────
+POP_TICKS = 10_002    # popularity·1000 ∈ [0, 10000], plus one slot for NaN (ranked last)
+
+
+def _group_codes(column):
+    """Integer group per row (-1 = missing) and the group labels."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(np.int64), column.cat.categories
+    codes, labels = pd.factorize(column)
+    return codes.astype(np.int64), labels
+
+
+class PopularityIndex:
+    """Catalogue rows in popularity order – overall and within each decade,
+    publisher and author – so the top ``n`` of any of them is one slice.
+
+    Every ranking is a single sorted int64 array of keys
+    ``group · span + rank · N + row``: popularity descending, ties by row and
+    NaN last, i.e. the order of ``DataFrame.nlargest``. A group's rows are a
+    contiguous run found by binary search, and the row is ``key % N``. When
+    popularity changes, only the rows whose value moved are deleted and
+    merged back in; a full re-sort happens only if most of them moved.
+    """
+
+    SEGMENTS = {'decade': 'Year-Of-Publication', 'publisher': 'Publisher', 'author': 'Book-Author'}
+    RESORT_SHARE = 0.25     # re-sort instead of merging when this share of rows moved
+
+    def __init__(self, books):
+        self._books = books
+        self._n     = len(books)
+        self._span  = POP_TICKS * max(self._n, 1)
+        self._rank  = self._ranks(books['popularity'].to_numpy())
+        self._rows  = np.arange(self._n, dtype=np.int64)
+        self._keys  = {None: np.sort(self._rank * self._n + self._rows)}
+        self._groups = {None: (np.zeros(self._n, dtype=np.int64), None)}
+
+    @staticmethod
+    def _ranks(popularity):
+        """0 = most popular; popularity is rounded to 3 decimals, so ×1000 is exact."""
+        popularity = np.asarray(popularity, dtype=np.float64)
+        ticks = np.clip(np.rint(np.nan_to_num(popularity) * 1000), 0, POP_TICKS - 2).astype(np.int64)
+        return np.where(np.isnan(popularity), POP_TICKS - 1, POP_TICKS - 2 - ticks)
+
+    def _segment(self, segment):
+        """Group codes and sorted keys of ``segment``, built on first use."""
+        if segment not in self._keys:
+            if segment not in self.SEGMENTS:
+                raise ValueError(f"unknown segment {segment!r}; expected one of {sorted(self.SEGMENTS)}")
+            column = self._books[self.SEGMENTS[segment]]
+            if segment == 'decade':
+                codes, labels = _group_codes(pd.Series(column.to_numpy() // 10 * 10))
+            else:
+                codes, labels = _group_codes(column)
+            codes = codes + 1                   # group 0 collects missing values
+            self._groups[segment] = (codes, labels)
+            self._keys[segment] = np.sort(codes * self._span + self._rank * self._n + self._rows)
+        return self._keys[segment], self._groups[segment]
+
+    def top(self, n, segment=None, value=None):
+        """Catalogue rows of the ``n`` most popular books, optionally only those
+        whose ``segment`` ('decade' / 'publisher' / 'author') equals ``value``."""
+        keys, (_, labels) = self._segment(segment)
+        group = 0
+        if segment is not None:
+            if segment == 'decade':
+                value = int(value) // 10 * 10
+            pos = labels.get_indexer([value])[0]
+            if pos < 0:
+                return np.empty(0, dtype=np.int64)
+            group = pos + 1
+        lo, hi = np.searchsorted(keys, [group * self._span, (group + 1) * self._span])
+        return keys[lo:min(hi, lo + max(n, 0))] % self._n
+
+    def update(self, popularity):
+        """Re-rank after popularity changed; only moved rows are re-inserted."""
+        rank  = self._ranks(popularity)
+        moved = np.flatnonzero(rank != self._rank)
+        if len(moved) == 0:
+            return
+        resort = len(moved) > self.RESORT_SHARE * self._n
+        for segment, keys in self._keys.items():
+            codes = self._groups[segment][0]
+            if resort:
+                self._keys[segment] = np.sort(codes * self._span + rank * self._n + self._rows)
+                continue
+            base = codes[moved] * self._span + moved
+            old  = np.searchsorted(keys, base + self._rank[moved] * self._n)
+            keys = np.delete(keys, old)
+            new  = np.sort(base + rank[moved] * self._n)
+            self._keys[segment] = np.insert(keys, np.searchsorted(keys, new), new)
+        self._rank = rank
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  DEMOGRAPHIC SEGMENTS  (top-N books per reader country × age bucket)
+# ─────────────────────────────────────────────────────────────────────────────
+AGE_EDGES  = (18, 25, 35, 45, 55, 65)
+AGE_LABELS = ('<18', '18-24', '25-34', '35-44', '45-54', '55-64', '65+')
+VALID_AGES = (5, 100)     # ages outside this range are treated as unknown
+NO_COUNTRY = {'', 'n/a', 'na', 'none', 'unknown', '-', ','}
+
+
+def _countries(location):
+    """Country of every user – the last comma-separated part of Location,
+    lowercased – as (codes, labels); -1 where there is none."""
+    codes, labels = _group_codes(location)
+    names = (pd.Series(np.asarray(labels, dtype=object), dtype=object)
+             .str.rsplit(',', n=1).str[-1].str.strip(' "\'.').str.lower())
+    names = names.where(~names.isin(NO_COUNTRY))
+    name_codes, countries = pd.factorize(names, sort=True)
+    country = np.where(codes >= 0, name_codes[np.maximum(codes, 0)], -1)
+    return country.astype(np.int64), list(countries)
+
+
+def _age_buckets(age):
+    """Index into AGE_LABELS of every age; -1 for missing or implausible ones."""
+    age = np.asarray(age, dtype=np.float64)
+    ok = (age >= VALID_AGES[0]) & (age <= VALID_AGES[1])
+    return np.where(ok, np.searchsorted(AGE_EDGES, np.nan_to_num(age), side='right'), -1)
+
+
+def _segment_popularity(sums, counts):
+    """The catalogue popularity formula (see _update_popularity) within one
+    segment, over the books its readers rated."""
+    avg = np.round(sums / counts, 2)
+    m   = np.quantile(counts, 0.70)
+    return np.round((counts / (counts + m)) * avg + (m / (counts + m)) * avg.mean(), 3)
+
+
+class SegmentIndex:
+    """Top books for each reader segment – a country, an age bucket, or both
+    – so a cold-start user is served by one table lookup.
+
+    Segment ``(c, a)`` has id ``(c + 1) · (A + 1) + (a + 1)``, where -1 on
+    either side means "any" (id 0, everyone, is the global ranking and is not
+    stored). Each segment's per-book rating sums and counts are kept as rows of
+    two sparse (segments × books) matrices; its ``TOP_N`` best books by the
+    weighted popularity formula are one row of a dense table. Every user is
+    resolved once to the narrowest segment with at least ``MIN_RATINGS``
+    ratings: country and age, else country, else age, else none.
+
+    New ratings are folded in as sparse deltas, and only the segments they
+    touch are re-ranked.
+    """
+
+    TOP_N       = 50
+    MIN_RATINGS = 25    # fewer ratings than this and a segment falls back to a wider one
+
+    def __init__(self, users, user_ids, ui_csr, n_books):
+        users = users[~users['User-ID'].duplicated().to_numpy()]
+        self._n_books = n_books
+        self._country, self._countries = _countries(users['Location']) if 'Location' in users \
+            else (np.full(len(users), -1, np.int64), [])
+        self._age = _age_buckets(users['Age']) if 'Age' in users else np.full(len(users), -1)
+        self._country_index = {name: i for i, name in enumerate(self._countries)}
+        self._width = len(AGE_LABELS) + 1
+        self._n_segments = (len(self._countries) + 1) * self._width
+        self._user_pos = pd.Index(users['User-ID'])
+        self._members = np.empty((0, 3), dtype=np.int64)
+        self._top   = np.full((self._n_segments, self.TOP_N), -1, dtype=np.int32)
+        self._score = np.zeros((self._n_segments, self.TOP_N), dtype=np.float32)
+        shape = (self._n_segments, n_books)
+        self._sums, self._counts = sparse.csr_matrix(shape), sparse.csr_matrix(shape)
+
+        coo = ui_csr.tocoo()
+        self.update(user_ids, coo.row, coo.col, coo.data, np.ones(len(coo.data)))
+
+    def _id(self, country, age):
+        return (np.asarray(country) + 1) * self._width + np.asarray(age) + 1
+
+    def _candidates(self, country, age):
+        """(users × 3) segment ids from narrowest to widest, 0 where undefined."""
+        both = (country >= 0) & (age >= 0)
+        return np.stack([np.where(both, self._id(country, age), 0),
+                         np.where(country >= 0, self._id(country, -1), 0),
+                         np.where(age >= 0, self._id(-1, age), 0)], axis=1)
+
+    def _member_rows(self, user_ids):
+        """Segments every matrix row contributes to, extended for new users."""
+        have = len(self._members)
+        if len(user_ids) > have:
+            pos = self._user_pos.get_indexer(user_ids[have:])
+            known = pos >= 0
+            country = np.where(known, self._country[pos], -1)
+            age     = np.where(known, self._age[pos], -1)
+            self._members = np.concatenate([self._members, self._candidates(country, age)])
+        return self._members
+
+    def update(self, user_ids, rows, items, d_sums, d_counts):
+        """Add rating-sum / rating-count deltas of (matrix row, item) pairs and
+        re-rank the segments they belong to."""
+        members = self._member_rows(user_ids)
+        inside  = items < self._n_books
+        rows, items = rows[inside], items[inside]
+        d_sums, d_counts = d_sums[inside], d_counts[inside]
+        seg = members[rows].ravel()
+        hit = seg > 0
+        seg, items = seg[hit], np.repeat(items, 3)[hit]
+        shape = self._sums.shape
+        self._sums = (self._sums + sparse.csr_matrix(
+            (np.repeat(d_sums, 3)[hit].astype(np.float64), (seg, items)), shape=shape)).tocsr()
+        self._counts = (self._counts + sparse.csr_matrix(
+            (np.repeat(d_counts, 3)[hit].astype(np.float64), (seg, items)), shape=shape)).tocsr()
+        self._sums.sort_indices()
+        self._counts.sort_indices()
+        for s in np.unique(seg):
+            self._rank(s)
+        support = np.asarray(self._counts.sum(axis=1)).ravel()
+        cand = self._candidates(self._country, self._age)
+        ok = (cand > 0) & (support[cand] >= self.MIN_RATINGS)
+        self._serve = np.where(ok.any(axis=1), cand[np.arange(len(cand)), ok.argmax(axis=1)], 0)
+        self._support = support
+
+    def _rank(self, s):
+        lo, hi = self._counts.indptr[s], self._counts.indptr[s + 1]
+        counts, items = self._counts.data[lo:hi], self._counts.indices[lo:hi]
+        lo, hi = self._sums.indptr[s], self._sums.indptr[s + 1]
+        sum_items, sum_vals = self._sums.indices[lo:hi], self._sums.data[lo:hi]
+        pos  = np.minimum(np.searchsorted(sum_items, items), max(len(sum_items) - 1, 0))
+        sums = np.where(sum_items[pos] == items, sum_vals[pos], 0.0) if len(sum_items) else np.zeros(len(items))
+        rated = counts > 0
+        self._top[s], self._score[s] = -1, 0
+        if rated.any():
+            items, pop = items[rated], _segment_popularity(sums[rated], counts[rated])
+            best = top_n(pop, self.TOP_N)
+            self._top[s, :len(best)], self._score[s, :len(best)] = items[best], pop[best]
+
+    def knows(self, user_id):
+        return user_id in self._user_pos
+
+    def segments_of(self, user_ids):
+        """Serving segment id of every User-ID (0 = none / unknown user)."""
+        pos = self._user_pos.get_indexer(pd.Index(user_ids, dtype=object))
+        return np.where(pos >= 0, self._serve[pos], 0)
+
+    def find(self, country=None, age=None):
+        """Serving segment id for a country name and/or an age (0 = none)."""
+        c = self._country_index.get(str(country).strip().lower(), -1) if country is not None else -1
+        a = int(_age_buckets([age])[0]) if age is not None else -1
+        if (country is not None and c < 0) or (age is not None and a < 0):
+            return 0
+        cand = self._candidates(np.array([c]), np.array([a]))[0]
+        ok = (cand > 0) & (self._support[cand] >= self.MIN_RATINGS)
+        return int(cand[ok][0]) if ok.any() else 0
+
+    def describe(self, seg):
+        """{'country': ..., 'age': ...} of a segment id (None = any)."""
+        c, a = divmod(int(seg), self._width)
+        return {'country': self._countries[c - 1] if c > 0 else None,
+                'age': AGE_LABELS[a - 1] if a > 0 else None}
+
+    def top(self, seg, n):
+        """(catalogue rows, scores) of the ``n`` best books of segment ``seg``."""
+        rows = self._top[seg, :n]
+        return rows[rows >= 0].astype(np.int64), self._score[seg, :n][rows >= 0]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  RESULT CACHE  (LRU by entries and bytes, optional TTL, tag invalidation)
+# ─────────────────────────────────────────────────────────────────────────────
+def _result_nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        # categorical columns share their categories with the catalogue: an
+        # entry only owns the codes (and deep-measuring categories is O(catalogue))
+        return int(value.index.memory_usage(deep=True) + sum(
+            col.cat.codes.nbytes if isinstance(col.dtype, pd.CategoricalDtype)
+            else col.memory_usage(index=False, deep=True) for _, col in value.items()))
+    if isinstance(value, Results):
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Thread-safe LRU cache for recommendation results.
+
+    Bounded by ``max_entries`` and by ``max_bytes`` (DataFrames are measured
+    with ``memory_usage(deep=True)``); ``ttl`` seconds, when set, expires
+    entries on read. Every entry can carry tags – e.g. ``('user', row)`` or
+    ``('book', row)`` – and :meth:`invalidate` drops all entries with a tag.
+    Cached values are shared between callers and must not be modified.
+    """
+
+    def __init__(self, max_entries=4096, max_bytes=64 << 20, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self.ttl   = ttl
+        self.clock = clock
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+        self._entries = OrderedDict()       # key → (value, nbytes, expires, tags)
+        self._tagged  = {}                  # tag → {keys}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[2] is not None and entry[2] <= self.clock():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, tags=()):
+        if self.max_entries <= 0:
+            return
+        nbytes = _result_nbytes(value)
+        if nbytes > self.max_bytes:
+            return
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        tags = frozenset(tags)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, nbytes, expires, tags)
+            self.nbytes += nbytes
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of ``tags``; returns how many went."""
+        with self._lock:
+            keys = set().union(*(self._tagged.get(t, ()) for t in tags)) if tags else set()
+            for key in keys:
+                self._drop(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        return {'entries': len(self._entries), 'bytes': self.nbytes, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions,
+                'expirations': self.expirations, 'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / max(self.hits + self.misses, 1), 4)}
+
+    def _drop(self, key):
+        _, nbytes, _, tags = self._entries.pop(key)
+        self.nbytes -= nbytes
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  METRICS  (opt-in timers, counters, latency histograms; one-call profiling)
+# ─────────────────────────────────────────────────────────────────────────────
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)     # seconds
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 't0')
+
+    def __init__(self, metrics, name):
+        self.metrics, self.name = metrics, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.t0)
+
+
+_NULL_TIMER = nullcontext()
+
+
+class Metrics:
+    """Per-operation latency histograms and labelled counters.
+
+    Disabled instances hand out a shared no-op context manager, so the
+    instrumented code paths cost one attribute lookup and a call when
+    metrics are off. Read them with :meth:`stats` or :meth:`prometheus`.
+    """
+
+    def __init__(self, enabled=True, buckets=LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._timers   = {}         # op → [count, sum, max, per-bucket counts (+Inf last)]
+        self._counters = {}         # (name, ((label, value), …)) → count
+        self._lock = threading.Lock()
+
+    def timer(self, name):
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def observe(self, name, seconds):
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            t = self._timers.get(name)
+            if t is None:
+                t = self._timers[name] = [0, 0.0, 0.0, [0] * (len(self.buckets) + 1)]
+            t[0] += 1
+            t[1] += seconds
+            t[2] = max(t[2], seconds)
+            t[3][slot] += 1
+
+    def inc(self, name, n=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+
+    def _quantile(self, counts, q):
+        """Histogram quantile, interpolated linearly inside the bucket."""
+        total = sum(counts)
+        if not total:
+            return None
+        target, seen, lower = q * total, 0, 0.0
+        for upper, c in zip(self.buckets + (float('inf'),), counts):
+            if c and seen + c >= target:
+                if upper == float('inf'):
+                    return lower
+                return lower + (upper - lower) * (target - seen) / c
+            seen, lower = seen + c, upper
+        return lower
+
+    def stats(self):
+        with self._lock:
+            timers = {k: (v[0], v[1], v[2], list(v[3])) for k, v in self._timers.items()}
+            counters = dict(self._counters)
+        out = {'timers': {}, 'counters': {}}
+        for name, (count, total, peak, counts) in sorted(timers.items()):
+            out['timers'][name] = {
+                'count': count, 'total_s': round(total, 6),
+                'mean_ms': round(total / count * 1000, 3), 'max_ms': round(peak * 1000, 3),
+                **{f'p{int(q * 100)}_ms': round(min(self._quantile(counts, q), peak) * 1000, 3)
+                   for q in (0.5, 0.95, 0.99)}}
+        for (name, labels), count in sorted(counters.items()):
+            label = ','.join(f'{k}={v}' for k, v in labels)
+            out['counters'][f'{name}{{{label}}}' if label else name] = count
+        return out
+
+    def prometheus(self, prefix='bookrec', cache=None):
+        """Prometheus text exposition of the timers, counters and ``cache`` stats."""
+        with self._lock:
+            timers = {k: (v[0], v[1], list(v[3])) for k, v in self._timers.items()}
+            counters = dict(self._counters)
+        lines = [f'# HELP {prefix}_latency_seconds Wall time per operation.',
+                 f'# TYPE {prefix}_latency_seconds histogram']
+        for op, (count, total, counts) in sorted(timers.items()):
+            cum = 0
+            for upper, c in zip(self.buckets + ('+Inf',), counts):
+                cum += c
+                lines.append(f'{prefix}_latency_seconds_bucket{{op="{op}",le="{upper}"}} {cum}')
+            lines.append(f'{prefix}_latency_seconds_sum{{op="{op}"}} {total:.6f}')
+            lines.append(f'{prefix}_latency_seconds_count{{op="{op}"}} {count}')
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            for (n, labels), count in sorted(counters.items()):
+                if n == name:
+                    label = ','.join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f'{prefix}_{name}_total{{{label}}} {count}' if label
+                                 else f'{prefix}_{name}_total {count}')
+        if cache is not None:
+            stats = cache.stats()
+            for key in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+                lines += [f'# TYPE {prefix}_cache_{key}_total counter',
+                          f'{prefix}_cache_{key}_total {stats[key]}']
+            for key in ('entries', 'bytes', 'hit_rate'):
+                lines += [f'# TYPE {prefix}_cache_{key} gauge', f'{prefix}_cache_{key} {stats[key]}']
+        return '\n'.join(lines) + '\n'
+
+
+NULL_METRICS = Metrics(enabled=False)
+
+
+def _timed(name):
+    """Method decorator: time every call under ``self.metrics``."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def timed(self, *args, **kwargs):
+            with self.metrics.timer(name):
+                return fn(self, *args, **kwargs)
+        return timed
+    return wrap
+
+
+def profile_call(fn, *args, mode='cprofile', limit=25, **kwargs):
+    """Run ``fn(*args, **kwargs)`` once under cProfile ('cprofile') or
+    tracemalloc ('tracemalloc') → (result, text report)."""
+    import io
+    if mode == 'cprofile':
+        import cProfile, pstats
+        prof = cProfile.Profile()
+        result = prof.runcall(fn, *args, **kwargs)
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats('cumulative').print_stats(limit)
+        return result, out.getvalue()
+    if mode == 'tracemalloc':
+        import tracemalloc
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            result = fn(*args, **kwargs)
+            snap = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started:
+                tracemalloc.stop()
+        report = [f"peak {peak / 1024:.1f} KiB, still allocated {current / 1024:.1f} KiB"]
+        report += [str(s) for s in snap.statistics('lineno')[:limit]]
+        return result, '\n'.join(report) + '\n'
+    raise ValueError(f"unknown profile mode {mode!r} (expected 'cprofile' or 'tracemalloc')")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  RESULTS  (ranked catalogue rows + scores; book fields from a columnar store)
+# ─────────────────────────────────────────────────────────────────────────────
+RESULT_COLUMNS = ['ISBN','Book-Title','Book-Author','Year-Of-Publication','avg_rating','rating_count']
+
+
+class BookStore:
+    """Catalogue columns as NumPy arrays indexed by catalogue row, so a
+    result's book fields are a gather instead of a DataFrame slice.
+
+    Categorical columns are kept as codes plus their dtype (decoded through
+    the category array only for the rows asked for). Arrays are taken from
+    the books frame on first use; ``invalidate`` drops columns the recommender
+    has just rewritten.
+    """
+
+    def __init__(self, books):
+        self._books   = books
+        self._columns = {}
+
+    def _column(self, name):
+        col = self._columns.get(name)
+        if col is None:
+            series = self._books[name]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                col = (series.cat.codes.to_numpy(), series.dtype,
+                       np.append(np.asarray(series.cat.categories, dtype=object), None))
+            else:
+                col = (series.to_numpy(), None, None)
+            self._columns[name] = col
+        return col
+
+    def column(self, name):
+        """The whole column as a NumPy array."""
+        return self.values(name, slice(None))
+
+    def values(self, name, rows):
+        """Values of column ``name`` at ``rows`` (None for a missing category)."""
+        data, dtype, labels = self._column(name)
+        return data[rows] if dtype is None else labels[data[rows]]
+
+    def series(self, name, rows):
+        """Values at ``rows`` in the catalogue's own dtype (for DataFrames)."""
+        data, dtype, _ = self._column(name)
+        return data[rows] if dtype is None else pd.Categorical.from_codes(data[rows], dtype=dtype)
+
+    def invalidate(self, *names):
+        for name in names:
+            self._columns.pop(name, None)
+
+
+class BookRecord:
+    """One recommended book, as plain Python values."""
+
+    __slots__ = ('row', 'isbn', 'title', 'author', 'year', 'avg_rating', 'rating_count', 'score')
+
+    def __init__(self, row, isbn, title, author, year, avg_rating, rating_count, score):
+        self.row, self.isbn, self.title, self.author = row, isbn, title, author
+        self.year, self.avg_rating, self.rating_count, self.score = year, avg_rating, rating_count, score
+
+    def __repr__(self):
+        return f"BookRecord({self.isbn!r}, {self.title!r}, score={self.score!r})"
+
+
+class Results:
+    """A ranked answer: catalogue ``rows`` and their ``scores`` as read-only
+    NumPy arrays – what every recommender method computes and caches.
+
+    Book fields are read from the BookStore only on access (per column, per
+    record when iterated, or all at once by ``to_frame``), so they always show
+    the current ratings. ``label`` names the frame column the scores appear
+    under (None: scores are not shown); ``info`` holds extra details such as
+    the hybrid stage status, exposed as ``frame.attrs``.
+    """
+
+    __slots__ = ('rows', 'scores', 'label', 'info', '_store')
+
+    def __init__(self, rows, scores, store, label=None, info=None):
+        self.rows   = np.array(rows, dtype=np.int64)
+        self.scores = np.array(scores, dtype=np.float64)
+        self.rows.flags.writeable = self.scores.flags.writeable = False
+        self.label, self.info, self._store = label, info or {}, store
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.scores.nbytes
+
+    def column(self, name):
+        """Column ``name`` of the listed books, as a NumPy array."""
+        return self._store.values(name, self.rows)
+
+    def __iter__(self):
+        columns = [self.column(name).tolist() for name in RESULT_COLUMNS]
+        for row, *fields, score in zip(self.rows.tolist(), *columns, self.scores.tolist()):
+            yield BookRecord(row, *fields, score)
+
+    def to_dicts(self):
+        """One dict per book keyed like ``to_frame``'s columns, NaN → None."""
+        names = RESULT_COLUMNS + ([self.label] if self.label else [])
+        columns = [self.column(name).tolist() for name in RESULT_COLUMNS]
+        if self.label:
+            columns.append(self.scores.tolist())
+        return [{k: None if v != v else v for k, v in zip(names, values)}
+                for values in zip(*columns)]
+
+    def to_frame(self):
+        """The DataFrame the older API returns: book columns (+ the scores)."""
+        frame = pd.DataFrame({name: self._store.series(name, self.rows) for name in RESULT_COLUMNS})
+        if self.label:
+            frame[self.label] = self.scores
+        frame.attrs.update(self.info)
+        return frame
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  RECOMMENDER ENGINE
 # ─────────────────────────────────────────────────────────────────────────────
 class BookRecommenderSystem:
-    def __init__(self, books, ratings, users):
-        self.books   = books.copy()
-        self.ratings = ratings.copy()
-        self.users   = users.copy()
-
-        # build avg_rating per book
-        avg = ratings.groupby('ISBN')['Book-Rating'].agg(['mean','count']).reset_index()
-        avg.columns = ['ISBN','avg_rating','rating_count']
-        self.books = self.books.merge(avg, on='ISBN', how='left')
-        self.books['avg_rating']   = self.books['avg_rating'].fillna(0).round(2)
-        self.books['rating_count'] = self.books['rating_count'].fillna(0).astype(int)
-
-        # popularity score (weighted)
-        C = self.books['avg_rating'].mean()
-        m = self.books['rating_count'].quantile(0.70)
-        self.books['popularity'] = (
-            (self.books['rating_count'] / (self.books['rating_count'] + m)) * self.books['avg_rating'] +
-            (m / (self.books['rating_count'] + m)) * C
-        ).round(3)
-
-        print("\n🔧 Building TF-IDF content model...")
+    LIKED_RATING  = 7       # ratings at or above this count as "liked"
+    N_NEIGHBOURS  = 20      # similar users consulted per collaborative query
+    BATCH_BLOCK_SIZE = 1024 # ids scored per matrix block in the batch APIs
+    N_WORKERS        = 1    # processes used by the batch APIs (0 = one per CPU)
+
+    # content model: TF-IDF over title/author/publisher, top-K neighbours per book
+    CONTENT_TOP_K        = 30
+    CONTENT_CHUNK        = 1024   # rows per sparse similarity product while building
+    CONTENT_MAX_FEATURES = 50000
+    CONTENT_MAX_DF       = 0.01   # terms in more docs than this share are dropped …
+    CONTENT_MIN_MAX_DF   = 100    # … unless that is fewer than this many docs
+
+    # collaborative model behind each ``method`` name, the latent-factor size
+    # and the item–item index (adjusted cosine, top-K catalogue neighbours per item)
+    COLLAB_METHODS = {'user': 'collaborative', 'svd': 'svd', 'item': 'item'}
+    SVD_FACTORS    = 64
+    SVD_SEED       = 42
+    ITEM_TOP_K     = 50
+    ITEM_CHUNK     = 1024   # items per sparse similarity product while building
+
+    # hybrid recommend(): candidates gathered per source, score blend weights and
+    # per-stage latency budgets in seconds (None = no limit)
+    HYBRID_CANDIDATES = 50
+    HYBRID_SEEDS      = 5     # a user's best-rated books seeding the content stage
+    HYBRID_WEIGHTS    = {'content': 0.3, 'collaborative': 0.5, 'popularity': 0.2}
+    HYBRID_BUDGETS    = {'content': 0.05, 'collaborative': 0.25}
+
+    # settings a saved model was trained with; restored by ``load``
+    MODEL_PARAMS = ('LIKED_RATING', 'N_NEIGHBOURS', 'CONTENT_TOP_K', 'CONTENT_MAX_FEATURES',
+                    'CONTENT_MAX_DF', 'CONTENT_MIN_MAX_DF', 'SVD_FACTORS', 'SVD_SEED', 'ITEM_TOP_K')
+
+    # incremental updates: refit the latent factors once this share of the
+    # ratings present at the last full fit has been added, changed or removed
+    REOPTIMIZE_DRIFT = 0.05
+
+    def __init__(self, books, ratings, users, cache=None, metrics=None):
+        # shallow copy: the model's own columns stay off the caller's frame
+        # while the data arrays are shared instead of duplicated
+        self.books   = books.copy(deep=False)
+        self.books.index = pd.RangeIndex(len(books))
+        self._store  = BookStore(self.books)
+        self.ratings = ratings
+        self.users   = users
+        self.cache   = ResultCache() if cache is None else cache
+        self.metrics = NULL_METRICS if metrics is None else metrics
+        self.model_version = 0
+        self._pop_index = None
+        self._segments  = None
+
+        print("\n🔧 Building user–item rating matrix...")
+        with self.metrics.timer('build.rating_matrix'):
+            self._build_rating_matrix(ratings)
+            self._init_rating_stats()
+        with self.metrics.timer('build.popularity'):
+            self._update_popularity()
+            self._popularity_index()
+        with self.metrics.timer('build.segments'):
+            self._segment_index()
+
+        print("🔧 Building TF-IDF content model...")
         self._build_content_model()
+        self._user_factors = self._item_factors = None
+        self._item_nn_idx = self._item_nn_sim = self._item_sim = None
+        self._svd_lock  = threading.Lock()     # one lazy build at a time per model
+        self._item_lock = threading.Lock()
+        self._search_indexes = {}
         print("✅ Recommender ready!\n")
 
-    def _build_content_model(self):
-        # use top-N books by rating count for content model (memory friendly)
-        top_books = self.books.nlargest(500, 'rating_count').reset_index(drop=True)
-        self._content_books = top_books.copy()
+    @property
+    def ratings(self):
+        if self._ratings is None:   # rebuilt from the matrix after incremental updates
+            coo = self._ui_csr.tocoo()
+            self._ratings = pd.DataFrame({'User-ID': self._user_ids[coo.row],
+                                          'ISBN': self._item_isbns[coo.col],
+                                          'Book-Rating': _as_int(pd.Series(coo.data), np.int8)})
+        return self._ratings
+
+    @ratings.setter
+    def ratings(self, frame):
+        self._ratings = frame
+
+    # ── per-book rating statistics + popularity ───────────────────────────────
+    def _init_rating_stats(self):
+        """Running per-item rating sums/counts, and a histogram of the catalogue's
+        rating counts from which the popularity quantile is read exactly."""
+        self._item_counts = np.diff(self._ui_csc.indptr).astype(np.int64)
+        self._item_sums   = np.asarray(self._ui_csc.sum(axis=0), dtype=np.float64).ravel()
+        self._count_hist  = np.bincount(self._item_counts[:self._n_books])
+        self._drift_base  = max(self._ui_csr.nnz, 1)
+        self._drift       = 0
+
+    def _count_quantile(self, q):
+        """``q``-quantile of the catalogue rating counts (linear interpolation,
+        as ``Series.quantile``), in O(max count) from the histogram."""
+        n = int(self._count_hist.sum())
+        if n == 0:
+            return np.nan
+        pos  = (n - 1) * q                            # numpy's 'linear' method virtual index
+        lo   = int(np.floor(pos))
+        frac = pos - lo
+        cum  = np.cumsum(self._count_hist)
+        a, b = np.searchsorted(cum, [lo, min(lo + 1, n - 1)], side='right').astype(np.float64)
+        diff = b - a
+        return b - diff * (1 - frac) if frac >= 0.5 else a + diff * frac
+
+    def _update_popularity(self):
+        """avg_rating / rating_count / popularity columns from the running stats.
+
+        popularity = v/(v+m)·R + m/(v+m)·C, with C the mean avg_rating and m the
+        70th percentile of rating counts – a Bayesian (weighted) average.
+        """
+        counts = self._item_counts[:self._n_books]
+        sums   = self._item_sums[:self._n_books]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg = np.round(np.where(counts > 0, sums / np.maximum(counts, 1), 0.0), 2)
+            C = avg.mean() if len(avg) else 0.0
+            m = self._count_quantile(0.70)
+            popularity = (counts / (counts + m)) * avg + (m / (counts + m)) * C
+        self.books['avg_rating']   = avg
+        self.books['rating_count'] = counts.astype(int)
+        self.books['popularity']   = np.round(popularity, 3)
+        self._store.invalidate('avg_rating', 'rating_count', 'popularity')
+        self._charts = {}
+        if self._pop_index is not None:
+            self._pop_index.update(self._store.column('popularity'))
+
+    def _popularity_index(self):
+        """Popularity order of the catalogue (see PopularityIndex), built once."""
+        if self._pop_index is None:
+            self._pop_index = PopularityIndex(self.books)
+        return self._pop_index
+
+    def _segment_index(self):
+        """Top books per reader country / age bucket (see SegmentIndex), built once."""
+        if self._segments is None:
+            self._segments = SegmentIndex(self.users, self._user_ids, self._ui_csr, self._n_books)
+        return self._segments
+
+    # ── integer ID encoding + sparse rating matrix ────────────────────────────
+    def _build_rating_matrix(self, ratings):
+        """Encode users/ISBNs as dense ints and build CSR + CSC rating matrices.
+
+        Item ids 0 .. n_books-1 are the rows of ``self.books`` (first row wins for
+        a duplicated ISBN); ISBNs that only occur in the ratings file follow.
+        """
+        book_isbns = self.books['ISBN'].astype(str).to_numpy(dtype=object)
+        codes, r_isbns = _isbn_codes(ratings['ISBN'])       # work per distinct ISBN
+        in_books   = pd.Index(r_isbns).isin(book_isbns)
+        extra      = r_isbns[pd.unique(codes[~in_books[codes]])]
+        self._n_books    = len(book_isbns)
+        self._item_isbns = np.concatenate([book_isbns, extra]).astype(object)
+
+        first = ~pd.Index(self._item_isbns).duplicated()
+        lookup, positions = pd.Index(self._item_isbns[first]), np.flatnonzero(first)
+        self._isbn_index = dict(zip(lookup.tolist(), positions.tolist()))
+        items = positions[lookup.get_indexer(r_isbns)][codes].astype(np.int32)
+
+        users, self._user_ids = pd.factorize(ratings['User-ID'], sort=True)
+        self._user_ids   = np.asarray(self._user_ids)
+        self._user_index = dict(zip(self._user_ids.tolist(), range(len(self._user_ids))))
+        users = users.astype(np.int32)
+
+        # a user re-rating a book keeps the last rating instead of summing them
+        n_items = len(self._item_isbns)
+        keep = ~pd.Series(users.astype(np.int64) * n_items + items).duplicated(keep='last').to_numpy()
+        vals = ratings['Book-Rating'].to_numpy(dtype=np.float32)[keep]
+
+        shape = (len(self._user_ids), n_items)
+        self._ui_csr = sparse.csr_matrix((vals, (users[keep], items[keep])),
+                                         shape=shape, dtype=np.float32)
+        self._ui_csc = self._ui_csr.tocsc()     # column access: item → users
+        for m in (self._ui_csr, self._ui_csc):
+            m.indices = m.indices.astype(np.int32, copy=False)
+            m.indptr  = m.indptr.astype(np.int32 if m.nnz < 2**31 else np.int64, copy=False)
+        self._build_neighbour_views()
+
+    def _build_neighbour_views(self):
+        self._build_overlap_view()
+        # users × items holding only the ratings that count as "liked"
+        liked = self._ui_csr.copy()
+        liked.data[liked.data < self.LIKED_RATING] = 0
+        liked.eliminate_zeros()
+        self._liked_csr = liked
+
+    def _build_overlap_view(self):
+        # items × users with all-ones data (shares index arrays with the CSC):
+        # a binary user row times this gives co-rating overlap with every user
+        csc = self._ui_csc
+        self._iu_bin = sparse.csr_matrix(
+            (np.ones(csc.nnz, dtype=csc.dtype), csc.indices, csc.indptr), shape=csc.shape[::-1])
 
-        corpus = (top_books['Book-Title'].fillna('') + ' ' +
-                  top_books['Book-Author'].fillna('') + ' ' +
-                  top_books['Publisher'].fillna(''))
-        tfidf = TfidfVectorizer(max_features=3000, stop_words='english')
-        mat   = tfidf.fit_transform(corpus)
-        self._sim_matrix = cosine_similarity(mat)
+    @staticmethod
+    def _user_key(user_id):
+        """A User-ID as stored (accepts the raw string from the menu)."""
+        return int(user_id) if str(user_id).isdigit() else user_id
+
+    def _user_row(self, user_id):
+        """Integer row for a User-ID."""
+        return self._user_index.get(self._user_key(user_id))
+
+    def knows_user(self, user_id):
+        """True for a User-ID with ratings or a row in the users table."""
+        return self._user_row(user_id) is not None or self._segment_index().knows(self._user_key(user_id))
+
+    def _items_of(self, u):
+        start, end = self._ui_csr.indptr[u], self._ui_csr.indptr[u + 1]
+        return self._ui_csr.indices[start:end], self._ui_csr.data[start:end]
+
+    def _build_content_model(self):
+        """TF-IDF over every catalogue book plus a top-K neighbour index.
+
+        Similarities are computed ``CONTENT_CHUNK`` rows at a time as sparse
+        products and only the best ``CONTENT_TOP_K`` per book are kept, so
+        memory grows as O(N·K) rather than O(N²). Very common terms are
+        dropped: they add little to cosine scores but make every chunk product
+        close to dense.
+        """
+        books  = self.books
+        corpus = (_text(books['Book-Title']) + ' ' + _text(books['Book-Author']) + ' ' +
+                  _text(books['Publisher']))
+        max_df = max(self.CONTENT_MIN_MAX_DF, int(self.CONTENT_MAX_DF * len(books)))
+        TfidfVectorizer = _sklearn('feature_extraction.text', 'TfidfVectorizer')
+        with self.metrics.timer('build.tfidf'):
+            try:
+                tfidf = TfidfVectorizer(max_features=self.CONTENT_MAX_FEATURES, stop_words='english',
+                                        max_df=max_df, dtype=np.float32)
+                mat = tfidf.fit_transform(corpus)
+            except ValueError:      # every term was too common – keep them all
+                tfidf = TfidfVectorizer(max_features=self.CONTENT_MAX_FEATURES,
+                                        stop_words='english', dtype=np.float32)
+                mat = tfidf.fit_transform(corpus)
+            self._tfidf, self._tfidf_mat = tfidf, mat.tocsr()
+            self._tfidf_t = self._tfidf_mat.T.tocsr()
+
+        k, n  = self.CONTENT_TOP_K, self._tfidf_mat.shape[0]
+        self._nn_idx = np.full((n, k), -1, dtype=np.int32)
+        self._nn_sim = np.zeros((n, k), dtype=np.float32)
+        with self.metrics.timer('build.similarity'):
+            for start in range(0, n, self.CONTENT_CHUNK):
+                rows = np.arange(start, min(start + self.CONTENT_CHUNK, n))
+                self._nn_idx[rows], self._nn_sim[rows] = \
+                    _neighbours(self._tfidf_mat, self._tfidf_t, rows, k)
 
     # ── content-based ─────────────────────────────────────────────────────────
+    @_timed('content_recommendations')
     def content_recommendations(self, isbn, n=5):
-        cb = self._content_books
-        if isbn not in cb['ISBN'].values:
-            return pd.DataFrame()
-        idx    = cb[cb['ISBN'] == isbn].index[0]
-        scores = list(enumerate(self._sim_matrix[idx]))
-        scores = sorted(scores, key=lambda x: x[1], reverse=True)[1:n+1]
-        return cb.iloc[[i for i, _ in scores]][
-            ['ISBN','Book-Title','Book-Author','Year-Of-Publication','avg_rating','rating_count']
-        ].reset_index(drop=True)
-
-    # ── collaborative (item-based) ────────────────────────────────────────────
-    def collaborative_recommendations(self, user_id, n=5):
-        user_id = int(user_id) if str(user_id).isdigit() else user_id
-        user_books = self.ratings[self.ratings['User-ID'] == user_id]['ISBN'].tolist()
-        if not user_books:
-            return self.popular_books(n)
-
-        # users who rated same books
-        similar_users = self.ratings[
-            (self.ratings['ISBN'].isin(user_books)) &
-            (self.ratings['User-ID'] != user_id)
-        ]['User-ID'].value_counts().head(20).index
-
-        # books those users liked (rating >= 7)
-        recs = self.ratings[
-            (self.ratings['User-ID'].isin(similar_users)) &
-            (~self.ratings['ISBN'].isin(user_books)) &
-            (self.ratings['Book-Rating'] >= 7)
-        ]['ISBN'].value_counts().head(n).index
-
-        return self.books[self.books['ISBN'].isin(recs)][
-            ['ISBN','Book-Title','Book-Author','Year-Of-Publication','avg_rating','rating_count']
-        ].reset_index(drop=True)
+        return self._frame(self.content_results(isbn, n), 'content')
+
+    @_timed('content_results')
+    def content_results(self, isbn, n=5):
+        """TF-IDF neighbours of ``isbn`` as Results (scores: cosine similarity)."""
+        row = self._isbn_index.get(str(isbn))
+        if row is None or row >= self._n_books:
+            return self._results()
+        return self._cached(('content', row, n), lambda: self._content_result(row, n))
+
+    def _content_result(self, row, n):
+        with self.metrics.timer('content.score'):
+            nbrs, sims = self._content_rows([row], n)
+            keep = nbrs[0] >= 0
+        return self._results(nbrs[0][keep], sims[0][keep]), nbrs[0][keep]
+
+    def _content_rows(self, rows, n):
+        """Row-wise top-n neighbours for catalogue rows → (idx, sim) arrays."""
+        return _content_block(rows, self._nn_idx, self._nn_sim, n,
+                              self._tfidf_mat, self._tfidf_t)
+
+    # ── collaborative (user-neighbourhood) ───────────────────────────────────
+    @_timed('collaborative_recommendations')
+    def collaborative_recommendations(self, user_id, n=5, method='user'):
+        """Books for a user: ``method`` is 'user' (neighbourhood), 'item'
+        (item–item similarities) or 'svd' (latent factors)."""
+        return self._frame(self.collaborative_results(user_id, n, method), self._collab_kind(method))
+
+    @_timed('collaborative_results')
+    def collaborative_results(self, user_id, n=5, method='user'):
+        """``collaborative_recommendations`` as Results; a user without ratings
+        gets their reader segment's list (see ``segment_books``)."""
+        kind = self._collab_kind(method)
+        with self.metrics.timer('collaborative.lookup'):
+            u = self._user_row(user_id)
+        if u is None or self._ui_csr.indptr[u] == self._ui_csr.indptr[u + 1]:
+            return self._segment_results(self._segment_of(user_id), n)
+        return self._cached((kind, u, n), lambda: self._collab_result(kind, u, n), [('user', u)])
+
+    def _collab_result(self, kind, u, n):
+        with self.metrics.timer(f'{kind}.score'):
+            if kind != 'collaborative':
+                recs, scores = self._scorer(kind)(u, n)
+                return self._results(recs, scores), recs
+            user_items, weights = self._neighbourhood(u)
+            recs, scores = self._neighbour_scores(user_items, weights, n)
+        return self._results(recs, scores), recs, self._neighbourhood_tags(user_items, weights)
+
+    def _neighbourhood(self, u):
+        """(items user row ``u`` rated, 1×users weights of its top-k neighbours).
+
+        overlap  = binary(u) · items×users      → co-rated count with every user
+        weights  = top-k overlaps (self excluded) → sparse 1×users vector
+        """
+        user_items = self._items_of(u)[0]
+        row = sparse.csr_matrix((np.ones(len(user_items), np.float32), user_items,
+                                 [0, len(user_items)]), shape=(1, self._ui_csr.shape[1]))
+        overlap = row @ self._iu_bin
+        others  = overlap.indices != u
+        nbrs, w = overlap.indices[others], overlap.data[others]
+        top     = top_n(w, self.N_NEIGHBOURS)
+        top     = top[np.argsort(nbrs[top])]        # same row order as the batch kernel
+        weights = sparse.csr_matrix((w[top], nbrs[top], [0, len(top)]),
+                                    shape=(1, self._ui_csr.shape[0]))
+        return user_items, weights
+
+    def _neighbour_scores(self, user_items, weights, n):
+        """Top-n catalogue rows and scores: weights · liked, the weighted sum
+        of the neighbours' liked ratings, without the user's own books."""
+        scores = weights @ self._liked_csr
+        keep   = (scores.indices < self._n_books) & ~np.isin(scores.indices, user_items)
+        cand, vals = scores.indices[keep], scores.data[keep]
+        best = top_n(vals, n)
+        return cand[best], vals[best]
+
+    @staticmethod
+    def _neighbourhood_tags(user_items, weights):
+        """Cache tags of what a neighbourhood result reads besides the user's
+        own ratings: the neighbours' ratings, and who else rated the user's
+        books (that decides who the neighbours are)."""
+        return [*(('user', int(v)) for v in weights.indices),
+                *(('book', int(i)) for i in user_items)]
+
+    def _prepare_model(self, kind):
+        """Build the lazily fitted model behind a collaborative kind, if any."""
+        if kind == 'svd':
+            self._factors()
+        elif kind == 'item':
+            self._item_index()
+
+    def _scorer(self, kind):
+        """``(user row, n) → (catalogue rows, scores)`` of the 'svd' and 'item'
+        kinds; neighbourhood results go through ``_neighbourhood``."""
+        return {'svd': self._svd_scores, 'item': self._item_scores}[kind]
+
+    def _collab_kind(self, method):
+        if method not in self.COLLAB_METHODS:
+            raise ValueError(f"unknown method {method!r}; expected one of {sorted(self.COLLAB_METHODS)}")
+        return self.COLLAB_METHODS[method]
+
+    # ── latent-factor model ───────────────────────────────────────────────────
+    @_timed('build.svd')
+    def _build_factor_model(self):
+        """Truncated SVD of the explicit ratings: X ≈ (U·Σ)·Vᵀ.
+
+        Stores float32 user factors (U·Σ) and item factors (V), so a user's
+        scores are one dot product with the catalogue rows of V whatever their
+        number of ratings. Both are published together, ``_user_factors``
+        last: readers treat it being set as "model ready".
+        """
+        explicit = self._ui_csr.copy()
+        explicit.eliminate_zeros()                    # 0 = implicit interaction
+        k = max(1, min(self.SVD_FACTORS, min(explicit.shape) - 1))
+        svd = _sklearn('decomposition', 'TruncatedSVD')(n_components=k, random_state=self.SVD_SEED)
+        user_f = svd.fit_transform(explicit).astype(np.float32)
+        self._item_factors = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+        self._user_factors = user_f
+
+    def _vectorizer(self):
+        """The fitted TfidfVectorizer. A loaded model only needs its matrices to
+        score, so the vectorizer (and scikit-learn) is rebuilt on first use."""
+        if self._tfidf is None:
+            path, params, idf = self._tfidf_source
+            with open(os.path.join(path, 'vocabulary.txt'), 'rb') as fh:
+                raw = fh.read().decode('utf-8')
+            terms = raw.split('\x00') if raw else []
+            tfidf = _sklearn('feature_extraction.text', 'TfidfVectorizer')(dtype=np.float32, **params)
+            tfidf.vocabulary_ = dict(zip(terms, range(len(terms))))
+            tfidf.idf_ = np.asarray(idf)
+            self._tfidf = tfidf
+        return self._tfidf
+
+    def _factors(self):
+        if self._user_factors is None:  # fitted on first use of method='svd', once
+            with self._svd_lock:
+                if self._user_factors is None:
+                    print("🔧 Fitting latent-factor model...")
+                    self._build_factor_model()
+        return self._user_factors, self._item_factors[:self._n_books]
+
+    def _svd_scores(self, u, n):
+        cols, vals = _svd_block(np.array([u]), *self._factors(), self._ui_csr, n)
+        keep = cols[0] >= 0
+        return cols[0][keep], vals[0][keep]
+
+    # ── item–item model ───────────────────────────────────────────────────────
+    @_timed('build.item_similarity')
+    def _build_item_model(self):
+        """Adjusted-cosine item–item similarities, pruned to the ``ITEM_TOP_K``
+        most similar catalogue books per item.
+
+        Each rating is centred on its user's mean, so two books are similar
+        when readers rate both above (or below) their own average. Item columns
+        are L2-normalised and the similarities computed ``ITEM_CHUNK`` items at
+        a time as (items × users)·(users × books) sparse products; only positive
+        similarities are kept, in two padded (items × K) arrays.
+
+        The arrays are filled as locals and published together at the end,
+        ``_item_nn_idx`` last (see ``_build_factor_model``).
+        """
+        centred = self._ui_csr.astype(np.float32)
+        centred.eliminate_zeros()
+        counts = np.diff(centred.indptr)
+        means  = np.asarray(centred.sum(axis=1)).ravel() / np.maximum(counts, 1)
+        centred.data -= np.repeat(means, counts).astype(np.float32)
+        centred.eliminate_zeros()               # ratings equal to the user's mean
+
+        items = centred.T.tocsr()               # items × users
+        norms = np.sqrt(np.asarray(items.multiply(items).sum(axis=1)).ravel())
+        items.data /= np.repeat(np.where(norms > 0, norms, 1), np.diff(items.indptr)).astype(np.float32)
+        books_t = items[:self._n_books].T.tocsr()
+
+        k, n = self.ITEM_TOP_K, items.shape[0]
+        nn_idx = np.full((n, k), -1, dtype=np.int32)
+        nn_sim = np.zeros((n, k), dtype=np.float32)
+        for start in range(0, n, self.ITEM_CHUNK):
+            rows = np.arange(start, min(start + self.ITEM_CHUNK, n))
+            nn_idx[rows], nn_sim[rows] = _neighbours(items, books_t, rows, k)
+        self._item_sim = None
+        self._item_nn_sim = nn_sim
+        self._item_nn_idx = nn_idx
+
+    def _item_index(self):
+        """The neighbour arrays as a sparse (items × catalogue) matrix; the model
+        is built on first use of method='item'. Items added since then have no
+        neighbours until ``reoptimize``. Concurrent first calls wait for one
+        build under ``_item_lock``."""
+        if self._item_nn_idx is None:
+            with self._item_lock:
+                if self._item_nn_idx is None:       # not built while we waited
+                    print("🔧 Building item–item similarity index...")
+                    self._build_item_model()
+        n_items = len(self._item_isbns)
+        item_sim = self._item_sim
+        if item_sim is None or item_sim.shape[0] != n_items:
+            nn_idx, nn_sim = self._item_nn_idx, self._item_nn_sim
+            keep   = nn_idx >= 0
+            indptr = np.zeros(n_items + 1, dtype=np.int64)
+            indptr[1:len(keep) + 1] = np.cumsum(keep.sum(axis=1))
+            indptr[len(keep) + 1:] = indptr[len(keep)]
+            item_sim = self._item_sim = sparse.csr_matrix(
+                (nn_sim[keep], nn_idx[keep], indptr), shape=(n_items, self._n_books))
+        return item_sim
+
+    def _item_scores(self, u, n):
+        cols, vals = _item_block([u], self._ui_csr, self._item_index(), self._n_books, n)
+        keep = cols[0] >= 0
+        return cols[0][keep], vals[0][keep]
+
+    @_timed('similar_items')
+    def similar_items(self, isbn, n=5):
+        """Readers also liked: the books rated most like ``isbn`` (item–item
+        index, so at most ``ITEM_TOP_K``)."""
+        return self._frame(self.similar_results(isbn, n), 'similar')
+
+    @_timed('similar_results')
+    def similar_results(self, isbn, n=5):
+        """``similar_items`` as Results (scores: adjusted-cosine similarity)."""
+        row = self._isbn_index.get(str(isbn))
+        if row is None:
+            return self._results()
+        return self._cached(('similar', row, n), lambda: self._similar_result(row, n))
+
+    def _similar_result(self, row, n):
+        self._item_index()
+        with self.metrics.timer('similar.score'):
+            if row < len(self._item_nn_idx):
+                nbrs, sims = self._item_nn_idx[row, :n], self._item_nn_sim[row, :n]
+            else:
+                nbrs, sims = np.empty(0, np.int32), np.empty(0, np.float32)
+            keep = nbrs >= 0
+        return self._results(nbrs[keep], sims[keep]), nbrs[keep]
+
+    # ── batch scoring ─────────────────────────────────────────────────────────
+    @_timed('batch_collaborative_recommendations')
+    def batch_collaborative_recommendations(self, user_ids, n=5, block_size=None, workers=None,
+                                            method='user'):
+        """Recommendations for many users in one call, as a long-format frame.
+
+        Users are scored ``block_size`` at a time with sparse matrix products,
+        which bounds peak memory; ``workers`` > 1 fans the blocks out over a
+        process pool. Unknown users and users without ratings get their
+        reader segment's list, like ``collaborative_recommendations``.
+        Columns: User-ID, rank, ISBN, score.
+        """
+        kind = self._collab_kind(method)
+        user_ids = list(user_ids)
+        rows = np.array([-1 if r is None else r for r in map(self._user_row, user_ids)], dtype=np.intp)
+        indptr = self._ui_csr.indptr
+        warm = np.flatnonzero(rows >= 0)
+        warm = warm[indptr[rows[warm] + 1] > indptr[rows[warm]]]
+
+        parts = [(q, cols, vals) for q, (cols, vals) in
+                 self._score_blocks(kind, warm, rows[warm], n, block_size, workers)]
+
+        cold = np.setdiff1d(np.arange(len(user_ids)), warm)
+        if len(cold):
+            segments = self._segment_index().segments_of([self._user_key(user_ids[i]) for i in cold])
+            for seg in np.unique(segments):
+                who = cold[segments == seg]
+                best, scores = self._segment_rows(seg, n)
+                parts.append((who, np.tile(best, (len(who), 1)), np.tile(scores, (len(who), 1))))
+        return self._long_frame(parts, np.asarray(user_ids, dtype=object), 'User-ID', n)
+
+    @_timed('batch_content_recommendations')
+    def batch_content_recommendations(self, isbns, n=5, block_size=None, workers=None):
+        """Content-based neighbours for many ISBNs, as a long-format frame.
+
+        ISBNs outside the content model produce no rows.
+        Columns: query_ISBN, rank, ISBN, score.
+        """
+        isbns = list(isbns)
+        rows  = np.array([self._isbn_index.get(str(x), -1) for x in isbns], dtype=np.intp)
+        rows[rows >= self._n_books] = -1
+        known = np.flatnonzero(rows >= 0)
+        parts = [(q, top, sim) for q, (top, sim) in
+                 self._score_blocks('content', known, rows[known], n, block_size, workers)]
+        return self._long_frame(parts, np.asarray(isbns, dtype=object), 'query_ISBN', n)
+
+    def _kernel_inputs(self, kind, n):
+        """Arrays and scalar params a scoring kernel needs (see ``_run_kernel``)."""
+        if kind == 'collaborative':
+            arrays = {**_csr_parts('ui', self._ui_csr), **_csr_parts('iu', self._iu_bin),
+                      **_csr_parts('liked', self._liked_csr)}
+            return arrays, {'shape': self._ui_csr.shape, 'n_books': self._n_books,
+                            'k': self.N_NEIGHBOURS}
+        if kind == 'svd':
+            user_f, item_f = self._factors()
+            return ({'user_f': user_f, 'item_f': item_f, **_csr_parts('ui', self._ui_csr)},
+                    {'shape': self._ui_csr.shape})
+        if kind == 'item':
+            return ({**_csr_parts('ui', self._ui_csr), **_csr_parts('isim', self._item_index())},
+                    {'shape': self._ui_csr.shape, 'n_books': self._n_books})
+        arrays = {'nn_idx': self._nn_idx, 'nn_sim': self._nn_sim}
+        if n > self.CONTENT_TOP_K:      # past the index: workers need the TF-IDF rows too
+            arrays.update({**_csr_parts('tfidf', self._tfidf_mat),
+                           **_csr_parts('tfidf_t', self._tfidf_t)})
+        return arrays, {'tfidf_shape': self._tfidf_mat.shape}
+
+    def _score_blocks(self, kind, queries, rows, n, block_size=None, workers=None):
+        """Yield ``(query positions, kernel output)`` per block, in input order.
+
+        With more than one worker the kernel inputs are published once through
+        :class:`SharedArrays` and blocks are spread over a process pool; results
+        come back in submission order, so output is identical to the serial run.
+        """
+        block_size = block_size or self.BATCH_BLOCK_SIZE
+        workers = resolve_workers(self.N_WORKERS if workers is None else workers)
+        starts  = range(0, len(rows), block_size)
+        blocks  = [rows[i:i + block_size] for i in starts]
+        arrays, params = self._kernel_inputs(kind, n)
+
+        if workers <= 1 or len(blocks) <= 1:
+            if kind == 'content':       # in-process: use the model's own matrices
+                results = (self._content_rows(b, n) for b in blocks)
+            else:
+                results = (_run_kernel(kind, arrays, params, b, n) for b in blocks)
+            for i, out in zip(starts, results):
+                yield queries[i:i + block_size], out
+            return
+
+        with SharedArrays(arrays) as shared, \
+             ProcessPoolExecutor(max_workers=min(workers, len(blocks)),
+                                 initializer=_init_worker,
+                                 initargs=(shared.spec, params)) as pool:
+            for i, out in zip(starts, pool.map(_score_block, repeat(kind), blocks, repeat(n))):
+                yield queries[i:i + block_size], out
+
+    def _long_frame(self, parts, query_ids, query_col, n):
+        parts = [p for p in parts if len(p[0])]
+        if not parts:
+            return pd.DataFrame(columns=[query_col, 'rank', 'ISBN', 'score'])
+        q     = np.concatenate([np.repeat(p[0], p[1].shape[1]) for p in parts])
+        rank  = np.concatenate([np.tile(np.arange(1, p[1].shape[1] + 1), len(p[0])) for p in parts])
+        items = np.concatenate([p[1].ravel() for p in parts])
+        score = np.concatenate([p[2].ravel() for p in parts])
+        ok = items >= 0
+        out = pd.DataFrame({query_col: query_ids[q[ok]], 'rank': rank[ok],
+                            'ISBN': self._item_isbns[items[ok]],
+                            'score': score[ok]})
+        order = np.lexsort((out['rank'].to_numpy(), q[ok]))
+        return out.iloc[order].reset_index(drop=True)
+
+    # ── incremental ingestion ─────────────────────────────────────────────────
+    @_timed('add_ratings')
+    def add_ratings(self, ratings):
+        """Fold new or changed ratings into the live model without a rebuild.
+
+        ``ratings`` needs User-ID, ISBN and Book-Rating columns. A user re-rating
+        a book replaces the old rating and 0 (implicit) ratings are skipped, as
+        in DataLoader; unseen users and ISBNs are added. Returns the number of
+        ratings applied.
+        """
+        df = self._rating_updates(ratings, ['User-ID', 'ISBN', 'Book-Rating'])
+        df = df[pd.to_numeric(df['Book-Rating'], errors='coerce') > 0]
+        if df.empty:
+            return 0
+        users = self._encode(df['User-ID'], 'user')
+        items = self._encode(df['ISBN'].astype(str), 'item')
+        return self._apply_ratings(users, items, df['Book-Rating'].to_numpy(dtype=np.float32))
+
+    @_timed('remove_ratings')
+    def remove_ratings(self, ratings):
+        """Delete ratings given as a frame of (User-ID, ISBN) pairs.
+
+        Pairs that are not rated are ignored. Returns the number removed.
+        """
+        df = self._rating_updates(ratings, ['User-ID', 'ISBN'])
+        users = np.array([-1 if u is None else u for u in map(self._user_row, df['User-ID'])],
+                         dtype=np.int64)
+        items = np.array([self._isbn_index.get(str(x), -1) for x in df['ISBN']], dtype=np.int64)
+        known = (users >= 0) & (items >= 0)
+        if not known.any():
+            return 0
+        return self._apply_ratings(users[known], items[known], None)
+
+    @staticmethod
+    def _rating_updates(ratings, columns):
+        missing = [c for c in columns if c not in ratings.columns]
+        if missing:
+            raise ValueError(f"ratings frame is missing columns {missing}")
+        return ratings[columns]
+
+    def _encode(self, ids, kind):
+        """Dense rows for User-IDs / ISBNs, registering the ones not seen yet."""
+        if kind == 'user':
+            index, known = self._user_index, self._user_ids
+            ids = [int(x) if str(x).isdigit() else x for x in ids]
+        else:
+            index, known = self._isbn_index, self._item_isbns
+        new = [x for x in dict.fromkeys(ids) if x not in index]
+        if new:
+            start = len(known)
+            index.update(zip(new, range(start, start + len(new))))
+            new = np.asarray(new, dtype=object) if known.dtype == object else np.asarray(new)
+            grown = np.concatenate([np.asarray(known), new])     # may widen the id dtype
+            if kind == 'user':
+                self._user_ids = grown
+            else:
+                self._item_isbns = grown
+                self._item_counts = np.concatenate([self._item_counts, np.zeros(len(new), np.int64)])
+                self._item_sums   = np.concatenate([self._item_sums, np.zeros(len(new))])
+        return np.array([index[x] for x in ids], dtype=np.int64)
+
+    def _apply_ratings(self, users, items, vals):
+        """Upsert (``vals`` given) or delete entries, then bring every derived
+        structure up to date. The CSR keeps its sorted (row, column) order, so
+        the merge is a binary search plus one linear insert/delete pass."""
+        n_users, n_items = len(self._user_ids), len(self._item_isbns)
+        keys = users * n_items + items
+        last = ~pd.Series(keys).duplicated(keep='last').to_numpy()
+        order = np.argsort(keys[last], kind='stable')
+        keys = keys[last][order]
+        vals = None if vals is None else vals[last][order]
+
+        csr = self._ui_csr
+        if not csr.has_sorted_indices:
+            csr = csr.copy()
+            csr.sort_indices()
+        rows = np.repeat(np.arange(csr.shape[0], dtype=np.int64), np.diff(csr.indptr))
+        old_keys = rows * n_items + csr.indices
+        data = np.array(csr.data, dtype=np.float32)
+
+        pos   = np.searchsorted(old_keys, keys)
+        found = pos < len(old_keys)
+        found[found] = old_keys[pos[found]] == keys[found]
+        old_vals = np.zeros(len(keys), dtype=np.float64)
+        old_vals[found] = data[pos[found]]
+        old_counts = self._item_counts.copy()
+        d_items = keys % n_items
+
+        if vals is not None:
+            changed = ~found | (old_vals != vals)
+            data[pos[found]] = vals[found]
+            ins = ~found
+            old_keys = np.insert(old_keys, pos[ins], keys[ins])
+            data     = np.insert(data, pos[ins], vals[ins])
+            np.add.at(self._item_sums, d_items, vals - old_vals)
+            np.add.at(self._item_counts, d_items[ins], 1)
+        else:
+            changed = found
+            keep = np.ones(len(old_keys), dtype=bool)
+            keep[pos[found]] = False
+            old_keys, data = old_keys[keep], data[keep]
+            np.subtract.at(self._item_sums, d_items[found], old_vals[found])
+            np.subtract.at(self._item_counts, d_items[found], 1)
+        if not changed.any():
+            return 0
+
+        new_rows = old_keys // n_items
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(new_rows, minlength=n_users))])
+        idx_dtype = np.int32 if len(data) < 2**31 else np.int64
+        self._ui_csr = sparse.csr_matrix(
+            (data, (old_keys % n_items).astype(np.int32), indptr.astype(idx_dtype)),
+            shape=(n_users, n_items))
+        self._ui_csc = self._ui_csr.tocsc()
+        self._ui_csc.indices = self._ui_csc.indices.astype(np.int32, copy=False)
+        self._ui_csc.indptr  = self._ui_csc.indptr.astype(idx_dtype, copy=False)
+        self._build_neighbour_views()
+        self._ratings = None
+
+        touched_users = np.unique(keys[changed] // n_items)
+        touched_items = np.unique(d_items[changed])
+        books = touched_items[touched_items < self._n_books]
+        self._update_count_hist(old_counts[books], self._item_counts[books])
+        self._update_popularity()
+        if self._segments is not None:
+            delta = changed if vals is not None else found
+            d_sums = vals - old_vals if vals is not None else -old_vals
+            d_counts = np.where(found, 0.0, 1.0) if vals is not None else np.full(len(keys), -1.0)
+            self._segments.update(self._user_ids, keys[delta] // n_items, d_items[delta],
+                                  d_sums[delta], d_counts[delta])
+        self._fold_in_users(touched_users)
+        self.cache.invalidate('popular', *(('user', int(u)) for u in touched_users),
+                              *(('book', int(i)) for i in touched_items))
+
+        self._drift += int(changed.sum())
+        if self._drift >= self.REOPTIMIZE_DRIFT * self._drift_base:
+            self.reoptimize()
+        return int(changed.sum())
+
+    def _update_count_hist(self, before, after):
+        size = max(len(self._count_hist), int(after.max(initial=0)) + 1)
+        hist = np.zeros(size, dtype=np.int64)
+        hist[:len(self._count_hist)] = self._count_hist
+        np.subtract.at(hist, before, 1)
+        np.add.at(hist, after, 1)
+        self._count_hist = hist
+
+    def _fold_in_users(self, users):
+        """Re-project changed users onto the fixed item factors: (U·Σ)_u = x_u · V."""
+        if self._user_factors is None or len(users) == 0:
+            return
+        factors = self._user_factors
+        if len(factors) < len(self._user_ids) or not factors.flags.writeable:
+            grown = np.zeros((len(self._user_ids), factors.shape[1]), dtype=np.float32)
+            grown[:len(factors)] = factors
+            factors = grown
+        n_fitted = len(self._item_factors)        # items added since the fit have none
+        factors[users] = self._ui_csr[users][:, :n_fitted] @ self._item_factors
+        self._user_factors = factors
+
+    @_timed('build.reoptimize')
+    def reoptimize(self):
+        """Full refresh after incremental drift: exact stats from the matrix, the
+        latent factors refitted (lazily), cached results dropped."""
+        self._init_rating_stats()
+        self._update_popularity()
+        with self._svd_lock:                    # not under a build still in flight
+            self._user_factors = self._item_factors = None
+        with self._item_lock:
+            self._item_nn_idx = self._item_nn_sim = self._item_sim = None
+        self.model_version += 1
+        self.cache.clear()
+
+    # ── persistence ───────────────────────────────────────────────────────────
+    # Bundle layout (everything large is an .npy opened with mmap_mode='r', so
+    # processes loading the same bundle share one copy through the page cache):
+    #   model.json              – version, training params, shapes, data fingerprint
+    #   books/ ratings/ users/  – frames (see write_frame), books incl. popularity
+    #   items/ user_ids/        – the item / user id maps as one-column frames
+    #   vocabulary.txt          – TF-IDF terms in column order, NUL-separated
+    #   <name>.npy              – sparse matrix parts, neighbour indexes, idf, factors
+    def _model_arrays(self):
+        arrays = {**_csr_parts('ui', self._ui_csr), **_csr_parts('ui_csc', self._ui_csc),
+                  **_csr_parts('liked', self._liked_csr), **_csr_parts('tfidf', self._tfidf_mat),
+                  **_csr_parts('tfidf_t', self._tfidf_t),
+                  'nn_idx': self._nn_idx, 'nn_sim': self._nn_sim, 'idf': self._vectorizer().idf_}
+        if self._user_factors is not None:
+            arrays.update(user_f=self._user_factors, item_f=self._item_factors)
+        if self._item_nn_idx is not None:
+            arrays.update(item_nn_idx=self._item_nn_idx, item_nn_sim=self._item_nn_sim)
+        return arrays
+
+    def save(self, path, fingerprint=None):
+        """Write the trained model to directory ``path`` (replaced atomically).
+
+        ``fingerprint`` identifies the data it was trained on, see ``load``.
+        """
+        path = os.path.abspath(path)
+        tmp_dir = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        try:
+            os.makedirs(tmp_dir)
+            for name in ('books', 'ratings', 'users'):
+                write_frame(getattr(self, name), os.path.join(tmp_dir, name))
+            write_frame(pd.DataFrame({'ISBN': self._item_isbns}), os.path.join(tmp_dir, 'items'))
+            write_frame(pd.DataFrame({'User-ID': self._user_ids}), os.path.join(tmp_dir, 'user_ids'))
+            tfidf = self._vectorizer()
+            terms = sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get)
+            with open(os.path.join(tmp_dir, 'vocabulary.txt'), 'wb') as fh:
+                fh.write('\x00'.join(terms).encode('utf-8'))
+            arrays = self._model_arrays()
+            for name, arr in arrays.items():
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(arr))
+            _write_json(os.path.join(tmp_dir, MODEL_MANIFEST), {
+                'version': MODEL_VERSION,
+                'fingerprint': fingerprint,
+                'params': {p: getattr(self, p) for p in self.MODEL_PARAMS},
+                'tfidf': {'max_features': tfidf.max_features,
+                          'stop_words': tfidf.stop_words, 'max_df': tfidf.max_df},
+                'n_books': self._n_books,
+                'ui_shape': list(self._ui_csr.shape),
+                'tfidf_shape': list(self._tfidf_mat.shape),
+                'arrays': sorted(arrays),
+            })
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_dir, path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @staticmethod
+    def read_manifest(path):
+        """The bundle's manifest, or None when ``path`` holds no readable bundle."""
+        try:
+            with open(os.path.join(path, MODEL_MANIFEST)) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def load(cls, path, mmap=True, cache=None, metrics=None):
+        """Restore a model written by ``save`` without retraining.
+
+        Raises ValueError for a missing bundle or one from another version.
+        """
+        t0 = time.perf_counter()
+        manifest = cls.read_manifest(path)
+        if manifest is None or manifest.get('version') != MODEL_VERSION:
+            raise ValueError(f"no compatible model bundle (version {MODEL_VERSION}) at {path!r}")
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode)
+                  for name in manifest['arrays']}
+
+        self = cls.__new__(cls)
+        for name, value in manifest['params'].items():
+            setattr(self, name, value)
+        self.books, self.ratings, self.users = (read_frame(os.path.join(path, name), mmap)
+                                                for name in ('books', 'ratings', 'users'))
+        self._store = BookStore(self.books)
+
+        self._n_books    = manifest['n_books']
+        self._item_isbns = read_frame(os.path.join(path, 'items'), mmap)['ISBN'].to_numpy()
+        self._user_ids   = read_frame(os.path.join(path, 'user_ids'), mmap)['User-ID'].to_numpy()
+        first = ~pd.Index(self._item_isbns).duplicated()
+        self._isbn_index = dict(zip(self._item_isbns[first].tolist(), np.flatnonzero(first).tolist()))
+        self._user_index = dict(zip(self._user_ids.tolist(), range(len(self._user_ids))))
+
+        ui_shape, tfidf_shape = manifest['ui_shape'], manifest['tfidf_shape']
+        self._ui_csr    = _csr_from(arrays, 'ui', ui_shape)
+        self._ui_csc    = _csr_from(arrays, 'ui_csc', ui_shape, sparse.csc_matrix)
+        self._liked_csr = _csr_from(arrays, 'liked', ui_shape)
+        self._build_overlap_view()
+
+        self._tfidf = None            # rebuilt by _vectorizer() if ever needed
+        self._tfidf_source = (path, manifest['tfidf'], arrays['idf'])
+        self._tfidf_mat = _csr_from(arrays, 'tfidf', tfidf_shape)
+        self._tfidf_t   = _csr_from(arrays, 'tfidf_t', tfidf_shape[::-1])
+        self._nn_idx, self._nn_sim = arrays['nn_idx'], arrays['nn_sim']
+
+        self._user_factors = arrays.get('user_f')
+        self._item_factors = arrays.get('item_f')
+        self._item_nn_idx, self._item_nn_sim = arrays.get('item_nn_idx'), arrays.get('item_nn_sim')
+        self._item_sim = None
+        self._svd_lock, self._item_lock = threading.Lock(), threading.Lock()
+        self._search_indexes = {}
+        self._pop_index = None        # rebuilt from the saved popularity on first use
+        self._segments  = None        # and the reader segments from users + ratings
+        self._charts = {}
+        self._init_rating_stats()
+        self.cache = ResultCache() if cache is None else cache
+        self.metrics = NULL_METRICS if metrics is None else metrics
+        self.model_version = 0
+        if self.metrics.enabled:
+            self.metrics.observe('build.load', time.perf_counter() - t0)
+        return self
 
     # ── popular ───────────────────────────────────────────────────────────────
-    def popular_books(self, n=10):
-        return self.books.nlargest(n, 'popularity')[
-            ['ISBN','Book-Title','Book-Author','Year-Of-Publication','avg_rating','rating_count','popularity']
-        ].reset_index(drop=True)
+    @_timed('popular_books')
+    def popular_books(self, n=10, decade=None, publisher=None, author=None):
+        """Top ``n`` books by popularity, optionally within one decade, publisher
+        or author. Served from the precomputed ranking, so no per-call sort."""
+        return self._frame(self.popular_results(n, decade, publisher, author), 'popular')
+
+    @_timed('popular_results')
+    def popular_results(self, n=10, decade=None, publisher=None, author=None):
+        """``popular_books`` as Results (scores: popularity)."""
+        given = [(name, value) for name, value in
+                 (('decade', decade), ('publisher', publisher), ('author', author)) if value is not None]
+        if len(given) > 1:
+            raise ValueError("pass at most one of decade / publisher / author")
+        segment, value = given[0] if given else (None, None)
+        return self._cached(('popular', n, segment, value),
+                            lambda: self._popular_result(n, segment, value), ['popular'])
+
+    def _popular_result(self, n, segment=None, value=None):
+        rows = self._popularity_index().top(n, segment, value)
+        return self._results(rows, self._store.values('popularity', rows), 'popularity'), []
+
+    # ── reader segments (cold start) ──────────────────────────────────────────
+    @_timed('segment_books')
+    def segment_books(self, n=10, country=None, age=None):
+        """Top ``n`` books among readers from ``country`` and/or of ``age``.
+
+        The popularity column is the weighted rating computed from those
+        readers' ratings alone. A segment with too few ratings falls back to a
+        wider one and finally to everyone; ``frame.attrs['segment']`` names
+        the one used. Lists are precomputed (see SegmentIndex), so this is a
+        table lookup.
+        """
+        return self._frame(self.segment_results(n, country, age), 'segment')
+
+    @_timed('segment_results')
+    def segment_results(self, n=10, country=None, age=None):
+        """``segment_books`` as Results; ``info['segment']`` names the segment."""
+        return self._segment_results(self._segment_index().find(country, age), n)
+
+    def _segment_of(self, user_id):
+        return int(self._segment_index().segments_of([self._user_key(user_id)])[0])
+
+    def _segment_results(self, seg, n):
+        return self._cached(('segment', n, seg), lambda: self._segment_result(seg, n), ['popular'])
+
+    def _segment_result(self, seg, n):
+        rows, scores = self._segment_rows(seg, n)
+        return self._results(rows, np.round(scores.astype(np.float64), 3), 'popularity',
+                             segment=self._segment_index().describe(seg)), []
+
+    def _segment_rows(self, seg, n):
+        """(catalogue rows, scores) of segment ``seg`` (0 = everyone), padded
+        from the overall ranking when the segment lists fewer than ``n``."""
+        rows, scores = self._segment_index().top(seg, n) if seg else (np.empty(0, np.int64), np.empty(0))
+        if len(rows) < n:
+            extra = self._popularity_index().top(n + len(rows))
+            extra = extra[~np.isin(extra, rows)][:n - len(rows)]
+            rows = np.concatenate([rows, extra])
+            scores = np.concatenate([scores, self._store.values('popularity', extra)])
+        return rows, scores
+
+    # ── hybrid ────────────────────────────────────────────────────────────────
+    @_timed('recommend')
+    def recommend(self, user_id=None, isbn=None, n=10, method='user', weights=None, budgets=None):
+        """Hybrid recommendations for a user, a book, or both (see ``recommend_results``).
+        Columns: the book columns plus score; ``frame.attrs['stages']`` says
+        how each source fared."""
+        return self._frame(self.recommend_results(user_id, isbn, n, method, weights, budgets), 'hybrid')
+
+    @_timed('recommend_results')
+    def recommend_results(self, user_id=None, isbn=None, n=10, method='user', weights=None,
+                          budgets=None):
+        """Hybrid recommendations for a user, a book, or both, as Results.
+
+        Stage one gathers up to ``HYBRID_CANDIDATES`` books from each source:
+        TF-IDF neighbours of ``isbn`` (else of the user's best-rated books),
+        collaborative scores of the user (``method`` as in
+        ``collaborative_recommendations``; for a book alone, its item–item
+        neighbours) and the popularity ranking. Stage two min-max scales each
+        source over its own candidates and ranks by the weighted sum. For a user
+        without ratings the popularity source is their reader segment's list.
+
+        The content and collaborative stages run on a thread pool, each bounded
+        by its budget; a stage that runs late is left out of the blend (and
+        not cached), so the result degrades towards popularity instead of
+        waiting. Lazily fitted models (``method='svd'`` / ``'item'``) are built
+        before the stages start, outside the budgets. ``weights`` / ``budgets``
+        override ``HYBRID_WEIGHTS`` / ``HYBRID_BUDGETS`` per key.
+        ``info['stages']`` says how each source fared.
+        """
+        kind = self._collab_kind(method)
+        weights = {**self.HYBRID_WEIGHTS, **(weights or {})}
+        budgets = {**self.HYBRID_BUDGETS, **(budgets or {})}
+        u = None if user_id is None else self._user_row(user_id)
+        if u is not None and self._ui_csr.indptr[u] == self._ui_csr.indptr[u + 1]:
+            u = None                    # no ratings: nothing to personalise on
+        row = None if isbn is None else self._isbn_index.get(str(isbn))
+        seg = self._segment_of(user_id) if user_id is not None and u is None else 0
+        key = ('hybrid', u, row, n, kind, tuple(sorted(weights.items())), seg)
+        tags = ['popular'] + ([('user', u)] if u is not None else [])   # every blend has a popularity source
+        return self._cached(key, lambda: self._hybrid_result(u, row, n, kind, weights, budgets, seg), tags)
+
+    def _hybrid_result(self, u, row, n, kind, weights, budgets, seg=0):
+        k = self.HYBRID_CANDIDATES
+        seen = self._items_of(u)[0] if u is not None else np.empty(0, np.int32)
+        exclude = np.union1d(seen, [] if row is None else [row]).astype(np.int64)
+
+        stages, found = {}, []          # found: cache tags the stages depended on
+        if weights.get('content') and (row is not None or u is not None):
+            if row is not None:
+                seeds = np.array([row]) if row < self._n_books else np.empty(0, np.int64)
+            else:
+                items, vals = self._items_of(u)
+                inside = items < self._n_books
+                seeds = items[inside][top_n(vals[inside], self.HYBRID_SEEDS)]
+            if len(seeds):
+                stages['content'] = lambda: self._hybrid_content(seeds, k)
+        if weights.get('collaborative'):
+            # lazy models are built here, outside the budget: a build running
+            # in a pool thread would time out and keep going in the background
+            if u is not None:
+                self._prepare_model(kind)
+                stages['collaborative'] = lambda: self._hybrid_collab(kind, u, k + 1, found)
+            elif row is not None:
+                self._prepare_model('item')
+                stages['collaborative'] = lambda: self._hybrid_item(row, k)
+
+        sources, status = {}, {name: 'skipped' for name in ('content', 'collaborative')}
+        start   = time.perf_counter()
+        futures = {name: _stage_pool().submit(self._hybrid_stage, name, fn)
+                   for name, fn in stages.items() if budgets.get(name) is not None}
+        for name, fn in stages.items():
+            try:
+                if name in futures:
+                    left = budgets[name] - (time.perf_counter() - start)
+                    sources[name] = futures[name].result(timeout=max(left, 0))
+                else:
+                    sources[name] = self._hybrid_stage(name, fn)
+                status[name] = 'ok'
+            except FutureTimeout:
+                status[name] = 'timeout'
+                self.metrics.inc('hybrid_timeouts', stage=name)
+
+        with self.metrics.timer('hybrid.blend'):
+            sources['popularity'] = self._segment_rows(seg, k + len(exclude))
+            status['popularity'] = 'ok'
+            rows, scores = _blend(sources, weights, exclude, self._n_books, n)
+        degraded = any(status.get(name) == 'timeout' for name in stages)
+        return (self._results(rows, np.round(scores, 4), 'score', stages=status),
+                None if degraded else rows, found)
+
+    def _hybrid_stage(self, name, fn):
+        with self.metrics.timer(f'hybrid.{name}'):
+            return fn()
+
+    def _hybrid_collab(self, kind, u, k, found):
+        """Collaborative candidates of user row ``u`` (its rated books already
+        left out); a neighbourhood's cache tags are added to ``found``."""
+        if kind != 'collaborative':
+            return self._scorer(kind)(u, k)
+        user_items, weights = self._neighbourhood(u)
+        found.extend(self._neighbourhood_tags(user_items, weights))
+        return self._neighbour_scores(user_items, weights, k)
+
+    def _hybrid_content(self, seeds, k):
+        """TF-IDF neighbours of the seed books, similarities summed per book."""
+        idx, sim = self._content_rows(seeds, k)
+        keep = idx >= 0
+        rows, inverse = np.unique(idx[keep], return_inverse=True)
+        return rows, np.bincount(inverse, weights=sim[keep])
+
+    def _hybrid_item(self, row, k):
+        self._item_index()
+        if row >= len(self._item_nn_idx):
+            return np.empty(0, np.int64), np.empty(0)
+        idx, sim = self._item_nn_idx[row, :k], self._item_nn_sim[row, :k]
+        return idx[idx >= 0], sim[idx >= 0]
+
+    # ── result cache ──────────────────────────────────────────────────────────
+    def _cached(self, key, compute, tags=()):
+        """Memoise ``compute() → (Results, catalogue rows or None[, more tags])``
+        in ``self.cache``.
+
+        Keys carry the model version; entries are tagged with the books they
+        list (their scores go stale when those books are re-rated), plus any
+        tags ``compute`` found it depended on while running.
+        """
+        kind, key = key[0], key + (self.model_version,)
+        results = self.cache.get(key)
+        if results is None:
+            self.metrics.inc('cache_misses', kind=kind)
+            results, rows, *found = compute()
+            if rows is not None:        # None: not to be kept (a degraded hybrid result)
+                self.cache.put(key, results, [*tags, *(found[0] if found else ()),
+                                              *(('book', int(r)) for r in rows)])
+        else:
+            self.metrics.inc('cache_hits', kind=kind)
+        return results
+
+    def _results(self, rows=(), scores=(), label=None, **info):
+        return Results(rows, scores, self._store, label, info)
+
+    def _frame(self, results, kind):
+        """DataFrame form of ``results`` for the older API, timed as ``<kind>.frame``."""
+        with self.metrics.timer(f'{kind}.frame'):
+            return results.to_frame()
 
     # ── search ────────────────────────────────────────────────────────────────
+    SEARCH_FIELDS = {'title': 'Book-Title', 'author': 'Book-Author', 'publisher': 'Publisher'}
+
+    @_timed('search')
     def search(self, query, field='title'):
-        q = query.lower()
-        col_map = {'title': 'Book-Title', 'author': 'Book-Author', 'publisher': 'Publisher'}
-        col = col_map.get(field, 'Book-Title')
-        mask = self.books[col].str.lower().str.contains(q, na=False)
-        return self.books[mask][
-            ['ISBN','Book-Title','Book-Author','Year-Of-Publication','avg_rating','rating_count']
-        ].head(10).reset_index(drop=True)
+        return self._frame(self.search_results(query, field), 'search')
+
+    @_timed('search_results')
+    def search_results(self, query, field='title'):
+        """Books matching ``query`` as Results, most popular first (scores: popularity)."""
+        popularity = self._store.column('popularity')
+        rows = self._search_index(field).search(query, popularity)
+        return self._results(rows, popularity[rows])
+
+    @_timed('suggest')
+    def suggest(self, prefix, field='title', n=10):
+        """Typeahead completions for a partial query, most popular first."""
+        return self._search_index(field).suggest(prefix, self._store.column('popularity'), n)
+
+    def _search_index(self, field):
+        col = self.SEARCH_FIELDS.get(field, 'Book-Title')
+        if col not in self._search_indexes:     # built on first use of each field
+            with self.metrics.timer('build.search_index'):
+                self._search_indexes[col] = SearchIndex(self.books[col])
+        return self._search_indexes[col]
+
+    # ── metrics ───────────────────────────────────────────────────────────────
+    def stats(self):
+        """Timers, counters and result-cache figures as one dict."""
+        return {**self.metrics.stats(), 'cache': self.cache.stats(),
+                'model_version': self.model_version}
+
+    def prometheus(self, prefix='bookrec'):
+        return self.metrics.prometheus(prefix, cache=self.cache)
 
     # ── display ───────────────────────────────────────────────────────────────
     @staticmethod
     def show(df, title="Results"):
+        """Print a Results or a result DataFrame, column-wise (no per-row Series)."""
         print(f"\n🎯 {title}")
         print("="*70)
         if df is None or len(df) == 0:
             print("  No results found."); return
-        for i, row in df.iterrows():
-            yr  = int(row['Year-Of-Publication']) if pd.notna(row.get('Year-Of-Publication')) else 'N/A'
-            avg = f"{row['avg_rating']:.1f}" if pd.notna(row.get('avg_rating')) else 'N/A'
-            cnt = int(row['rating_count']) if pd.notna(row.get('rating_count')) else 0
-            print(f"  {i+1:>2}. 📚 {str(row['Book-Title'])[:50]}")
-            print(f"      👤 {row['Book-Author']}  |  📅 {yr}  |  ⭐ {avg}/10  |  🗳️  {cnt} ratings")
+        names = ('Book-Title', 'Book-Author', 'Year-Of-Publication', 'avg_rating', 'rating_count')
+        if isinstance(df, Results):
+            columns = [df.column(name) for name in names]
+        else:
+            columns = [df[name].to_numpy() if name in df else np.full(len(df), np.nan) for name in names]
+        for i, (book, author, year, avg, cnt) in enumerate(zip(*columns)):
+            yr  = int(year) if pd.notna(year) else 'N/A'
+            avg = f"{avg:.1f}" if pd.notna(avg) else 'N/A'
+            cnt = int(cnt) if pd.notna(cnt) else 0
+            print(f"  {i+1:>2}. 📚 {str(book)[:50]}")
+            print(f"      👤 {author}  |  📅 {yr}  |  ⭐ {avg}/10  |  🗳️  {cnt} ratings")
             print()
 
     # ══════════════════════════════════════════════════════════════════════════
     #  CHARTS
     # ══════════════════════════════════════════════════════════════════════════
+    CHARTS = ('top_books', 'similarity_heatmap', 'rating_vs_count', 'year_trend')
+
+    def chart_data(self, names=None):
+        """{chart name: the small arrays it is drawn from} (see CHARTS), cached
+        until the ratings change."""
+        for name in names or self.CHARTS:
+            if name not in self._charts:
+                self._charts[name] = getattr(self, f'_data_{name}')()
+        return {name: self._charts[name] for name in names or self.CHARTS}
+
+    def _data_top_books(self, n=15):
+        res = self.popular_results(n)
+        return {'titles': np.array([str(t)[:35] for t in res.column('Book-Title')], dtype=object),
+                'popularity': res.scores, 'n': n}
+
+    def _data_similarity_heatmap(self, n=12):
+        counts = self._store.column('rating_count')[:self._n_books]
+        rows = np.argsort(-counts, kind='stable')[:n]    # as books.nlargest(n, 'rating_count')
+        vecs = self._tfidf_mat[rows]
+        return {'sim': (vecs @ vecs.T).toarray(),
+                'labels': [str(t)[:18] for t in self._store.values('Book-Title', rows)]}
+
+    def _data_rating_vs_count(self):
+        counts, avg = self._store.column('rating_count'), self._store.column('avg_rating')
+        keep = (counts >= 3) & (avg > 0)
+        return _rating_vs_count_data(counts[keep], avg[keep])
+
+    def _data_year_trend(self):
+        years, avg = self._store.column('Year-Of-Publication'), self._store.column('avg_rating')
+        keep = (years >= 1950) & (years <= 2024) & (avg > 0)
+        yrs, inverse, count = np.unique(years[keep], return_inverse=True, return_counts=True)
+        return {'years': yrs, 'avg': np.bincount(inverse, weights=avg[keep]) / count, 'count': count}
+
     def plot_top_books(self, n=15):
-        df = self.popular_books(n)
-        fig, ax = plt.subplots(figsize=(12, 7))
-        colors = plt.cm.RdYlGn(np.linspace(0.3, 0.9, n))
-        bars = ax.barh(df['Book-Title'].str[:35][::-1], df['popularity'][::-1],
-                       color=colors, edgecolor='white')
-        for bar, val in zip(bars, df['popularity'][::-1]):
-            ax.text(bar.get_width()+0.002, bar.get_y()+bar.get_height()/2,
-                    f'{val:.3f}', va='center', fontsize=8)
-        ax.set_xlabel('Popularity Score (Weighted Rating)')
-        ax.set_title(f'🏆 Top {n} Books by Popularity', fontsize=13, fontweight='bold')
-        ax.grid(axis='x', linestyle='--', alpha=0.4)
-        plt.tight_layout(); plt.show()
+        show_chart('top_books', self._data_top_books(n))
 
     def plot_similarity_heatmap(self, n=12):
-        df = self._content_books.nlargest(n, 'rating_count').reset_index(drop=True)
-        indices = df.index.tolist()
-        sim = self._sim_matrix[np.ix_(indices, indices)]
-        labels = [t[:18] for t in df['Book-Title'].tolist()]
-
-        fig, ax = plt.subplots(figsize=(11, 9))
-        im = ax.imshow(sim, cmap='YlOrRd', vmin=0, vmax=1)
-        plt.colorbar(im, ax=ax, label='Cosine Similarity')
-        ax.set_xticks(range(n)); ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=7)
-        ax.set_yticks(range(n)); ax.set_yticklabels(labels, fontsize=7)
-        for i in range(n):
-            for j in range(n):
-                ax.text(j, i, f'{sim[i,j]:.2f}', ha='center', va='center', fontsize=6,
-                        color='white' if sim[i,j] > 0.5 else 'black')
-        ax.set_title('🔥 TF-IDF Cosine Similarity Heatmap (Top Books)', fontsize=12, fontweight='bold')
-        plt.tight_layout(); plt.show()
+        show_chart('similarity_heatmap', self._data_similarity_heatmap(n))
 
     def plot_rating_vs_count(self):
-        df = self.books[(self.books['rating_count'] >= 3) & (self.books['avg_rating'] > 0)]
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sc = ax.scatter(df['rating_count'], df['avg_rating'],
-                        alpha=0.4, s=15, c=df['avg_rating'], cmap='RdYlGn', vmin=1, vmax=10)
-        plt.colorbar(sc, ax=ax, label='Avg Rating')
-        ax.set_xlabel('Number of Ratings'); ax.set_ylabel('Average Rating (1–10)')
-        ax.set_title('📈 Avg Rating vs Rating Count', fontsize=13, fontweight='bold')
-        ax.set_xscale('log')
-        ax.grid(linestyle='--', alpha=0.3)
-        plt.tight_layout(); plt.show()
+        show_chart('rating_vs_count', self.chart_data(['rating_vs_count'])['rating_vs_count'])
 
     def plot_year_trend(self):
-        df = self.books[(self.books['Year-Of-Publication'] >= 1950) &
-                        (self.books['Year-Of-Publication'] <= 2024) &
-                        (self.books['avg_rating'] > 0)]
-        yr_avg = df.groupby('Year-Of-Publication')['avg_rating'].mean()
-        yr_cnt = df.groupby('Year-Of-Publication').size()
-
-        fig, ax1 = plt.subplots(figsize=(12, 5))
-        ax2 = ax1.twinx()
-        ax1.plot(yr_avg.index, yr_avg.values, color='#e74c3c', linewidth=2, label='Avg Rating')
-        ax2.bar(yr_cnt.index, yr_cnt.values, alpha=0.3, color='#3498db', label='Book Count')
-        ax1.set_xlabel('Year'); ax1.set_ylabel('Average Rating', color='#e74c3c')
-        ax2.set_ylabel('Books in Dataset', color='#3498db')
-        ax1.set_title('📅 Publication Year Trend (Rating & Volume)', fontsize=13, fontweight='bold')
-        lines1, labels1 = ax1.get_legend_handles_labels()
-        lines2, labels2 = ax2.get_legend_handles_labels()
-        ax1.legend(lines1+lines2, labels1+labels2, loc='upper left')
-        plt.tight_layout(); plt.show()
+        show_chart('year_trend', self.chart_data(['year_trend'])['year_trend'])
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  MAIN MENU
 # ─────────────────────────────────────────────────────────────────────────────
-def main():
-    print_banner()
-
-    loader = DataLoader()
+def cached_recommender(books, ratings, users, loader, metrics=None):
+    """The recommender for the loaded data, reusing the saved bundle when it was
+    trained on the same CSVs with the same settings; otherwise train and save."""
+    path = os.path.join(loader.data_dir, MODEL_DIRNAME)
+    manifest = BookRecommenderSystem.read_manifest(path)
+    params = {p: getattr(BookRecommenderSystem, p) for p in BookRecommenderSystem.MODEL_PARAMS}
+    if (loader.fingerprint and manifest and manifest.get('version') == MODEL_VERSION
+            and manifest.get('fingerprint') == loader.fingerprint
+            and manifest.get('params') == params):
+        try:
+            rec = BookRecommenderSystem.load(path, metrics=metrics)
+            print("⚡ Loaded saved model\n")
+            return rec
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Saved model unreadable ({e}), retraining...")
+
+    rec = BookRecommenderSystem(books, ratings, users, metrics=metrics)
+    if loader.fingerprint:
+        try:
+            rec.save(path, fingerprint=loader.fingerprint)
+        except OSError as e:   # optional, like the snapshot
+            print(f"⚠️  Could not save model: {e}")
+    return rec
+
+
+def print_metrics(rec):
+    timers = rec.metrics.stats()['timers']
+    print("\n⏱️  Operation timings")
+    print(f"   {'operation':<38}{'calls':>7}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, t in timers.items():
+        print(f"   {name:<38}{t['count']:>7}{t['mean_ms']:>10.2f}{t['p95_ms']:>10.2f}{t['max_ms']:>10.2f}")
+    cache = rec.cache.stats()
+    print(f"   result cache: {cache['hits']} hits / {cache['misses']} misses "
+          f"({cache['hit_rate']:.0%}), {cache['entries']} entries")
+
+
+def load_recommender(data_dir=DATA_DIR, use_cache=True, metrics=None):
+    """Library entry point: the recommender for ``data_dir`` without banner,
+    EDA, charts or menu. With a current snapshot and saved model this only
+    memory-maps arrays; see ``STARTUP_PROFILE`` for where the time went.
+    Pass ``metrics=Metrics()`` to instrument the model from the first build."""
+    loader = DataLoader(data_dir, use_cache=use_cache)
+    with _phase('load data'), (metrics or NULL_METRICS).timer('build.data'):
+        books, ratings, users = loader.load()
+    with _phase('load model'):
+        return cached_recommender(books, ratings, users, loader, metrics)
+
+
+def export_all_charts(data_dir=DATA_DIR, out_dir='charts', formats=('png',), workers=0):
+    """Every EDA and recommender chart of ``data_dir`` as files in ``out_dir`` –
+    for scheduled, headless runs. The aggregates come from the cached
+    snapshot, EDA stats and model; see ``export_charts``."""
+    loader = DataLoader(data_dir)
     books, ratings, users = loader.load()
+    eda = cached_eda(books, ratings, users, loader)
+    rec = cached_recommender(books, ratings, users, loader)
+    t0 = time.perf_counter()
+    charts = {**eda.chart_data(), **rec.chart_data()}
+    t1 = time.perf_counter()
+    paths = export_charts(out_dir, charts, formats, workers)
+    print(f"🖼️  {len(paths)} charts → {out_dir}  "
+          f"(aggregates {(t1 - t0) * 1000:.0f} ms, rendering {time.perf_counter() - t1:.1f} s)")
+    return paths
+
+
+def _chart_formats(value):
+    """``--chart-format`` value → list of formats, rejected before anything loads."""
+    formats = [f.strip() for f in value.split(',') if f.strip()]
+    unknown = sorted(set(formats) - set(CHART_FORMATS))
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(
+            f"unknown chart formats {unknown}; expected some of {list(CHART_FORMATS)}")
+    return formats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Advanced Book Recommender")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="folder holding the BX-*.csv files")
+    parser.add_argument('--serve', action='store_true', help="run the HTTP service instead of the menu")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--threads', type=int, default=None,
+                        help="threads running model calls in server mode")
+    parser.add_argument('--no-eda', action='store_true', help="skip the EDA summary at startup")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print where startup time went (imports, data, model)")
+    parser.add_argument('--metrics', action='store_true',
+                        help="record per-operation timings (GET /metrics in server mode)")
+    parser.add_argument('--export-charts', metavar='DIR',
+                        help="render every chart to files in DIR without a display, then exit")
+    parser.add_argument('--chart-format', type=_chart_formats, default='png',
+                        help="comma-separated formats for --export-charts: png, svg")
+    parser.add_argument('--chart-workers', type=int, default=0,
+                        help="processes rendering charts (0 = one per CPU, 1 = in-process)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print_banner()
+    metrics = Metrics() if args.metrics else None
+
+    if args.export_charts:      # non-interactive: charts to files, no menu
+        try:
+            export_all_charts(args.data_dir, args.export_charts, args.chart_format,
+                              args.chart_workers)
+        except ValueError as e:
+            sys.exit(f"❌ {e}")
+        return
+
+    if args.serve:      # non-interactive: no EDA, no menu
+        import server
+        rec = load_recommender(args.data_dir, metrics=metrics)
+        if args.profile_startup:
+            print_startup_profile()
+        server.run(rec, args.host, args.port, args.threads or server.DEFAULT_THREADS)
+        return
+
+    loader = DataLoader(args.data_dir)
+    with _phase('load data'):
+        books, ratings, users = loader.load()
 
     # ── EDA at startup ────────────────────────────────────────────────────────
-    eda = EDA(books, ratings, users)
-    eda.summary()
-
-    print("\n📊 Show EDA charts now? (y/n): ", end='')
-    if input().strip().lower() == 'y':
-        eda.run_all_charts()
+    eda = None
+    if not args.no_eda:
+        with _phase('eda summary'):
+            eda = cached_eda(books, ratings, users, loader)
+            eda.summary()
+
+        print("\n📊 Show EDA charts now? (y/n): ", end='')
+        if input().strip().lower() == 'y':
+            eda.run_all_charts()
 
-    rec = BookRecommenderSystem(books, ratings, users)
+    with _phase('load model'):
+        rec = cached_recommender(books, ratings, users, loader, metrics)
+    if args.profile_startup:
+        print_startup_profile()
 
     while True:
         print("\n" + "="*62)
@@ -403,22 +3362,23 @@ def main():
         print("  2.  🎯  Content-Based Recommendations (by ISBN)")
         print("  3.  👥  Collaborative Recommendations (by User-ID)")
         print("  4.  🏆  Popular Books")
+        print("  5.  ⭐  Hybrid Recommendations (User-ID and/or ISBN)")
         print("─"*62)
-        print("  5.  📊  [CHART] Top Books by Popularity")
-        print("  6.  📊  [CHART] Similarity Heatmap")
-        print("  7.  📊  [CHART] Avg Rating vs Rating Count")
-        print("  8.  📊  [CHART] Year Trend (Rating & Volume)")
-        print("  9.  📊  [CHART] Re-run EDA Charts")
+        print("  6.  📊  [CHART] Top Books by Popularity")
+        print("  7.  📊  [CHART] Similarity Heatmap")
+        print("  8.  📊  [CHART] Avg Rating vs Rating Count")
+        print("  9.  📊  [CHART] Year Trend (Rating & Volume)")
+        print(" 10.  📊  [CHART] Re-run EDA Charts")
         print("─"*62)
-        print(" 10.  ❌  Exit")
+        print(" 11.  ❌  Exit")
         print("="*62)
 
-        choice = input("\n🎯 Choice (1-10): ").strip()
+        choice = input("\n🎯 Choice (1-11): ").strip()
 
         if choice == '1':
             q  = input("🔍 Query: ").strip()
             ft = input("Field (title/author/publisher) [title]: ").strip() or 'title'
-            rec.show(rec.search(q, ft), f"Search: '{q}'")
+            rec.show(rec.search_results(q, ft), f"Search: '{q}'")
 
         elif choice == '2':
             isbn = input("📚 Enter ISBN: ").strip()
@@ -429,33 +3389,41 @@ def main():
             else:
                 row = bk.iloc[0]
                 print(f"\n  📖 {row['Book-Title']}  by  {row['Book-Author']}")
-                rec.show(rec.content_recommendations(isbn), "Content-Based Recommendations")
+                rec.show(rec.content_results(isbn), "Content-Based Recommendations")
 
         elif choice == '3':
             uid = input("👤 User-ID: ").strip()
-            rec.show(rec.collaborative_recommendations(uid), f"Recommendations for User {uid}")
+            rec.show(rec.collaborative_results(uid), f"Recommendations for User {uid}")
 
         elif choice == '4':
             n = input("How many? [10]: ").strip()
             n = int(n) if n.isdigit() else 10
-            rec.show(rec.popular_books(n), f"Top {n} Popular Books")
+            rec.show(rec.popular_results(n), f"Top {n} Popular Books")
 
         elif choice == '5':
-            rec.plot_top_books()
+            uid  = input("👤 User-ID (optional): ").strip() or None
+            isbn = input("📚 ISBN (optional): ").strip() or None
+            rec.show(rec.recommend_results(uid, isbn), "Hybrid Recommendations")
 
         elif choice == '6':
-            rec.plot_similarity_heatmap()
+            rec.plot_top_books()
 
         elif choice == '7':
-            rec.plot_rating_vs_count()
+            rec.plot_similarity_heatmap()
 
         elif choice == '8':
-            rec.plot_year_trend()
+            rec.plot_rating_vs_count()
 
         elif choice == '9':
-            eda.run_all_charts()
+            rec.plot_year_trend()
 
         elif choice == '10':
+            eda = eda or cached_eda(books, ratings, users, loader)
+            eda.run_all_charts()
+
+        elif choice == '11':
+            if metrics is not None:
+                print_metrics(rec)
             print("\n📚 Goodbye!")
             break
 
@@ -465,5 +3433,7 @@ def main():
         input("\n⏸️  Press Enter to continue...")
 
 
+STARTUP_PROFILE['import main'] = time.perf_counter() - _IMPORT_START
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,380 @@
+"""
+HTTP service for the Book Recommender
+Run     : python src/main.py --serve [--host 0.0.0.0] [--port 8000] [--threads 4]
+
+One preloaded BookRecommenderSystem answers every request. The endpoints are a
+plain ASGI app (``RecommenderApp``), so any ASGI server can host them, e.g.
+``uvicorn server:app``; ``serve`` runs them on the small built-in asyncio
+HTTP/1.1 server below, so the container needs nothing extra.
+
+    GET /search?q=potter&field=title
+    GET /suggest?q=harry+po&field=title&n=10
+    GET /content?isbn=0439139597&n=5
+    GET /similar?isbn=0439139597&n=5       (readers also liked)
+    GET /collaborative?user_id=276725&n=5&method=user|item|svd
+    GET /recommend?user_id=276725&isbn=0439139597&n=10   (hybrid; either id optional)
+    GET /popular?n=10[&decade=1990 | &publisher=... | &author=...]
+    GET /segment?country=usa&age=30&n=10   (popular with these readers; either optional)
+    GET /health
+    GET /metrics                          (Prometheus text; --metrics / BOOK_METRICS=1)
+
+With metrics on, any endpoint also takes ``profile=cprofile`` or
+``profile=tracemalloc`` and returns that one call's report under "profile".
+
+Bad parameters answer 400 and unknown ISBNs / User-IDs 404 (a known reader
+without ratings gets their segment's list); anything else that goes wrong in
+a model call is logged and answers 500.
+"""
+
+import os, sys, json, asyncio, traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote
+
+DEFAULT_HOST    = '127.0.0.1'
+DEFAULT_PORT    = 8000
+DEFAULT_THREADS = min(4, os.cpu_count() or 1)
+MAX_PENDING     = 256       # queued + running model calls before answering 503
+MAX_N           = 100       # largest n a client may ask for
+MAX_HEADER_BYTES = 16384
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+
+
+class BadRequest(Exception):
+    pass
+
+
+class NotFound(Exception):
+    pass
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  ENDPOINTS  (blocking model calls → JSON bytes, run on the thread pool)
+# ─────────────────────────────────────────────────────────────────────────────
+def _int_arg(params, name, default):
+    raw = params.get(name, default)
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise BadRequest(f"{name} must be an integer")
+    if not 1 <= value <= MAX_N:
+        raise BadRequest(f"{name} must be between 1 and {MAX_N}")
+    return value
+
+
+def _required(params, name):
+    value = params.get(name, '').strip()
+    if not value:
+        raise BadRequest(f"missing query parameter {name!r}")
+    return value
+
+
+def _search(rec, params):
+    return {'results': rec.search_results(_required(params, 'q'), params.get('field', 'title')).to_dicts()}
+
+
+def _suggest(rec, params):
+    return {'suggestions': rec.suggest(params.get('q', ''), params.get('field', 'title'),
+                                       _int_arg(params, 'n', 10))}
+
+
+def _known_isbn(rec, isbn):
+    if isbn not in rec._isbn_index:
+        raise NotFound(f"unknown ISBN {isbn!r}")
+    return isbn
+
+
+def _known_user(rec, user_id):
+    if not rec.knows_user(user_id):
+        raise NotFound(f"unknown user {user_id!r}")
+    return user_id
+
+
+def _method(rec, params):
+    method = params.get('method', 'user')
+    if method not in rec.COLLAB_METHODS:
+        raise BadRequest(f"unknown method {method!r}; expected one of {sorted(rec.COLLAB_METHODS)}")
+    return method
+
+
+def _content(rec, params):
+    isbn = _known_isbn(rec, _required(params, 'isbn'))
+    return {'isbn': isbn, 'results': rec.content_results(isbn, _int_arg(params, 'n', 5)).to_dicts()}
+
+
+def _similar(rec, params):
+    isbn = _known_isbn(rec, _required(params, 'isbn'))
+    return {'isbn': isbn, 'results': rec.similar_results(isbn, _int_arg(params, 'n', 5)).to_dicts()}
+
+
+def _collaborative(rec, params):
+    user_id = _known_user(rec, _required(params, 'user_id'))
+    res = rec.collaborative_results(user_id, _int_arg(params, 'n', 5), method=_method(rec, params))
+    cold = {'segment': res.info['segment']} if 'segment' in res.info else {}
+    return {'user_id': user_id, **cold, 'results': res.to_dicts()}
+
+
+def _recommend(rec, params):
+    user_id = params.get('user_id', '').strip() or None
+    isbn    = params.get('isbn', '').strip() or None
+    if user_id is not None:
+        _known_user(rec, user_id)
+    if isbn is not None:
+        _known_isbn(rec, isbn)
+    res = rec.recommend_results(user_id, isbn, _int_arg(params, 'n', 10), method=_method(rec, params))
+    return {'user_id': user_id, 'isbn': isbn, 'stages': res.info.get('stages', {}),
+            'results': res.to_dicts()}
+
+
+def _popular(rec, params):
+    segment = {name: params[name] for name in ('decade', 'publisher', 'author') if params.get(name)}
+    if len(segment) > 1:
+        raise BadRequest("pass at most one of decade / publisher / author")
+    if 'decade' in segment:
+        try:
+            segment['decade'] = int(segment['decade'])
+        except ValueError:
+            raise BadRequest("decade must be a year such as 1990")
+    res = rec.popular_results(_int_arg(params, 'n', 10), **segment)
+    return {**segment, 'results': res.to_dicts()}
+
+
+def _segment(rec, params):
+    country = params.get('country', '').strip() or None
+    age = params.get('age', '').strip() or None
+    if age is not None:
+        try:
+            age = int(age)
+        except ValueError:
+            raise BadRequest("age must be a whole number of years")
+    res = rec.segment_results(_int_arg(params, 'n', 10), country=country, age=age)
+    return {'segment': res.info.get('segment', {}), 'results': res.to_dicts()}
+
+
+ENDPOINTS = {
+    '/search':        _search,
+    '/suggest':       _suggest,
+    '/content':       _content,
+    '/similar':       _similar,
+    '/collaborative': _collaborative,
+    '/recommend':     _recommend,
+    '/popular':       _popular,
+    '/segment':       _segment,
+}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  ASGI APP
+# ─────────────────────────────────────────────────────────────────────────────
+class RecommenderApp:
+    """ASGI application around one shared recommender.
+
+    Model calls run on a bounded thread pool (NumPy/SciPy release the GIL for
+    the heavy parts), concurrent identical requests share one computation,
+    and more than ``max_pending`` outstanding calls are turned away with 503
+    instead of queueing without limit.
+    """
+
+    def __init__(self, rec, threads=DEFAULT_THREADS, max_pending=MAX_PENDING):
+        self.rec = rec
+        self.threads = threads
+        self.max_pending = max_pending
+        self._pool = None
+        self._inflight = {}             # request key → future of the JSON body
+        self.stats = {'requests': 0, 'coalesced': 0, 'rejected': 0, 'errors': 0}
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.threads,
+                                            thread_name_prefix='recommender')
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _call(self, path, handler, params):
+        """Runs on a pool thread: model call + JSON encoding → (status, body)."""
+        try:
+            with self.rec.metrics.timer(f'http{path}'):
+                mode = params.pop('profile', None)
+                if mode and self.rec.metrics.enabled:
+                    if mode not in PROFILE_MODES:
+                        raise BadRequest(f"unknown profile mode {mode!r}; expected one of {list(PROFILE_MODES)}")
+                    from main import profile_call
+                    body, report = profile_call(handler, self.rec, params, mode=mode)
+                    body['profile'] = report
+                else:
+                    body = handler(self.rec, params)
+                return 200, json.dumps(body).encode()
+        except BadRequest as e:
+            return 400, json.dumps({'error': str(e)}).encode()
+        except NotFound as e:
+            return 404, json.dumps({'error': str(e)}).encode()
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"❌ {path} failed:", file=sys.stderr)
+            traceback.print_exc()
+            return 500, json.dumps({'error': f"{type(e).__name__}: {e}"}).encode()
+
+    async def handle(self, method, path, query):
+        """Route one request → (status, JSON body)."""
+        self.stats['requests'] += 1
+        if path == '/health':
+            return 200, json.dumps({'status': 'ok', 'books': len(self.rec.books),
+                                    'inflight': len(self._inflight), **self.stats,
+                                    'cache': self.rec.cache.stats()}).encode()
+        if path == '/metrics':
+            if not self.rec.metrics.enabled:
+                return 404, json.dumps({'error': 'metrics are off (start with --metrics)'}).encode()
+            return 200, self.rec.prometheus().encode()
+        handler = ENDPOINTS.get(path)
+        if handler is None:
+            return 404, json.dumps({'error': f"no endpoint {path!r}"}).encode()
+        if method not in ('GET', 'HEAD'):
+            return 405, json.dumps({'error': 'only GET is supported'}).encode()
+
+        params = {k: v[-1] for k, v in parse_qs(query, keep_blank_values=True).items()}
+        key = (path, tuple(sorted(params.items())))
+        future = self._inflight.get(key)
+        if future is not None:          # identical request already running: share it
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future)
+        if len(self._inflight) >= self.max_pending:
+            self.stats['rejected'] += 1
+            return 503, json.dumps({'error': 'server busy, retry later'}).encode()
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor(), self._call, path, handler, params)
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    self.close()
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+        status, body = await self.handle(scope['method'], scope['path'],
+                                         scope.get('query_string', b'').decode('latin-1'))
+        ctype = (b'text/plain; version=0.0.4' if scope['path'] == '/metrics' and status == 200
+                 else b'application/json')
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', ctype),
+                                (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body',
+                    'body': b'' if scope['method'] == 'HEAD' else body})
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  BUILT-IN HTTP/1.1 SERVER  (keep-alive, GET only, drives the ASGI app)
+# ─────────────────────────────────────────────────────────────────────────────
+async def _handle_connection(app, reader, writer):
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            lines = head.decode('latin-1').split('\r\n')
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                if name:
+                    headers[name.strip().lower()] = value.strip()
+            try:
+                method, target, version = lines[0].split(' ', 2)
+                length = int(headers.get('content-length', 0) or 0)
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                writer.write(b'HTTP/1.1 400 Bad Request\r\ncontent-length: 0\r\nconnection: close\r\n\r\n')
+                break
+            if length:                  # bodies are not used, but must be consumed
+                await reader.readexactly(length)
+
+            path, _, query = target.partition('?')
+            scope = {'type': 'http', 'method': method.upper(), 'path': unquote(path),
+                     'query_string': query.encode('latin-1'), 'http_version': version[5:],
+                     'headers': [(k.encode(), v.encode()) for k, v in headers.items()]}
+            keep_alive = (headers.get('connection', '').lower() != 'close'
+                          and version.upper() == 'HTTP/1.1')
+            response = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                response.append(message)
+
+            await app(scope, receive, send)
+            start, body = response[0], b''.join(m.get('body', b'') for m in response[1:])
+            status = start['status']
+            head_lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+            head_lines += [f"{k.decode()}: {v.decode()}" for k, v in start['headers']]
+            head_lines.append('connection: ' + ('keep-alive' if keep_alive else 'close'))
+            writer.write(('\r\n'.join(head_lines) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def serve(rec, host=DEFAULT_HOST, port=DEFAULT_PORT, threads=DEFAULT_THREADS, ready=None):
+    """Serve ``rec`` over HTTP until cancelled. ``ready`` (an asyncio.Event) is
+    set once the socket is listening, which lets tests start on port 0."""
+    app = RecommenderApp(rec, threads=threads)
+    server = await asyncio.start_server(lambda r, w: _handle_connection(app, r, w),
+                                        host, port, limit=MAX_HEADER_BYTES)
+    sock = server.sockets[0].getsockname()
+    print(f"🌐 Serving on http://{sock[0]}:{sock[1]}  ({threads} model threads)")
+    if ready is not None:
+        ready.port = sock[1]
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        app.close()
+
+
+def run(rec, host=DEFAULT_HOST, port=DEFAULT_PORT, threads=DEFAULT_THREADS):
+    try:
+        asyncio.run(serve(rec, host, port, threads))
+    except KeyboardInterrupt:
+        print("\n📚 Server stopped.")
+
+
+def load_app(data_dir=None, threads=DEFAULT_THREADS, metrics=False):
+    """ASGI app over the (cached) model for the dataset in ``data_dir``."""
+    from main import DATA_DIR, Metrics, load_recommender
+    rec = load_recommender(data_dir or DATA_DIR, metrics=Metrics() if metrics else None)
+    return RecommenderApp(rec, threads=threads)
+
+
+def __getattr__(name):
+    # ``uvicorn server:app`` – the model is loaded on first access only
+    if name == 'app':
+        globals()['app'] = load_app(os.environ.get('BOOK_DATA_DIR'),
+                                    metrics=os.environ.get('BOOK_METRICS') == '1')
+        return globals()['app']
+    raise AttributeError(name)
+
+
+if __name__ == '__main__':
+    from main import main
+    sys.argv.insert(1, '--serve')
+    main()
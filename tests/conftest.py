@@ -0,0 +1,18 @@
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+
+from main import DataLoader, BookRecommenderSystem
+
+
+@pytest.fixture(scope='session')
+def frames():
+    """(books, ratings, users) of the bundled sample dataset."""
+    return DataLoader().load()
+
+
+@pytest.fixture(scope='session')
+def rec(frames):
+    """One recommender over the sample, shared by tests that only query it."""
+    return BookRecommenderSystem(*frames)
@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.mark.parametrize('method', ['user', 'item', 'svd'])
+def test_empty_collaborative_batch(rec, method):
+    frame = rec.batch_collaborative_recommendations([], 3, method=method)
+    assert frame.empty
+    assert list(frame.columns) == ['User-ID', 'rank', 'ISBN', 'score']
+
+
+def test_empty_content_batch(rec):
+    frame = rec.batch_content_recommendations([], 3)
+    assert frame.empty
+    assert list(frame.columns) == ['query_ISBN', 'rank', 'ISBN', 'score']
+
+
+@pytest.mark.parametrize('method', ['user', 'item', 'svd'])
+def test_batch_matches_single_user(rec, method):
+    user_ids = rec._user_ids[:60].tolist()
+    frame = rec.batch_collaborative_recommendations(user_ids, 5, block_size=16, method=method)
+    for uid in user_ids:
+        single = rec.collaborative_results(uid, 5, method=method)
+        batch = frame[frame['User-ID'] == uid]
+        assert batch['ISBN'].tolist() == single.column('ISBN').tolist(), f"user {uid}"
@@ -0,0 +1,18 @@
+import pytest
+
+import main
+
+
+def test_chart_format_parsed():
+    assert main.parse_args([]).chart_format == ['png']
+    assert main.parse_args(['--chart-format', 'svg, png']).chart_format == ['svg', 'png']
+
+
+@pytest.mark.parametrize('value', ['jpg', 'png,gif', ','])
+def test_bad_chart_format_rejected_before_loading(value, monkeypatch):
+    def load(*args, **kwargs):
+        raise AssertionError("data loaded before --chart-format was checked")
+    monkeypatch.setattr(main, 'export_all_charts', load)
+    with pytest.raises(SystemExit) as exc:
+        main.main(['--export-charts', 'out', '--chart-format', value])
+    assert exc.value.code == 2
@@ -0,0 +1,36 @@
+from math import log2
+
+import numpy as np
+import pytest
+
+from evaluate import ranking_metrics, coverage
+
+
+def test_ranking_metrics_known_answer():
+    # k = 3. User A hits at ranks 1 and 3 with 2 relevant books; user B at
+    # rank 2 with 4 relevant (more than k); user C's list is one book, a miss.
+    relevant = np.array([[True, False, True, False],        # column 4 is past k
+                         [False, True, False, True],
+                         [False, False, False, False]])
+    n_relevant = np.array([2, 4, 1])
+    got = ranking_metrics(relevant, n_relevant, 3)
+
+    ndcg_a = (1 / log2(2) + 1 / log2(4)) / (1 / log2(2) + 1 / log2(3))
+    ndcg_b = (1 / log2(3)) / (1 / log2(2) + 1 / log2(3) + 1 / log2(4))
+    ap_a = (1 / 1 + 2 / 3) / 2
+    ap_b = (1 / 2) / 3                                       # AP is normalised by min(n_relevant, k)
+    assert got['precision'] == pytest.approx((2 / 3 + 1 / 3 + 0) / 3)
+    assert got['recall']    == pytest.approx((2 / 2 + 1 / 4 + 0) / 3)
+    assert got['ndcg']      == pytest.approx((ndcg_a + ndcg_b + 0) / 3)
+    assert got['map']       == pytest.approx((ap_a + ap_b + 0) / 3)
+
+
+def test_perfect_list_scores_one():
+    got = ranking_metrics(np.ones((2, 5), dtype=bool), np.array([5, 5]), 5)
+    assert got == pytest.approx({'precision': 1, 'recall': 1, 'ndcg': 1, 'map': 1})
+
+
+def test_coverage():
+    recs = np.array([[0, 1, -1], [1, 2, -1]])               # -1 pads short lists
+    assert coverage(recs, 10) == pytest.approx(0.3)
+    assert coverage(np.full((2, 3), -1), 10) == 0
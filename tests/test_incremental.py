@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from main import BookRecommenderSystem
+
+STAT_COLUMNS = ['avg_rating', 'rating_count', 'popularity']
+INLINE = {'content': None, 'collaborative': None}      # hybrid stages without a budget
+
+
+def _rated(rec):
+    """(User-ID, ISBN, rating) triples held in the rating matrix."""
+    coo = rec._ui_csr.tocoo()
+    return set(zip(rec._user_ids[coo.row].tolist(), rec._item_isbns[coo.col].tolist(),
+                   coo.data.tolist()))
+
+
+def assert_same_model(rec, ref, user_ids):
+    """``rec`` (updated in place) answers like ``ref`` (built from scratch)."""
+    assert np.array_equal(rec.books[STAT_COLUMNS].fillna(-1).to_numpy(float),
+                          ref.books[STAT_COLUMNS].fillna(-1).to_numpy(float))
+    assert _rated(rec) == _rated(ref)
+    assert rec.popular_results(20).rows.tolist() == ref.popular_results(20).rows.tolist()
+
+    seg, fresh = rec._segment_index(), ref._segment_index()
+    for s in range(seg._n_segments):
+        rows, scores = seg.top(s, seg.TOP_N)
+        ref_rows, ref_scores = fresh.top(s, fresh.TOP_N)
+        assert rows.tolist() == ref_rows.tolist(), f"segment {seg.describe(s)}"
+        assert np.allclose(scores, ref_scores)
+
+    for uid in user_ids:        # served from the cache where it is still valid
+        assert rec.collaborative_recommendations(uid, 5).equals(
+            ref.collaborative_recommendations(uid, 5)), f"user {uid}"
+        assert rec.recommend_results(uid, budgets=INLINE).rows.tolist() == \
+            ref.recommend_results(uid, budgets=INLINE).rows.tolist(), f"user {uid}"
+
+
+def test_add_then_remove_matches_rebuild(frames):
+    books, ratings, users = frames
+    rec = BookRecommenderSystem(books, ratings, users)
+    user_ids = rec._user_ids[:100].tolist()
+    for uid in user_ids:        # warm the cache so stale entries would show
+        rec.collaborative_recommendations(uid, 5)
+        rec.recommend_results(uid, budgets=INLINE)
+    rec.popular_results(20)
+
+    rng = np.random.default_rng(0)
+    isbns = books['ISBN'].astype(str).to_numpy()
+    k = max(20, len(ratings) // 200)
+    rerated = ratings.sample(10, random_state=1)[['User-ID', 'ISBN']].assign(**{'Book-Rating': 1})
+    added = pd.concat([
+        pd.DataFrame({'User-ID': rng.choice(rec._user_ids, k), 'ISBN': rng.choice(isbns, k),
+                      'Book-Rating': rng.integers(1, 11, k)}),
+        rerated,
+    ], ignore_index=True)
+    assert rec.add_ratings(added) > 0
+    ratings = pd.concat([ratings, added], ignore_index=True)
+    ratings = ratings.drop_duplicates(['User-ID', 'ISBN'], keep='last')
+    assert_same_model(rec, BookRecommenderSystem(books, ratings, users), user_ids)
+
+    removed = ratings.sample(min(300, len(ratings) // 5), random_state=2)[['User-ID', 'ISBN']]
+    assert rec.remove_ratings(removed) == len(removed)
+    key = lambda df: df['User-ID'].astype(str) + '|' + df['ISBN'].astype(str)
+    ratings = ratings[~key(ratings).isin(set(key(removed)))]
+    assert_same_model(rec, BookRecommenderSystem(books, ratings, users), user_ids)
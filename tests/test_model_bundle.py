@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from main import BookRecommenderSystem
+
+METHODS = ('user', 'item', 'svd')
+
+
+def answers(rec, user_ids, isbns):
+    """Every query kind as plain lists, for comparing two models."""
+    out = {}
+    for uid in user_ids:
+        for method in METHODS:
+            res = rec.collaborative_results(uid, 5, method=method)
+            out[('collaborative', method, uid)] = (res.rows.tolist(), np.round(res.scores, 4).tolist())
+    for isbn in isbns:
+        for kind, fn in (('content', rec.content_results), ('similar', rec.similar_results)):
+            res = fn(isbn, 5)
+            out[(kind, isbn)] = (res.rows.tolist(), np.round(res.scores, 4).tolist())
+    for query in ('the', 'har', 'a', 'zzzz'):
+        out[('search', query)] = rec.search_results(query).rows.tolist()
+    out['popular'] = rec.popular_results(10).rows.tolist()
+    return out
+
+
+def test_save_load_round_trip(frames, tmp_path):
+    books, ratings, users = frames
+    rec = BookRecommenderSystem(books, ratings, users)
+    user_ids = rec._user_ids[:40].tolist()
+    isbns = books['ISBN'].astype(str).iloc[:20].tolist()
+    before = answers(rec, user_ids, isbns)          # also fits the lazy svd / item models
+
+    rec.save(tmp_path / 'model')
+    loaded = BookRecommenderSystem.load(tmp_path / 'model', mmap=True)
+    assert answers(loaded, user_ids, isbns) == before
+
+    # the memory-mapped arrays are read-only: updates must copy, not write into them
+    added = pd.DataFrame({'User-ID': [user_ids[0], user_ids[1], 987654321],
+                          'ISBN': [isbns[3], isbns[4], isbns[5]], 'Book-Rating': [10, 9, 8]})
+    assert loaded.add_ratings(added) == rec.add_ratings(added) == 3
+    assert answers(loaded, user_ids + [987654321], isbns) == answers(rec, user_ids + [987654321], isbns)
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from main import (BookRecommenderSystem, PopularityIndex, SegmentIndex, AGE_LABELS,
+                  _countries, _age_buckets, _segment_popularity, top_n)
+
+SEGMENTS = {'decade': 'Year-Of-Publication', 'publisher': 'Publisher', 'author': 'Book-Author'}
+
+
+def expected_top(books, n, segment=None, value=None):
+    """``nlargest`` order (ties by row), NaN popularity last."""
+    if segment == 'decade':
+        books = books[books[SEGMENTS[segment]] // 10 * 10 == value // 10 * 10]
+    elif segment is not None:
+        books = books[books[SEGMENTS[segment]] == value]
+    rated = books.dropna(subset=['popularity']).nlargest(len(books), 'popularity').index
+    unrated = books.index[books['popularity'].isna()]
+    return np.concatenate([rated, unrated])[:n]
+
+
+def synthetic_books(rng, size=3000):
+    popularity = np.round(rng.integers(0, 40, size) / 4, 3)     # many ties
+    popularity[rng.random(size) < 0.1] = np.nan
+    return pd.DataFrame({
+        'popularity': popularity,
+        'Year-Of-Publication': rng.integers(1950, 2010, size),
+        'Publisher': pd.Categorical(rng.choice(['Penguin', 'Tor', 'Knopf', None], size)),
+        'Book-Author': rng.choice(['Ann', 'Bob', 'Cyd'], size).astype(object),
+    })
+
+
+def assert_index_matches(index, books):
+    for n in (0, 1, 10, len(books) + 5):
+        assert index.top(n).tolist() == expected_top(books, n).tolist()
+    for segment, value in [('decade', 1987), ('publisher', 'Tor'), ('author', 'Cyd'),
+                           ('publisher', 'Nobody')]:
+        assert index.top(25, segment, value).tolist() == \
+            expected_top(books, 25, segment, value).tolist(), (segment, value)
+
+
+@pytest.mark.parametrize('share', [0.01, 0.9])        # merge path / full re-sort
+def test_popularity_index_matches_nlargest(share):
+    rng = np.random.default_rng(0)
+    books = synthetic_books(rng)
+    index = PopularityIndex(books)
+    for segment in SEGMENTS:                          # build every ranking before updating
+        index.top(1, segment, books[SEGMENTS[segment]].dropna().iloc[0])
+    assert_index_matches(index, books)
+
+    moved = rng.random(len(books)) < share
+    books.loc[moved, 'popularity'] = np.round(rng.integers(0, 40, moved.sum()) / 4, 3)
+    index.update(books['popularity'].to_numpy())
+    assert_index_matches(index, books)
+
+
+def test_popular_results_follow_add_ratings(frames):
+    books, ratings, users = frames
+    rec = BookRecommenderSystem(books, ratings, users)
+    assert rec.popular_results(10).rows.tolist() == expected_top(rec.books, 10).tolist()
+
+    last = rec.popular_results(len(rec.books)).rows[-1]      # least popular book → top
+    raters = rec._user_ids[:40]
+    rec.add_ratings(pd.DataFrame({'User-ID': raters, 'ISBN': rec.books['ISBN'].iloc[last],
+                                  'Book-Rating': 10}))
+    assert rec.popular_results(10).rows[0] == last
+    assert rec.popular_results(10).rows.tolist() == expected_top(rec.books, 10).tolist()
+    decade = int(rec.books['Year-Of-Publication'].iloc[last])
+    assert rec.popular_results(10, decade=decade).rows.tolist() == \
+        expected_top(rec.books, 10, 'decade', decade).tolist()
+
+
+def brute_segments(rec):
+    """Segment id → (rows, scores) recomputed from the rating matrix."""
+    users = rec.users[~rec.users['User-ID'].duplicated()]
+    country, names = _countries(users['Location'])
+    age = _age_buckets(users['Age'])
+    coo = rec._ui_csr.tocoo()
+    inside = coo.col < rec._n_books
+    pos = pd.Index(users['User-ID']).get_indexer(rec._user_ids[coo.row[inside]])
+    frame = pd.DataFrame({'country': np.where(pos >= 0, country[pos], -1),
+                          'age': np.where(pos >= 0, age[pos], -1),
+                          'item': coo.col[inside], 'rating': coo.data[inside].astype(np.float64)})
+    width, out = len(AGE_LABELS) + 1, {}
+    for c in range(-1, len(names)):
+        for a in range(-1, len(AGE_LABELS)):
+            if c < 0 and a < 0:
+                continue
+            sel = frame[((frame['country'] == c) | (c < 0)) & ((frame['age'] == a) | (a < 0))]
+            stats = sel.groupby('item')['rating'].agg(['sum', 'count'])
+            if stats.empty:
+                out[(c + 1) * width + a + 1] = ([], [])
+                continue
+            pop = _segment_popularity(stats['sum'].to_numpy(), stats['count'].to_numpy(np.float64))
+            best = top_n(pop, SegmentIndex.TOP_N)
+            out[(c + 1) * width + a + 1] = (stats.index.to_numpy()[best].tolist(), pop[best])
+    return out
+
+
+def assert_segments_match(rec):
+    index = rec._segment_index()
+    for seg, (rows, scores) in brute_segments(rec).items():
+        got_rows, got_scores = index.top(seg, SegmentIndex.TOP_N)
+        assert got_rows.tolist() == rows, index.describe(seg)
+        assert np.allclose(got_scores, scores)
+
+
+def test_segment_index_matches_brute_force(frames):
+    books, ratings, users = frames
+    rec = BookRecommenderSystem(books, ratings, users)
+    assert_segments_match(rec)
+
+    rng = np.random.default_rng(1)
+    added = pd.DataFrame({'User-ID': rng.choice(users['User-ID'], 200),
+                          'ISBN': rng.choice(books['ISBN'].astype(str), 200),
+                          'Book-Rating': rng.integers(1, 11, 200)})
+    rec.add_ratings(added)
+    assert_segments_match(rec)
+    rec.remove_ratings(added.iloc[:80])
+    assert_segments_match(rec)
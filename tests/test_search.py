@@ -0,0 +1,61 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from main import SearchIndex
+
+
+def assert_same_hits(got, matches, popularity, limit=10):
+    """``got`` is a top-``limit`` of ``matches`` by popularity (ties in any order)."""
+    got, matches = np.asarray(got), np.flatnonzero(matches)
+    assert set(got) <= set(matches)
+    assert len(got) == min(limit, len(matches))
+    assert np.array_equal(np.sort(popularity[got])[::-1],
+                          np.sort(popularity[matches])[::-1][:len(got)])
+
+
+@pytest.mark.parametrize('field, column', [('title', 'Book-Title'), ('author', 'Book-Author'),
+                                           ('publisher', 'Publisher')])
+@pytest.mark.parametrize('query', ['the', 'THE', 'har', 'mummies', "god's", 'if?:', 'e. j.',
+                                   '  the  ', 'zzzz'])
+def test_substring_matches_str_contains(rec, field, column, query):
+    popularity = rec.books['popularity'].to_numpy()
+    text = rec.books[column].astype(str)
+    matches = text.str.contains(query.strip(), case=False, regex=False).to_numpy()
+    assert_same_hits(rec.search_results(query, field).rows, matches, popularity)
+
+
+@pytest.mark.parametrize('query', ['t', 'Th', 'cl', ' w ', 'x'])
+def test_short_queries_match_word_prefixes(rec, query):
+    popularity = rec.books['popularity'].to_numpy()
+    pattern = r'\b' + re.escape(query.strip())
+    matches = rec.books['Book-Title'].astype(str).str.contains(pattern, case=False).to_numpy()
+    assert_same_hits(rec.search_results(query).rows, matches, popularity)
+
+
+@pytest.mark.parametrize('query', ['', '   ', '\t\n', '?!'])
+def test_blank_queries_match_nothing(rec, query):
+    assert len(rec.search_results(query).rows) == 0
+
+
+TITLES = ['Café Society', 'CAFÉ SOCIETY', 'Das Glück der Erde', 'Ñandú y otros cuentos',
+          'Ελληνική μυθολογία', 'Преступление и наказание', 'naïve café', None, 'Plain Title']
+
+
+@pytest.mark.parametrize('query', ['café', 'CAFÉ', 'glück', 'ñandú', 'ελληνική', 'μυθ',
+                                   'наказание', 'ïve', 'caf', 'cafe'])
+def test_non_ascii_substrings(query):
+    column = pd.Series(TITLES)
+    popularity = np.linspace(1, 0, len(TITLES))
+    matches = column.fillna('').str.lower().str.contains(query.lower(), regex=False).to_numpy()
+    assert_same_hits(SearchIndex(column).search(query, popularity), matches, popularity)
+
+
+@pytest.mark.parametrize('query', ['ñ', 'ελ', 'Пр', 'ca'])
+def test_non_ascii_prefixes(query):
+    column = pd.Series(TITLES)
+    popularity = np.linspace(1, 0, len(TITLES))
+    matches = column.fillna('').str.contains(r'\b' + re.escape(query), case=False).to_numpy()
+    assert_same_hits(SearchIndex(column).search(query, popularity), matches, popularity)
@@ -0,0 +1,51 @@
+import asyncio, json
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def app(rec):
+    app = server.RecommenderApp(rec, threads=1)
+    yield app
+    app.close()
+
+
+def get(app, path, query=''):
+    status, body = asyncio.run(app.handle('GET', path, query))
+    return status, json.loads(body)
+
+
+def test_ok(app, rec):
+    isbn = rec.books['ISBN'].iloc[0]
+    status, body = get(app, '/content', f'isbn={isbn}&n=3')
+    assert status == 200
+    assert body['isbn'] == isbn and len(body['results']) <= 3
+
+
+@pytest.mark.parametrize('query', ['n=abc', 'n=0', f'n={server.MAX_N + 1}', 'method=nope'])
+def test_bad_parameters(app, rec, query):
+    user_id = rec._user_ids[0]
+    status, body = get(app, '/collaborative', f'user_id={user_id}&{query}')
+    assert status == 400 and body['error']
+
+
+@pytest.mark.parametrize('path, query', [('/content', 'isbn=not-an-isbn'),
+                                         ('/similar', 'isbn=not-an-isbn'),
+                                         ('/collaborative', 'user_id=999999999'),
+                                         ('/recommend', 'user_id=999999999'),
+                                         ('/nowhere', '')])
+def test_not_found(app, path, query):
+    status, body = get(app, path, query)
+    assert status == 404 and body['error']
+
+
+def test_internal_error_is_500_and_logged(app, rec, monkeypatch, capsys):
+    def broken(*args, **kwargs):
+        raise KeyError('boom')
+    monkeypatch.setattr(rec, 'content_results', broken)
+    status, body = get(app, '/content', f"isbn={rec.books['ISBN'].iloc[0]}")
+    assert status == 500 and 'KeyError' in body['error']
+    assert app.stats['errors'] == 1
+    assert 'KeyError' in capsys.readouterr().err
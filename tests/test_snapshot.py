@@ -0,0 +1,75 @@
+import os, shutil
+
+import pytest
+
+from main import DATA_DIR, DataLoader
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for f in DataLoader.FILES:
+        shutil.copy(os.path.join(DATA_DIR, f), tmp_path)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Number of times the CSVs were parsed instead of served from the snapshot."""
+    calls = []
+    parse = DataLoader._parse_csvs
+    monkeypatch.setattr(DataLoader, '_parse_csvs', lambda self: calls.append(1) or parse(self))
+    return calls
+
+
+def rating_of(ratings, user_id, isbn):
+    hit = ratings[(ratings['User-ID'] == user_id) & (ratings['ISBN'].astype(str) == isbn)]
+    return int(hit['Book-Rating'].iloc[0])
+
+
+def edit_first_rating(path):
+    """Change the first rating in place (same file size) and move the mtime on."""
+    with open(path, encoding='latin-1') as fh:
+        lines = fh.read().split('\n')
+    user_id, isbn, rating = lines[1].split(';')
+    new = '9' if rating != '9' else '8'
+    lines[1] = ';'.join([user_id, isbn, new])
+    with open(path, 'w', encoding='latin-1') as fh:
+        fh.write('\n'.join(lines))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    return int(user_id), isbn, int(new)
+
+
+def test_unchanged_and_touched_sources_use_the_snapshot(data_dir, parses):
+    first = DataLoader(data_dir).load()
+    assert len(parses) == 1
+    second = DataLoader(data_dir).load()
+    assert len(parses) == 1
+    assert all(a.equals(b) for a, b in zip(first, second))
+
+    path = os.path.join(data_dir, 'BX-Ratings.csv')
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))   # `touch`, same bytes
+    DataLoader(data_dir).load()
+    assert len(parses) == 1
+
+
+def test_same_size_edit_reparses(data_dir, parses):
+    DataLoader(data_dir).load()
+    user_id, isbn, rating = edit_first_rating(os.path.join(data_dir, 'BX-Ratings.csv'))
+    _, ratings, _ = DataLoader(data_dir).load()
+    assert len(parses) == 2
+    assert rating_of(ratings, user_id, isbn) == rating
+    DataLoader(data_dir).load()                     # and the new snapshot is used again
+    assert len(parses) == 2
+
+
+def test_appended_rows_reparse(data_dir, parses):
+    books, ratings, _ = DataLoader(data_dir).load()
+    isbn = str(books['ISBN'].iloc[0])
+    with open(os.path.join(data_dir, 'BX-Ratings.csv'), 'a', encoding='latin-1') as fh:
+        fh.write(f"\n987654321;{isbn};7")
+    _, updated, _ = DataLoader(data_dir).load()
+    assert len(parses) == 2
+    assert len(updated) == len(ratings) + 1
+    assert rating_of(updated, 987654321, isbn) == 7
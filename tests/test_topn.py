@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+import main
+from main import top_n, top_k_rows
+
+
+def brute_top_n(x, n):
+    return np.argsort(-np.asarray(x), kind='stable')[:max(n, 0)]
+
+
+@pytest.mark.parametrize('size', [0, 1, 7, 100, 5000])
+@pytest.mark.parametrize('n', [0, 1, 3, 10, 99, 100, 101, 10_000])
+def test_top_n_matches_stable_argsort(size, n):
+    rng = np.random.default_rng(size * 31 + n)
+    for x in (rng.integers(0, 5, size).astype(float),      # many ties
+              rng.random(size),
+              np.zeros(size)):                             # all tied
+        assert np.array_equal(top_n(x, n), brute_top_n(x, n))
+
+
+def test_top_n_ties_go_to_lower_positions():
+    assert top_n([1, 3, 3, 2, 3], 2).tolist() == [1, 2]
+    assert top_n([5, 5, 5], 5).tolist() == [0, 1, 2]
+    assert top_n([1, 2], 0).tolist() == []
+
+
+def random_csr(rng, n_rows, n_cols):
+    """Rows of very different lengths (several padding classes), some empty,
+    small integer values so rows are full of ties."""
+    lengths = rng.choice([0, 1, 2, 5, 17, 64, 300], n_rows)
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    indices = np.concatenate([rng.choice(n_cols, l, replace=False) for l in lengths]).astype(np.int32)
+    data = rng.integers(1, 6, indptr[-1]).astype(np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(n_rows, n_cols))
+
+
+@pytest.mark.parametrize('cells', [None, 512])           # 512: rows split over many blocks
+@pytest.mark.parametrize('k', [0, 1, 4, 17, 400])
+def test_top_k_rows_matches_per_row_top_n(k, cells, monkeypatch):
+    if cells:
+        monkeypatch.setattr(main, 'PADDED_TOPK_CELLS', cells)
+    rng = np.random.default_rng(k)
+    mat = random_csr(rng, 200, 1000)
+    cols, vals = top_k_rows(mat, k)
+    assert cols.shape == vals.shape == (200, max(k, 0))
+    for r in range(mat.shape[0]):
+        start, end = mat.indptr[r], mat.indptr[r + 1]
+        best = brute_top_n(mat.data[start:end], k)
+        m = len(best)
+        assert np.array_equal(cols[r, :m], mat.indices[start:end][best]), f"row {r}"
+        assert np.array_equal(vals[r, :m], mat.data[start:end][best])
+        assert (cols[r, m:] == -1).all() and (vals[r, m:] == 0).all()